@@ -1,7 +1,9 @@
 from crapssim import Table
 from crapssim import Player
 from crapssim import strategy
-import sys 
+from crapssim.events import TextSink
+from crapssim.results import MULTI_COLUMNS, SESSION_COLUMNS, ResultsWriter
+from crapssim.runner import run_simulations, run_until_precise, write_csv
 import os 
 
 
@@ -13,80 +15,93 @@ def run_printout(n_roll, n_shooter, bankroll, strategy, strategy_name, runout):
     print("Running printout for " + os.path.basename(outfile_name))
     # print("Running printout for {}_sim-{}_roll-{}_br-{}{}.txt".format(strategy_name, n_sim, n_roll, bankroll, runout_str))
     with open(outfile_name, 'w') as f_out:
-        sys.stdout = f_out
-        table = Table()
+        table = Table(sink=TextSink(f_out))
         table.add_player(Player(bankroll, strategy))
         table.run(n_roll, n_shooter, verbose=True)
-    sys.stdout = sys.__stdout__ # reset stdout
 
-def run_simulation(n_sim, n_roll, bankroll, strategy, strategy_name, runout):
+def _write_sessions(outfile_name, sessions, binary=False):
+    # csv with one line per session, or columnar shards in a directory named like the file
+    if binary:
+        with ResultsWriter(os.path.splitext(outfile_name)[0], columns=SESSION_COLUMNS) as writer:
+            writer.write_rows(sessions)
+    else:
+        with open(outfile_name, 'w') as f_out:
+            # Headers to match out
+            f_out.write("total_cash,bankroll,n_rolls")
+            f_out.write(str('\n'))
+            for session in sessions:
+                f_out.write("{},{},{}".format(*session))
+                f_out.write(str('\n'))
+
+def run_simulation(n_sim, n_roll, bankroll, strategy, strategy_name, runout, binary=False):
     runout_str = "_runout" if runout else ""
     # Run simulation of n_roll rolls (estimated rolls/hour with 5 players) 1000 times
     outfile_name = "./output/simulations/{}_sim-{}_roll-{}_br-{}{}.txt".format(strategy_name, n_sim, n_roll, bankroll, runout_str)
     print("Running simulations for {}_sim-{}_roll-{}_br-{}{}.txt".format(strategy_name, n_sim, n_roll, bankroll, runout_str))
-    with open(outfile_name, 'w') as f_out:
-        # Headers to match out
-        f_out.write("total_cash,bankroll,n_rolls") 
-        f_out.write(str('\n'))
+
+    def sessions():
         for _ in range(n_sim):
             table = Table()
             table.add_player(Player(bankroll, strategy))
             table.run(n_roll, verbose=False, runout=runout)
-            # write data to file
-            out = "{},{},{}".format(table.total_player_cash, bankroll, table.dice.n_rolls_)
-            f_out.write(str(out))
-            f_out.write(str('\n'))
+            yield table.total_player_cash, bankroll, table.dice.n_rolls
 
-def run_simulation_burnin(n_sim, n_roll, bankroll, strategy, strategy_name, burn_in=20, runout=True):
+    _write_sessions(outfile_name, sessions(), binary)
+
+def run_simulation_burnin(n_sim, n_roll, bankroll, strategy, strategy_name, burn_in=20, runout=True, binary=False,
+                          n_branches=1):
     runout_str = "_runout" if runout else ""
     # Run simulation of n_roll rolls (estimated rolls/hour with 5 players) 1000 times
     outfile_name = "./output/simulations/{}_sim-{}_roll-{}_br-{}_burnin{}.txt".format(strategy_name, n_sim, n_roll, bankroll, runout_str)
     print("Running simulations for {}_sim-{}_roll-{}_br-{}_burnin{}.txt".format(strategy_name, n_sim, n_roll, bankroll, runout_str))
-    with open(outfile_name, 'w') as f_out:
-        # Headers to match out
-        f_out.write("total_cash,bankroll,n_rolls") 
-        f_out.write(str('\n'))
-        for _ in range(n_sim):
+
+    def sessions():
+        # each burn-in is shared by n_branches sessions, continuing it with their own dice
+        for start in range(0, n_sim, n_branches):
             table = Table()
             table.add_player(Player(bankroll, strategy))
 
             table.run(burn_in, verbose=False, runout=False)
             burn_in_bankroll = table.total_player_cash
-            table.run(n_roll, verbose=False, runout=runout)
-            # write data to file
-            out = "{},{},{}".format(table.total_player_cash, burn_in_bankroll, table.dice.n_rolls_)
-            f_out.write(str(out))
-            f_out.write(str('\n'))
+            branches = [table] if n_branches == 1 else table.branch(min(n_branches, n_sim - start))
+            for branch in branches:
+                branch.run(n_roll, verbose=False, runout=runout)
+                yield branch.total_player_cash, burn_in_bankroll, branch.dice.n_rolls
 
-def run_multi_simulation(n_sim, n_roll, n_shooter, bankroll, strategy, name, runout=True):
+    _write_sessions(outfile_name, sessions(), binary)
+
+def run_multi_simulation(n_sim, n_roll, n_shooter, bankroll, strategy, name, runout=True, n_workers=1, seed=None, binary=False,
+                         cache=None, checkpoint=None):
     runout_str = "_runout" if runout else ""
     # Run simulation of n_roll rolls (estimated rolls/hour with 5 players) 1000 times
     outfile_name = "./output/simulations/{}_sim-{}_roll-{}_br-{}_burnin{}.txt".format(name, n_sim, n_roll, bankroll, runout_str)
     print("Running simulations for {}_sim-{}_roll-{}_br-{}_burnin{}.txt".format(name, n_sim, n_roll, bankroll, runout_str))
-    with open(outfile_name, 'w') as f_out:
-        # Headers to match out
-        f_out.write("simid,strategy,total_cash,bankroll,n_rolls") 
-        f_out.write(str('\n'))
-        for i in range(n_sim):
-            if i % 1000 == 0:
-                print(f"i: {i}")
-            table = Table() 
-            table.set_payouts("fielddouble", [2])
-            table.set_payouts("fieldtriple", [12])
-            for bank, s in zip(bankroll, strategy):
-                table.add_player(Player(bank, strategy[s], s))
-
-            # table.run(burn_in, verbose=False, runout=False)
-            # burn_in_bankroll = table.total_player_cash
-            table.run(n_roll, n_shooter, verbose=False, runout=runout)
-            # write data to file
-            # TODO: get actual player cash 
-            for bank, s in zip(bankroll, strategy):
-                out = f"{i},{s},{table._get_player(s).bankroll},{bank},{table.dice.n_rolls}"
-                # out = "{},{},{},{}".format(s, table.total_player_cash, bank, table.dice.n_rolls_)
-                f_out.write(str(out))
-                f_out.write(str('\n'))
-
+    rows = run_simulations(
+        strategy, bankroll, n_sim, n_roll, n_shooter, runout=runout, n_workers=n_workers, seed=seed,
+        payouts={"fielddouble": [2], "fieldtriple": [12]}, cache=cache, checkpoint=checkpoint,
+    )
+    if binary:
+        with ResultsWriter(os.path.splitext(outfile_name)[0], columns=MULTI_COLUMNS) as writer:
+            writer.write_rows(rows)
+    else:
+        with open(outfile_name, 'w') as f_out:
+            write_csv(rows, f_out)
+
+def run_precise_simulation(n_roll, n_shooter, bankroll, strategy, name, runout=True, mean_half_width=None,
+                           ruin_half_width=None, max_sims=100000, n_workers=1, seed=None):
+    # Run batches of sessions until the estimates for every strategy are within the targets
+    print("Running simulations for {} until precise".format(name))
+    result = run_until_precise(
+        strategy, bankroll, n_roll, n_shooter, runout=runout, mean_half_width=mean_half_width,
+        ruin_half_width=ruin_half_width, max_sims=max_sims, n_workers=n_workers, seed=seed,
+        payouts={"fielddouble": [2], "fieldtriple": [12]},
+    )
+    status = "met" if result["converged"] else "not met"
+    print("Ran {} sessions, targets {}".format(result["n_sim"], status))
+    for s, summary in result["summary"].items():
+        print("{}: mean {:.2f} +/- {:.2f}, p_ruin {:.4f} +/- {:.4f}".format(
+            s, summary["mean"], summary["mean_half_width"], summary["p_ruin"], summary["ruin_half_width"]))
+    return result
 
 
 if __name__ == "__main__":
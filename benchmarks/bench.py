@@ -0,0 +1,219 @@
+"""
+Benchmarks of rolls and sessions per second for the strategies in
+crapssim/strategy.py.
+
+Every strategy is run at tables of 1, 10 and 100 players (all playing that
+strategy), with verbose on and off and runout on and off.  Verbose output goes
+to os.devnull, so the cost of formatting the printout is measured but not of
+a terminal.
+
+    python benchmarks/bench.py run --out bench.json
+    python benchmarks/bench.py compare baseline.json bench.json --threshold 0.1
+
+``compare`` exits with status 1 if any case is slower than the baseline by
+more than the threshold, raised an error, or is missing from the current
+report.  Functions of crapssim/strategy.py that can't run on their own, listed
+in SKIPPED, are not benchmarked.
+"""
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from crapssim import Player, Table, strategy  # noqa: E402
+from crapssim.dice import Dice  # noqa: E402
+from crapssim.events import TextSink  # noqa: E402
+
+PLAYERS = (1, 10, 100)
+KEY_FIELDS = ("strategy", "players", "verbose", "runout")
+
+# public functions of crapssim.strategy that are not benchmarked, with the reason
+SKIPPED = {
+    "place": "helper of other strategies, needs the strat_info they pass",
+    "memoryless": "decorator marking memoryless strategies, not a strategy",
+}
+
+
+def strategies():
+    """ every public strategy function of crapssim.strategy not in SKIPPED, by name """
+    return {
+        name: f
+        for name, f in inspect.getmembers(strategy, inspect.isfunction)
+        if f.__module__ == strategy.__name__ and not name.startswith("_") and name not in SKIPPED
+    }
+
+
+def run_case(bet_strategy, n_players, verbose, runout, session_rolls=100, bankroll=1000,
+             min_time=0.2, repeat=3, seed=0):
+    """
+    Time sessions of ``session_rolls`` rolls until ``min_time`` seconds have
+    passed, ``repeat`` times, and keep the fastest rates.
+    """
+    best = None
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for r in range(repeat):
+            n_sessions = 0
+            n_rolls = 0
+            start = time.perf_counter()
+            elapsed = 0.0
+            while elapsed < min_time or n_sessions == 0:
+                sink = TextSink(devnull) if verbose else None
+                table = Table(dice=Dice(seed=(seed, r, n_sessions)), sink=sink)
+                for i in range(n_players):
+                    table.add_player(Player(bankroll, bet_strategy, f"P{i}"))
+                table.run(session_rolls, verbose=verbose, runout=runout)
+                n_sessions += 1
+                n_rolls += table.dice.n_rolls
+                elapsed = time.perf_counter() - start
+            result = {
+                "sessions": n_sessions,
+                "rolls": n_rolls,
+                "seconds": elapsed,
+                "rolls_per_sec": n_rolls / elapsed,
+                "sessions_per_sec": n_sessions / elapsed,
+            }
+            if best is None or result["rolls_per_sec"] > best["rolls_per_sec"]:
+                best = result
+    return best
+
+
+def run(args):
+    names = args.strategies or sorted(strategies())
+    all_strategies = strategies()
+    results = []
+    for name in names:
+        if name in SKIPPED:
+            print(f"{name:<16} skipped: {SKIPPED[name]}", file=sys.stderr)
+            continue
+        for n_players in args.players:
+            for verbose in (False, True):
+                for runout in (False, True):
+                    case = dict(strategy=name, players=n_players, verbose=verbose, runout=runout)
+                    try:
+                        case.update(
+                            run_case(
+                                all_strategies[name], n_players, verbose, runout,
+                                session_rolls=args.rolls, min_time=args.min_time,
+                                repeat=args.repeat,
+                            )
+                        )
+                    except Exception as e:
+                        case["error"] = f"{type(e).__name__}: {e}"
+                    results.append(case)
+                    print(_format_case(case), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "session_rolls": args.rolls,
+            "min_time": args.min_time,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def _format_case(case):
+    key = _format_key(tuple(case[k] for k in KEY_FIELDS))
+    if "error" in case:
+        return f"{key} error {case['error']}"
+    return f"{key} {case['rolls_per_sec']:>12,.0f} rolls/s {case['sessions_per_sec']:>10,.1f} sessions/s"
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compare two reports.
+
+    Returns
+    -------
+    rows : list
+        ``(key, baseline rate, current rate, ratio)`` for every case timed in both
+    slower : list
+        Keys of the cases slower than the baseline by more than ``threshold``
+    failed : list
+        ``(key, reason)`` for every case that raised an error in the current
+        report, or that the baseline timed and the current report is missing
+    """
+    base = {tuple(c[k] for k in KEY_FIELDS): c for c in baseline["results"]}
+    rows = []
+    slower = []
+    failed = []
+    seen = set()
+    for case in current["results"]:
+        key = tuple(case[k] for k in KEY_FIELDS)
+        seen.add(key)
+        if "error" in case:
+            failed.append((key, case["error"]))
+            continue
+        if key not in base or "error" in base[key]:
+            continue
+        old = base[key]["rolls_per_sec"]
+        new = case["rolls_per_sec"]
+        ratio = new / old
+        rows.append((key, old, new, ratio))
+        if ratio < 1 - threshold:
+            slower.append(key)
+    for key, case in base.items():
+        if key not in seen and "error" not in case:
+            failed.append((key, "missing"))
+    return rows, slower, failed
+
+
+def run_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, slower, failed = compare(baseline, current, args.threshold)
+    for key, old, new, ratio in rows:
+        flag = "  SLOWER" if key in slower else ""
+        print(_format_key(key) + f" {old:>12,.0f} -> {new:>12,.0f} rolls/s ({ratio:.2f}x){flag}")
+    for key, reason in failed:
+        print(_format_key(key) + f" FAILED {reason}")
+    print(f"{len(slower)} of {len(rows)} cases slower by more than {args.threshold:.0%}, {len(failed)} failed")
+    return 1 if slower or failed else 0
+
+
+def _format_key(key):
+    return "{strategy:<16} players={players:<3} verbose={verbose!s:<5} runout={runout!s:<5}".format(
+        **dict(zip(KEY_FIELDS, key))
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--out", default="bench.json", help="report to write")
+    run_parser.add_argument("--strategies", nargs="*", help="strategies to run, default all")
+    run_parser.add_argument("--players", nargs="*", type=int, default=list(PLAYERS))
+    run_parser.add_argument("--rolls", type=int, default=100, help="max_rolls of each session")
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="seconds to time each case")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timings per case, fastest is kept")
+
+    compare_parser = commands.add_parser("compare", help="compare a report against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative slowdown to flag, default 0.1")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    return run_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
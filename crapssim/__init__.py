@@ -1,5 +1,7 @@
 __all__ = ["table", "player", "dice", "strategy", "bet"]
 
+__version__ = "0.2.0"
+
 from crapssim.table import Table
 from crapssim.player import Player
 from crapssim.dice import Dice
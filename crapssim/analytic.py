@@ -0,0 +1,465 @@
+import copy
+from itertools import chain
+
+import numpy as np
+
+from crapssim.dice import Dice
+from crapssim.player import Player
+from crapssim.table import Table
+
+"""
+Exact evaluation of bets and memoryless strategies.
+
+Rather than simulating millions of rolls, these functions walk the Markov
+chain of the table: the state is the point (from ``_Point``) together with the
+state of the bets, and each of the 11 dice totals moves the chain with its
+exact probability.  Transitions are found by calling the bets' own
+``_update_bet`` methods, so any bet or strategy built from ``crapssim.bet``
+is evaluated with the same rules the simulator uses.
+
+``session_distribution`` adds the player's cash to the state and pushes the
+probability of every (bets, cash) state forward roll by roll, giving the
+exact distribution of a session's outcome.
+"""
+
+# number of ways to roll each total with two dice
+TOTAL_WAYS = {2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 7: 6, 8: 5, 9: 4, 10: 3, 11: 2, 12: 1}
+TOTAL_PROBS = {total: ways / 36 for total, ways in TOTAL_WAYS.items()}
+
+
+def _dice(total):
+    """ Dice showing one of the outcomes that sum to ``total`` """
+    dice = Dice()
+    dice.fixed_roll([max(1, total - 6), min(6, total - 1)])
+    return dice
+
+
+def _table(point):
+    table = Table()
+    if point is not None:
+        table.point.status = "On"
+        table.point.number = point
+    return table
+
+
+def _bet_key(bet):
+    """ hashable description of everything that determines how a bet resolves """
+    return (
+        type(bet).__name__,
+        bet.name,
+        bet.subname,
+        bet.bet_amount,
+        tuple(bet.winning_numbers),
+        tuple(bet.losing_numbers),
+        tuple(getattr(bet, "push_numbers", ())),
+        getattr(bet, "prepoint", None),
+    )
+
+
+def _explore(start, key_fn, transitions):
+    """
+    Enumerate the states reachable from ``start``.
+
+    ``transitions(state)`` returns a list of ``(probability, next_state, info)``
+    with ``next_state`` None when the chain is absorbed.  Returns the list of
+    ``(key, outcomes)`` of every state and a dictionary from key to index.
+    """
+    states = []
+    index = {}
+    queue = [start]
+    while queue:
+        state = queue.pop()
+        key = key_fn(state)
+        if key in index:
+            continue
+        index[key] = len(states)
+        outcomes = transitions(state)
+        states.append((key, outcomes))
+        queue.extend(s for _, s, _ in outcomes if s is not None)
+    return states, index
+
+
+def _absorbing_solve(q, r):
+    """ solve x = r + q x for each column of r """
+    return np.linalg.solve(np.eye(len(q)) - q, r)
+
+
+def evaluate_bet(bet_object, point=None):
+    """
+    Exact expected value, variance and resolution probabilities of a bet.
+
+    Parameters
+    ----------
+    bet_object : Bet
+        Bet as it is placed on the table, e.g. ``PassLine(5)`` or
+        ``Odds(10, passline_bet)``.  The object itself is not changed.
+    point : int, optional
+        Point number when the bet is placed, None when the point is "Off"
+
+    Returns
+    -------
+    dictionary
+        ``ev`` (expected net win), ``house_edge`` (negative ev per dollar
+        wagered), ``variance`` of the net win, ``expected_rolls`` until the bet
+        resolves, the probabilities ``p_win``, ``p_lose`` and ``p_push`` that
+        the bet eventually wins, loses or pushes, and ``roll_probabilities``,
+        the chance of each status on a single roll in every state of the bet,
+        keyed by ``(point, winning_numbers, losing_numbers)``.
+    """
+
+    def key_fn(state):
+        point, bet = state
+        return point, _bet_key(bet)
+
+    def transitions(state):
+        point, bet = state
+        outcomes = []
+        for total, prob in TOTAL_PROBS.items():
+            table = _table(point)
+            dice = _dice(total)
+            next_bet = copy.deepcopy(bet)
+            status, win_amount = next_bet._update_bet(table, dice)
+            if status is None:
+                table.point.update(dice)
+                outcomes.append((prob, (table.point.number, next_bet), None))
+            else:
+                net = {"win": win_amount, "lose": -bet.bet_amount, "push": 0}[status]
+                outcomes.append((prob, None, (status, net)))
+        return outcomes
+
+    states, index = _explore((point, copy.deepcopy(bet_object)), key_fn, transitions)
+
+    n = len(states)
+    q = np.zeros((n, n))
+    # columns: net, net squared, one, win, lose, push
+    r = np.zeros((n, 6))
+    r[:, 2] = 1
+    roll_probabilities = {}
+    for i, (key, outcomes) in enumerate(states):
+        probs = {"win": 0.0, "lose": 0.0, "push": 0.0, None: 0.0}
+        for prob, next_state, info in outcomes:
+            if next_state is None:
+                status, net = info
+                probs[status] += prob
+                r[i, 0] += prob * net
+                r[i, 1] += prob * net ** 2
+                r[i, 3 + ["win", "lose", "push"].index(status)] += prob
+            else:
+                probs[None] += prob
+                q[i, index[key_fn(next_state)]] += prob
+        point_number, bet_key = key
+        roll_probabilities[(point_number, bet_key[4], bet_key[5])] = probs
+
+    x = _absorbing_solve(q, r)[0]
+    ev = float(x[0])
+    return {
+        "ev": ev,
+        "house_edge": -ev / bet_object.bet_amount,
+        "variance": float(x[1]) - ev ** 2,
+        "expected_rolls": float(x[2]),
+        "p_win": float(x[3]),
+        "p_lose": float(x[4]),
+        "p_push": float(x[5]),
+        "roll_probabilities": roll_probabilities,
+    }
+
+
+def _strategy_key(state):
+    table, player = state
+    return table.point.number, tuple(_bet_key(b) for b in player.bets_on_table)
+
+
+def _apply_strategy(table, player, unit, **strat_kwargs):
+    """ let the player make their bets, returning the net amount put in action """
+    before = player.total_bet_amount
+    strat_info = player._add_strategy_bets(table, unit=unit, strat_info=None, **strat_kwargs)
+    if strat_info is not None:
+        raise ValueError("Strategy keeps strat_info, so it is not memoryless")
+    return player.total_bet_amount - before
+
+
+def _settle(table, player, total):
+    """
+    Roll ``total`` and update the bets and the table.  Returns the player's
+    net win, and the amount and number of bets that resolved.
+    """
+    dice = _dice(total)
+    table.dice = dice
+    player.bankroll = 0.0
+    before = player.total_bet_amount
+    bets = list(player.bets_on_table)
+    player._update_bet(table, dice)
+    remaining = {id(b) for b in player.bets_on_table}
+    resolved = [b for b in bets if id(b) not in remaining]
+    net = player.bankroll + player.total_bet_amount - before
+    player.bankroll = float("inf")
+    table._update_table(dice)
+    return net, sum(b.bet_amount for b in resolved), len(resolved)
+
+
+def evaluate_strategy(bet_strategy, unit=5, payouts=None):
+    """
+    Exact long-run behaviour of a memoryless strategy with unlimited bankroll.
+
+    A memoryless strategy makes the same bets whenever it sees the same point
+    and bets on the table, and does not keep ``strat_info``, e.g.
+    ``passline``, ``place68`` or ``dontpass``.  The chain over those states is
+    solved for its stationary distribution.
+
+    Parameters
+    ----------
+    bet_strategy : function
+        Strategy function, as passed to ``Player``
+    unit : float, optional (default = 5)
+        Betting unit passed to the strategy
+    payouts : dictionary, optional
+        Table payouts to set, as in ``Table.set_payouts``
+
+    Returns
+    -------
+    dictionary
+        ``ev_per_roll`` and ``variance_per_roll`` of the player's net win on a
+        single roll, ``wagered_per_roll`` (net dollars the strategy puts in
+        action), ``resolved_per_roll`` (dollars of bets resolved), ``house_edge``
+        (negative ev per dollar resolved), ``rolls_per_resolution`` (expected
+        rolls between bet resolutions) and ``point_distribution``, the long run
+        share of rolls made with each point number (None for "Off").
+    """
+    table = _table(None)
+    if payouts is not None:
+        for name, value in payouts.items():
+            table.set_payouts(name, value)
+    player = Player(float("inf"), bet_strategy)
+
+    def transitions(state):
+        table, player = copy.deepcopy(state)
+        wagered = _apply_strategy(table, player, unit)
+        outcomes = []
+        for total, prob in TOTAL_PROBS.items():
+            next_state = copy.deepcopy((table, player))
+            info = _settle(*next_state, total) + (wagered,)
+            outcomes.append((prob, next_state, info))
+        return outcomes
+
+    states, index = _explore((table, player), _strategy_key, transitions)
+
+    n = len(states)
+    p = np.zeros((n, n))
+    # columns: net, net squared, amount resolved, bets resolved, wagered
+    r = np.zeros((n, 5))
+    for i, (_, outcomes) in enumerate(states):
+        for prob, next_state, (net, resolved, n_resolved, wagered) in outcomes:
+            p[i, index[_strategy_key(next_state)]] += prob
+            r[i] += prob * np.array([net, net ** 2, resolved, n_resolved, wagered])
+
+    # stationary distribution: pi P = pi, sum(pi) = 1
+    a = np.vstack([p.T - np.eye(n), np.ones(n)])
+    b = np.zeros(n + 1)
+    b[-1] = 1
+    pi = np.linalg.lstsq(a, b, rcond=None)[0]
+
+    ev, second_moment, resolved, n_resolved, wagered = (float(x) for x in pi @ r)
+    point_distribution = {}
+    for (key, _), share in zip(states, pi):
+        point_distribution[key[0]] = point_distribution.get(key[0], 0) + float(share)
+    return {
+        "ev_per_roll": ev,
+        "variance_per_roll": second_moment - ev ** 2,
+        "wagered_per_roll": wagered,
+        "resolved_per_roll": resolved,
+        "house_edge": -ev / resolved,
+        "rolls_per_resolution": 1 / n_resolved,
+        "point_distribution": point_distribution,
+    }
+
+
+def session_distribution(
+    bet_strategy,
+    bankroll,
+    max_rolls,
+    unit=5,
+    payouts=None,
+    runout=False,
+    ruin_level=0,
+    tol=1e-12,
+    **strat_kwargs,
+):
+    """
+    Exact distribution of the player's cash at the end of a session.
+
+    The state of the chain is the point, the player's bets and their total
+    cash (bankroll plus bets on the table).  The probability of every state is
+    carried forward one roll at a time, as arrays of cash amounts and
+    probabilities for each point and set of bets, and the session stops as
+    ``Table.run`` does: after ``max_rolls`` rolls, or once the player has no
+    cash left.  Works for memoryless strategies (see ``evaluate_strategy``),
+    which may still depend on the bankroll through bets it can't cover.
+
+    Parameters
+    ----------
+    bet_strategy : function
+        Strategy function, as passed to ``Player``
+    bankroll : float
+        Starting bankroll of the player
+    max_rolls : int
+        Maximum number of rolls to run for
+    unit : float, optional (default = 5)
+        Betting unit passed to the strategy
+    payouts : dictionary, optional
+        Table payouts to set, as in ``Table.set_payouts``
+    runout : bool, optional (default = False)
+        If true, continue past max_rolls until the player has no bets on the
+        table.  Sessions are then followed until less than ``tol`` of the
+        probability is still running.
+    ruin_level : float, optional (default = 0)
+        Final cash at or below which a session counts as ruined
+    tol : float, optional (default = 1e-12)
+        Probability of running sessions at which a runout is cut off
+    **strat_kwargs
+        Extra keyword arguments of the strategy, e.g. ``mult``
+
+    Returns
+    -------
+    dictionary
+        ``distribution`` (a dictionary from final cash to probability, in
+        increasing order of cash), ``mean`` and ``sd`` of the final cash,
+        ``p_ruin``, ``p_bust`` (final cash below ``bankroll``), ``mean_rolls``
+        and ``truncated``, the probability of sessions still running when a
+        runout was cut off.
+    """
+    table = _table(None)
+    if payouts is not None:
+        for name, value in payouts.items():
+            table.set_payouts(name, value)
+    player = Player(float("inf"), bet_strategy)
+
+    # states are numbered as they are reached.  For each state keep a table
+    # and player in it, their amount on the table and whether they have bets,
+    # the strategy's decision with enough cash (next state and the bankroll
+    # it needs so no bet is rejected) and the distinct outcomes of a roll:
+    # next state, change of cash and probability.
+    index = {}
+    states = []
+    bet_amount = []
+    has_bets = []
+    decision = []
+    needed = []
+    rolled = []
+    roll_next = []
+    roll_net = []
+    roll_prob = []
+
+    def add_state(state):
+        key = _strategy_key(state)
+        if key not in index:
+            index[key] = len(states)
+            states.append(state)
+            bet_amount.append(state[1].total_bet_amount)
+            has_bets.append(bool(state[1].bets_on_table))
+            # filled in by decide() and roll() when the state is first met
+            decision.append(-1)
+            needed.append(0.0)
+            rolled.append(False)
+            roll_next.append(())
+            roll_net.append(())
+            roll_prob.append(())
+        return index[key]
+
+    def decide(i, player_bankroll):
+        """ state after the strategy bets with ``player_bankroll``, and the bankroll it needs """
+        table, player = copy.deepcopy(states[i])
+        player.bankroll = player_bankroll
+        strat_info, recording = player._record_strategy_bets(
+            table, unit=unit, strat_info=None, **strat_kwargs
+        )
+        if strat_info is not None:
+            raise ValueError("Strategy keeps strat_info, so it is not memoryless")
+        bets = sum(arg.bet_amount for action, arg in recording if action != "remove")
+        return add_state((table, player)), bets
+
+    def roll(i):
+        outcomes = {}
+        for total, prob in TOTAL_PROBS.items():
+            table, player = copy.deepcopy(states[i])
+            net, _, _ = _settle(table, player, total)
+            outcome = (add_state((table, player)), net)
+            outcomes[outcome] = outcomes.get(outcome, 0.0) + prob
+        roll_next[i], roll_net[i] = zip(*outcomes)
+        roll_prob[i] = tuple(outcomes.values())
+        rolled[i] = True
+
+    state = np.array([add_state((table, player))])
+    cash = np.array([float(bankroll)])
+    probs = np.array([1.0])
+    uncovered_decisions = {}
+    final_cash, final_probs, final_rolls = [], [], []
+    truncated = 0.0
+    n_rolls = 0
+    while len(state):
+        n_rolls += 1
+
+        # the strategy bets, rejecting bets it has too little cash for
+        for i in np.unique(state):
+            if decision[i] < 0:
+                decision[i], needed[i] = decide(i, float("inf"))
+        post = np.array(decision)[state]
+        bankrolls = cash - np.array(bet_amount)[state]
+        for j in np.flatnonzero(bankrolls < np.array(needed)[state]):
+            key = (state[j], bankrolls[j])
+            if key not in uncovered_decisions:
+                uncovered_decisions[key] = decide(state[j], float(bankrolls[j]))[0]
+            post[j] = uncovered_decisions[key]
+
+        # the dice are rolled
+        for i in np.unique(post):
+            if not rolled[i]:
+                roll(i)
+        degree = np.array([len(outcomes) for outcomes in roll_next])
+        offsets = np.cumsum(degree) - degree
+        n_outcomes = degree[post]
+        element = np.repeat(np.arange(len(post)), n_outcomes)
+        first_outcome = np.cumsum(n_outcomes) - n_outcomes
+        outcome = np.arange(len(element)) - first_outcome[element] + offsets[post][element]
+        state = np.fromiter(chain.from_iterable(roll_next), dtype=np.intp)[outcome]
+        cash = cash[element] + np.fromiter(chain.from_iterable(roll_net), dtype=float)[outcome]
+        probs = probs[element] * np.fromiter(chain.from_iterable(roll_prob), dtype=float)[outcome]
+
+        # add up the probability of equal states, with cash reached along
+        # different paths possibly differing in the last bits
+        cash = np.round(cash, 9)
+        order = np.lexsort((cash, state))
+        state, cash, probs = state[order], cash[order], probs[order]
+        first = np.flatnonzero(
+            np.concatenate([[True], (state[1:] != state[:-1]) | (cash[1:] != cash[:-1])])
+        )
+        state, cash, probs = state[first], cash[first], np.add.reduceat(probs, first)
+
+        # evaluate the stopping condition
+        go_on = (cash > 0) & (n_rolls < max_rolls)
+        if runout:
+            go_on |= np.array(has_bets)[state]
+        final_cash.append(cash[~go_on])
+        final_probs.append(probs[~go_on])
+        final_rolls.append(np.full(len(go_on) - go_on.sum(), n_rolls))
+        state, cash, probs = state[go_on], cash[go_on], probs[go_on]
+
+        if n_rolls >= max_rolls and probs.sum() < tol:
+            truncated = float(probs.sum())
+            break
+
+    cash = np.concatenate(final_cash)
+    probs = np.concatenate(final_probs)
+    rolls = np.concatenate(final_rolls)
+    total_prob = probs.sum()
+    mean = float(cash @ probs / total_prob)
+    values, inverse = np.unique(cash, return_inverse=True)
+    value_probs = np.bincount(inverse, weights=probs)
+    return {
+        "distribution": {float(c): float(p) for c, p in zip(values, value_probs)},
+        "mean": mean,
+        "sd": float(np.sqrt(max((cash - mean) ** 2 @ probs / total_prob, 0.0))),
+        "p_ruin": float(probs[cash <= ruin_level].sum()),
+        "p_bust": float(probs[cash < bankroll].sum()),
+        "mean_rolls": float(rolls @ probs / total_prob),
+        "truncated": truncated,
+    }
@@ -1,6 +1,32 @@
+from functools import lru_cache
+
 from crapssim.dice import Dice
 
 
+@lru_cache(maxsize=None)
+def _outcome_table(winning_numbers, losing_numbers, push_numbers=(), payoutratio=1.0):
+    """
+    Precomputed resolution of a bet for every dice total.
+
+    Returns a tuple of 13 ``(status, payout multiplier)`` pairs indexed by
+    dice total, so a roll resolves with a single lookup.  Tables are shared
+    between all bets with the same numbers and payout.
+    """
+    outcomes = [(None, 0.0)] * 13
+    for n in push_numbers:
+        outcomes[n] = ("push", 0.0)
+    for n in losing_numbers:
+        outcomes[n] = ("lose", 0.0)
+    for n in winning_numbers:
+        outcomes[n] = ("win", payoutratio)
+    return tuple(outcomes)
+
+
+@lru_cache(maxsize=None)
+def _all_slots(cls):
+    return tuple(slot for c in cls.__mro__ for slot in getattr(c, "__slots__", ()))
+
+
 class Bet(object):
     """
     A generic bet for the craps table
@@ -23,32 +49,112 @@ class Bet(object):
     payoutratio : float
         Ratio that bet pays out on a win
 
+    Bets resolve from an outcome table built from winning_numbers,
+    losing_numbers and payoutratio the first time it is needed, and again
+    after any of them is assigned.  Assign a new list rather than changing
+    one in place.  Subclasses may set these attributes either before or
+    after calling ``Bet.__init__``.
     """
 
-    name = None
-    subname = ""
-    winning_numbers = []
-    losing_numbers = []
-    payoutratio = float(1)
+    __slots__ = (
+        "bet_amount",
+        "name",
+        "subname",
+        "_winning_numbers",
+        "_losing_numbers",
+        "_payoutratio",
+        "_outcomes",
+        "_pool",
+    )
     # TODO: add whether bet can be removed
 
     def __init__(self, bet_amount):
         self.bet_amount = float(bet_amount)
+        self._pool = None
+        self._outcomes = None
+        if type(self).__dictoffset__:
+            # subclasses without __slots__ may have set attributes already
+            self._set_missing_defaults()
+        else:
+            self.name = None
+            self.subname = ""
+            self._payoutratio = 1.0
+            self._winning_numbers = []
+            self._losing_numbers = []
+
+    def _set_missing_defaults(self):
+        """ defaults of the attributes a subclass did not set before ``Bet.__init__`` """
+        if not hasattr(self, "name"):
+            self.name = None
+        if not hasattr(self, "subname"):
+            self.subname = ""
+        if not hasattr(self, "_payoutratio"):
+            self._payoutratio = 1.0
+        if not hasattr(self, "_winning_numbers"):
+            self._winning_numbers = []
+        if not hasattr(self, "_losing_numbers"):
+            self._losing_numbers = []
 
     # def __eq__(self, other):
     #     return self.name == other.name
 
-    def _update_bet(self, table_object, dice_object: Dice):
-        status = None
-        win_amount = 0
-
-        if dice_object.total in self.winning_numbers:
-            status = "win"
-            win_amount = self.payoutratio * self.bet_amount
-        elif dice_object.total in self.losing_numbers:
-            status = "lose"
+    @property
+    def winning_numbers(self):
+        return self._winning_numbers
+
+    @winning_numbers.setter
+    def winning_numbers(self, numbers):
+        self._winning_numbers = list(numbers)
+        self._outcomes = None
+
+    @property
+    def losing_numbers(self):
+        return self._losing_numbers
+
+    @losing_numbers.setter
+    def losing_numbers(self, numbers):
+        self._losing_numbers = list(numbers)
+        self._outcomes = None
+
+    @property
+    def payoutratio(self):
+        return self._payoutratio
+
+    @payoutratio.setter
+    def payoutratio(self, ratio):
+        self._payoutratio = ratio
+        self._outcomes = None
+
+    def _set_numbers(self, winning_numbers, losing_numbers):
+        """ set the numbers the bet resolves on """
+        self._winning_numbers = list(winning_numbers)
+        self._losing_numbers = list(losing_numbers)
+        self._outcomes = None
+
+    def _build_outcomes(self):
+        """ precompute the outcome table of the bet's numbers and payout """
+        self._outcomes = _outcome_table(
+            tuple(self._winning_numbers), tuple(self._losing_numbers), (), self._payoutratio
+        )
+        return self._outcomes
 
-        return status, win_amount
+    def _update_bet(self, table_object, dice_object: Dice):
+        outcomes = self._outcomes
+        if outcomes is None:
+            outcomes = self._build_outcomes()
+        status, payoutratio = outcomes[dice_object.total]
+        return status, payoutratio * self.bet_amount
+
+    def _copy(self):
+        """ a new bet in the same state as this one """
+        cls = type(self)
+        new = cls.__new__(cls)
+        for slot in _all_slots(cls):
+            if hasattr(self, slot):
+                setattr(new, slot, getattr(self, slot))
+        if cls.__dictoffset__:
+            new.__dict__.update(self.__dict__)
+        return new
 
 
 """
@@ -59,32 +165,32 @@ Passline and Come bets
 class PassLine(Bet):
     # TODO: make this require that table_object.point = "Off",
     # probably better in the player module
+    __slots__ = ("prepoint",)
+    WINNING_NUMBERS = (7, 11)
+    LOSING_NUMBERS = (2, 3, 12)
+
     def __init__(self, bet_amount):
+        super().__init__(bet_amount)
         self.name = "PassLine"
-        self.winning_numbers = [7, 11]
-        self.losing_numbers = [2, 3, 12]
-        self.payoutratio = 1.0
+        self._payoutratio = 1.0
         self.prepoint = True
-        super().__init__(bet_amount)
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
     def _update_bet(self, table_object, dice_object):
-        status = None
-        win_amount = 0
-
-        if dice_object.total in self.winning_numbers:
-            status = "win"
-            win_amount = self.payoutratio * self.bet_amount
-        elif dice_object.total in self.losing_numbers:
-            status = "lose"
-        elif self.prepoint:
-            self.winning_numbers = [dice_object.total]
-            self.losing_numbers = [7]
+        outcomes = self._outcomes
+        if outcomes is None:
+            outcomes = self._build_outcomes()
+        status, payoutratio = outcomes[dice_object.total]
+        if status is None and self.prepoint:
+            self._set_numbers([dice_object.total], [7])
             self.prepoint = False
 
-        return status, win_amount
+        return status, payoutratio * self.bet_amount
 
 
 class Come(PassLine):
+    __slots__ = ()
+
     def __init__(self, bet_amount):
         super().__init__(bet_amount)
         self.name = "Come"
@@ -102,19 +208,21 @@ Passline/Come bet odds
 
 
 class Odds(Bet):
+    __slots__ = ()
+
     def __init__(self, bet_amount, bet_object):
         super().__init__(bet_amount)
         self.name = "Odds"
         self.subname = "".join(str(e) for e in bet_object.winning_numbers)
-        self.winning_numbers = bet_object.winning_numbers
-        self.losing_numbers = bet_object.losing_numbers
+        winning_numbers = bet_object.winning_numbers
 
-        if self.winning_numbers == [4] or self.winning_numbers == [10]:
-            self.payoutratio = 2 / 1
-        elif self.winning_numbers == [5] or self.winning_numbers == [9]:
-            self.payoutratio = 3 / 2
-        elif self.winning_numbers == [6] or self.winning_numbers == [8]:
-            self.payoutratio = 6 / 5
+        if winning_numbers == [4] or winning_numbers == [10]:
+            self._payoutratio = 2 / 1
+        elif winning_numbers == [5] or winning_numbers == [9]:
+            self._payoutratio = 3 / 2
+        elif winning_numbers == [6] or winning_numbers == [8]:
+            self._payoutratio = 6 / 5
+        self._set_numbers(winning_numbers, bet_object.losing_numbers)
 
 
 """
@@ -123,66 +231,90 @@ Place Bets on 4,5,6,8,9,10
 
 
 class Place(Bet):
+    __slots__ = ()
+
     def _update_bet(self, table_object, dice_object):
         # place bets are inactive when point is "Off"
         if table_object.point == "On":
-            return super()._update_bet(table_object, dice_object)
+            outcomes = self._outcomes
+            if outcomes is None:
+                outcomes = self._build_outcomes()
+            status, payoutratio = outcomes[dice_object.total]
+            return status, payoutratio * self.bet_amount
         else:
             return None, 0
 
 
 class Place4(Place):
+    __slots__ = ()
+    WINNING_NUMBERS = (4,)
+    LOSING_NUMBERS = (7,)
+
     def __init__(self, bet_amount):
-        self.name = "Place4"
-        self.winning_numbers = [4]
-        self.losing_numbers = [7]
-        self.payoutratio = 9 / 5
         super().__init__(bet_amount)
+        self.name = "Place4"
+        self._payoutratio = 9 / 5
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
 
 class Place5(Place):
+    __slots__ = ()
+    WINNING_NUMBERS = (5,)
+    LOSING_NUMBERS = (7,)
+
     def __init__(self, bet_amount):
-        self.name = "Place5"
-        self.winning_numbers = [5]
-        self.losing_numbers = [7]
-        self.payoutratio = 7 / 5
         super().__init__(bet_amount)
+        self.name = "Place5"
+        self._payoutratio = 7 / 5
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
 
 class Place6(Place):
+    __slots__ = ()
+    WINNING_NUMBERS = (6,)
+    LOSING_NUMBERS = (7,)
+
     def __init__(self, bet_amount):
-        self.name = "Place6"
-        self.winning_numbers = [6]
-        self.losing_numbers = [7]
-        self.payoutratio = 7 / 6
         super().__init__(bet_amount)
+        self.name = "Place6"
+        self._payoutratio = 7 / 6
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
 
 class Place8(Place):
+    __slots__ = ()
+    WINNING_NUMBERS = (8,)
+    LOSING_NUMBERS = (7,)
+
     def __init__(self, bet_amount):
-        self.name = "Place8"
-        self.winning_numbers = [8]
-        self.losing_numbers = [7]
-        self.payoutratio = 7 / 6
         super().__init__(bet_amount)
+        self.name = "Place8"
+        self._payoutratio = 7 / 6
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
 
 class Place9(Place):
+    __slots__ = ()
+    WINNING_NUMBERS = (9,)
+    LOSING_NUMBERS = (7,)
+
     def __init__(self, bet_amount):
-        self.name = "Place9"
-        self.winning_numbers = [9]
-        self.losing_numbers = [7]
-        self.payoutratio = 7 / 5
         super().__init__(bet_amount)
+        self.name = "Place9"
+        self._payoutratio = 7 / 5
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
 
 class Place10(Place):
+    __slots__ = ()
+    WINNING_NUMBERS = (10,)
+    LOSING_NUMBERS = (7,)
+
     def __init__(self, bet_amount):
-        self.name = "Place10"
-        self.winning_numbers = [10]
-        self.losing_numbers = [7]
-        self.payoutratio = 9 / 5
         super().__init__(bet_amount)
+        self.name = "Place10"
+        self._payoutratio = 9 / 5
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
 
 
 """
@@ -200,31 +332,54 @@ class Field(Bet):
         Set of numbers that pay triple on the field bet (default = [])
     """
 
+    __slots__ = ("_double_winning_numbers", "_triple_winning_numbers")
+    WINNING_NUMBERS = (2, 3, 4, 9, 10, 11, 12)
+    LOSING_NUMBERS = (5, 6, 7, 8)
+
     def __init__(self, bet_amount, double=[2, 12], triple=[]):
-        self.name = "Field"
-        self.double_winning_numbers = double
-        self.triple_winning_numbers = triple
-        self.winning_numbers = [2, 3, 4, 9, 10, 11, 12]
-        self.losing_numbers = [5, 6, 7, 8]
         super().__init__(bet_amount)
-
-    def _update_bet(self, table_object, dice_object):
-        status = None
-        win_amount = 0
-
-        if dice_object.total in self.triple_winning_numbers:
-            status = "win"
-            win_amount = 3 * self.bet_amount
-        elif dice_object.total in self.double_winning_numbers:
-            status = "win"
-            win_amount = 2 * self.bet_amount
-        elif dice_object.total in self.winning_numbers:
-            status = "win"
-            win_amount = 1 * self.bet_amount
-        elif dice_object.total in self.losing_numbers:
-            status = "lose"
-
-        return status, win_amount
+        self.name = "Field"
+        self._double_winning_numbers = double
+        self._triple_winning_numbers = triple
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS)
+
+    @property
+    def double_winning_numbers(self):
+        return self._double_winning_numbers
+
+    @double_winning_numbers.setter
+    def double_winning_numbers(self, numbers):
+        self._double_winning_numbers = numbers
+        self._outcomes = None
+
+    @property
+    def triple_winning_numbers(self):
+        return self._triple_winning_numbers
+
+    @triple_winning_numbers.setter
+    def triple_winning_numbers(self, numbers):
+        self._triple_winning_numbers = numbers
+        self._outcomes = None
+
+    def _build_outcomes(self):
+        self._outcomes = _field_outcome_table(
+            tuple(self._winning_numbers),
+            tuple(self._losing_numbers),
+            tuple(self._double_winning_numbers),
+            tuple(self._triple_winning_numbers),
+        )
+        return self._outcomes
+
+
+@lru_cache(maxsize=None)
+def _field_outcome_table(winning_numbers, losing_numbers, double, triple):
+    """ outcome table of a field bet paying double on ``double`` and triple on ``triple`` """
+    outcomes = list(_outcome_table(winning_numbers, losing_numbers))
+    for n in double:
+        outcomes[n] = ("win", 2.0)
+    for n in triple:
+        outcomes[n] = ("win", 3.0)
+    return tuple(outcomes)
 
 
 """
@@ -235,33 +390,50 @@ Don't pass and Don't come bets
 class DontPass(Bet):
     # TODO: make this require that table_object.point = "Off",
     #  probably better in the player module
+    __slots__ = ("_push_numbers", "prepoint")
+    WINNING_NUMBERS = (2, 3)
+    LOSING_NUMBERS = (7, 11)
+    PUSH_NUMBERS = (12,)
+
     def __init__(self, bet_amount):
+        super().__init__(bet_amount)
         self.name = "DontPass"
-        self.winning_numbers = [2, 3]
-        self.losing_numbers = [7, 11]
-        self.push_numbers = [12]
-        self.payoutratio = 1.0
+        self._payoutratio = 1.0
         self.prepoint = True
-        super().__init__(bet_amount)
+        self._set_numbers(self.WINNING_NUMBERS, self.LOSING_NUMBERS, self.PUSH_NUMBERS)
+
+    @property
+    def push_numbers(self):
+        return self._push_numbers
+
+    @push_numbers.setter
+    def push_numbers(self, numbers):
+        self._push_numbers = list(numbers)
+        self._outcomes = None
+
+    def _set_numbers(self, winning_numbers, losing_numbers, push_numbers=()):
+        self._push_numbers = list(push_numbers)
+        super()._set_numbers(winning_numbers, losing_numbers)
+
+    def _build_outcomes(self):
+        self._outcomes = _outcome_table(
+            tuple(self._winning_numbers),
+            tuple(self._losing_numbers),
+            tuple(self._push_numbers),
+            self._payoutratio,
+        )
+        return self._outcomes
 
     def _update_bet(self, table_object, dice_object):
-        status = None
-        win_amount = 0
-
-        if dice_object.total in self.winning_numbers:
-            status = "win"
-            win_amount = self.payoutratio * self.bet_amount
-        elif dice_object.total in self.losing_numbers:
-            status = "lose"
-        elif dice_object.total in self.push_numbers:
-            status = "push"
-        elif self.prepoint:
-            self.winning_numbers = [7]
-            self.losing_numbers = [dice_object.total]
-            self.push_numbers = []
+        outcomes = self._outcomes
+        if outcomes is None:
+            outcomes = self._build_outcomes()
+        status, payoutratio = outcomes[dice_object.total]
+        if status is None and self.prepoint:
+            self._set_numbers([7], [dice_object.total])
             self.prepoint = False
 
-        return status, win_amount
+        return status, payoutratio * self.bet_amount
 
 
 """
@@ -270,16 +442,69 @@ Don't pass/Don't come lay odds
 
 
 class LayOdds(Bet):
+    __slots__ = ()
+
     def __init__(self, bet_amount, bet_object):
         super().__init__(bet_amount)
         self.name = "LayOdds"
         self.subname = "".join(str(e) for e in bet_object.losing_numbers)
-        self.winning_numbers = bet_object.winning_numbers
-        self.losing_numbers = bet_object.losing_numbers
-
-        if self.losing_numbers == [4] or self.losing_numbers == [10]:
-            self.payoutratio = 1 / 2
-        elif self.losing_numbers == [5] or self.losing_numbers == [9]:
-            self.payoutratio = 2 / 3
-        elif self.losing_numbers == [6] or self.losing_numbers == [8]:
-            self.payoutratio = 5 / 6
+        losing_numbers = bet_object.losing_numbers
+
+        if losing_numbers == [4] or losing_numbers == [10]:
+            self._payoutratio = 1 / 2
+        elif losing_numbers == [5] or losing_numbers == [9]:
+            self._payoutratio = 2 / 3
+        elif losing_numbers == [6] or losing_numbers == [8]:
+            self._payoutratio = 5 / 6
+        self._set_numbers(bet_object.winning_numbers, losing_numbers)
+
+
+class BetPool(object):
+    """
+    Recycles bet objects instead of allocating a new one for every bet.
+
+    ``acquire`` returns a bet of the given class, re-initialized from a
+    previously released bet when one is free.  Players release pooled bets
+    back to their pool once they resolve or are removed, so code should not
+    keep references to a pooled bet after it has been settled or taken down.
+    Bets created directly with their class are never pooled.
+
+    Pooling is opt-in: the strategies in crapssim.strategy create their bets
+    directly, as re-initializing a bet costs about as much as creating one.
+
+    Parameters
+    ----------
+    max_free : int, optional (default = 64)
+        Number of free bets kept for each class
+    """
+
+    def __init__(self, max_free=64):
+        self.max_free = max_free
+        self._free = {}
+
+    def acquire(self, bet_class, *args, **kwargs):
+        free = self._free.get(bet_class)
+        if free:
+            bet_object = free.pop()
+            bet_object.__init__(*args, **kwargs)
+        else:
+            bet_object = bet_class(*args, **kwargs)
+        bet_object._pool = self
+        return bet_object
+
+    def release(self, bet_object):
+        free = self._free.setdefault(type(bet_object), [])
+        if len(free) < self.max_free:
+            free.append(bet_object)
+
+    def __deepcopy__(self, memo):
+        # copies of pooled bets share the pool
+        return self
+
+    def __reduce__(self):
+        # pooled bets pickle with a reference to the module's pool
+        return "pool"
+
+
+# pool shared by strategies that use one, pooled bets pickle as a reference to it
+pool = BetPool()
@@ -0,0 +1,181 @@
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+
+import crapssim
+from crapssim.checkpoint import write_pickle
+
+"""
+Content-addressed on-disk cache of simulation results.
+
+``run_simulations(..., cache=ResultCache(path))`` stores the result of every
+chunk of sessions under a hash of everything that determines it: the source of
+the modules defining the strategies, the source of the modules in
+``ENGINE_MODULES``, the ``crapssim`` version, the bankrolls, table payouts,
+``max_rolls``, ``max_shooter``, ``runout``, the seed and the chunking.
+Sessions are seeded per chunk, so a run with a larger ``n_sim`` reuses the
+chunks already on disk and only simulates the missing ones.  A trailing chunk
+shorter than ``chunk_size`` is seeded like a full one but covers fewer
+sessions, so it is simulated again once ``n_sim`` grows past it.
+
+Code that a strategy calls from other modules is not hashed, e.g. a helper in
+another package, so entries of such strategies go stale without a miss when
+that code changes.  Call ``ResultCache.clear`` after such edits.
+
+Entries are written to a temporary file and moved into place with
+``os.replace``, so worker processes can fill the same cache at once and a
+reader never sees a partial entry.  The least recently used entries are
+evicted when the cache grows past ``max_bytes``.
+"""
+
+
+# modules whose code decides the outcome of a session
+ENGINE_MODULES = (
+    "crapssim.bet",
+    "crapssim.dice",
+    "crapssim.player",
+    "crapssim.table",
+    "crapssim.runner",
+    "crapssim.stats",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _engine_source():
+    """ digest of the source of ``ENGINE_MODULES`` """
+    digest = hashlib.sha256()
+    for name in ENGINE_MODULES:
+        digest.update(inspect.getsource(importlib.import_module(name)).encode())
+    return digest.hexdigest()
+
+
+def _strategy_source(bet_strategy):
+    """
+    source of the module defining a strategy function, so edits to helpers
+    it calls there change the key, else the function's own source, or its
+    pickle for other callables
+    """
+    for obj in (inspect.getmodule(bet_strategy), bet_strategy):
+        if obj is None:
+            continue
+        try:
+            return inspect.getsource(obj)
+        except (OSError, TypeError):
+            pass
+    return pickle.dumps(bet_strategy).hex()
+
+
+def config_key(config, seed, chunk_size, kind):
+    """
+    Hash of a ``runner`` configuration, seed and chunk size, naming the
+    entries of its chunks.  ``kind`` is the name of the chunk function, as
+    rows and aggregators of the same sessions are cached separately.
+    """
+    payload = {
+        "version": crapssim.__version__,
+        "kind": kind,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "engine": _engine_source(),
+        "strategies": [[name, _strategy_source(s)] for name, s in config["strategies"].items()],
+    }
+    for name, value in config.items():
+        if name != "strategies":
+            payload[name] = value
+    text = json.dumps(payload, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Directory of cached chunk results, evicted in least recently used order.
+
+    Parameters
+    ----------
+    path : string
+        Directory of the cache, created if needed
+    max_bytes : int, optional (default = 2**30)
+        Size of the entries above which the least recently used are removed.
+        None for no limit.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Number of lookups in this process that found or missed an entry
+    """
+
+    SUFFIX = ".pkl"
+
+    def __init__(self, path, max_bytes=2 ** 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + self.SUFFIX)
+
+    def get(self, key):
+        """ value stored under ``key``, or None """
+        path = self._file(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            # the modification time orders entries for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """ store ``value`` under ``key``, then evict entries if the cache is too big """
+        write_pickle(self._file(key), value)
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def _entries(self):
+        """ (mtime, size, path) of every entry """
+        entries = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX) or entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @property
+    def size(self):
+        """ total bytes of the entries """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes):
+        """ remove the least recently used entries until at most ``max_bytes`` remain """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """ remove every entry """
+        self.evict(0)
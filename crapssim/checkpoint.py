@@ -0,0 +1,94 @@
+import os
+import pickle
+import tempfile
+
+"""
+Checkpoints of tables and simulation jobs.
+
+A ``Table`` pickles with its players, bets, ``strat_info``, point, shooter
+count and dice, including the state of a seeded dice's random generator and
+its buffered rolls, but without its event sink.  ``Table.run`` saves such a
+checkpoint every ``checkpoint_every`` rolls when given ``checkpoint``, and
+calling ``run`` again with the same arguments on the table loaded from it
+plays exactly the rolls the uninterrupted run would have played.
+
+``run_simulations(..., checkpoint=directory)`` keeps the results of finished
+chunks of sessions and the in-flight table of every running chunk there, so a
+job restarted with the same directory skips the finished chunks and resumes
+the others mid-session.
+
+Checkpoints are written to a temporary file and moved into place with
+``os.replace``, so a job killed while writing leaves the previous checkpoint.
+"""
+
+
+def write_pickle(path, value):
+    """ pickle ``value`` to ``path`` atomically """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_checkpoint(table, path):
+    """ save ``table`` mid-session to ``path`` """
+    write_pickle(path, table)
+
+
+def load_checkpoint(path):
+    """ load a table saved by ``save_checkpoint`` """
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class ChunkProgress(object):
+    """
+    In-flight state of a chunk of sessions run by ``crapssim.runner``.
+
+    Parameters
+    ----------
+    path : string
+        File to keep the state in
+    checkpoint_every : int
+        Number of rolls of a session between checkpoints
+
+    Attributes
+    ----------
+    rows : list
+        Rows of the sessions of the chunk finished so far
+    """
+
+    def __init__(self, path, checkpoint_every):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.rows = []
+
+    def load(self):
+        """
+        read the state of an interrupted run of the chunk into ``rows``,
+        returning ``(simid, table number, table)`` of the session in flight,
+        or None if the chunk has not started
+        """
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        self.rows = state["rows"]
+        return state["simid"], state["table_number"], state["table"]
+
+    def save(self, simid, table_number, table):
+        write_pickle(
+            self.path,
+            {"rows": self.rows, "simid": simid, "table_number": table_number, "table": table},
+        )
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,3 +1,4 @@
+import numpy as np
 from numpy import random as r
 
 
@@ -7,32 +8,160 @@ class Dice(object):
 
     Parameters
     ----------
-    NONE
+    seed : None, int, SeedSequence, BitGenerator or Generator, optional
+        Seed for a ``numpy.random.Generator`` owned by the dice.  If both
+        ``seed`` and ``buffer_size`` are left at their defaults, rolls are
+        drawn from the global ``numpy.random`` state as before.
+    buffer_size : int, optional (default = 0)
+        Number of rolls to draw at once.  When positive, the dice draw blocks
+        of ``buffer_size`` pairs from the generator, keep the totals alongside,
+        and serve each roll from the buffer as plain Python ints.  For a given
+        seed the sequence of rolls does not depend on ``buffer_size``.
 
     Attributes
     ----------
     n_rolls_ : int
         Number of rolls for the dice
-    result_ : array, shape = [2]
-        Most recent outcome of the roll of two dice
+    result_ : array or list, shape = [2]
+        Most recent outcome of the roll of two dice, a list of ints when the
+        dice are buffered
     total_ : int
         Sum of dice outcome
 
     """
 
-    def __init__(self):
+    def __init__(self, seed=None, buffer_size=0):
         self.n_rolls = 0
+        self.buffer_size = int(buffer_size)
+        if seed is None and self.buffer_size <= 0:
+            self.rng = None
+        else:
+            self.rng = r.default_rng(seed)
+        self._results = []
+        self._totals = []
+        self._pos = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # keep the rolls not served yet as one array rather than a list per roll
+        state["_results"] = np.array(self._results[self._pos :], dtype=np.int8).reshape(-1, 2)
+        state["_totals"] = None
+        state["_pos"] = 0
+        return state
+
+    def __setstate__(self, state):
+        results = state["_results"]
+        state["_results"] = results.tolist()
+        state["_totals"] = results.sum(axis=1).tolist()
+        self.__dict__.update(state)
 
     def roll(self):
         self.n_rolls += 1
-        self.result = r.randint(1, 7, size=2)
-        self.total = sum(self.result)
+        if self.buffer_size > 0:
+            if self._pos == len(self._totals):
+                self._fill_buffer()
+            self.result = self._results[self._pos]
+            self.total = self._totals[self._pos]
+            self._pos += 1
+        elif self.rng is not None:
+            self.result = self.rng.integers(1, 7, size=2)
+            self.total = int(self.result[0] + self.result[1])
+        else:
+            self.result = r.randint(1, 7, size=2)
+            self.total = sum(self.result)
+
+    def reseed(self, seed):
+        """
+        Draw the next rolls from a new generator seeded with ``seed``, keeping
+        the number of rolls.  Buffered rolls of the old generator are dropped.
+        """
+        self.rng = r.default_rng(seed)
+        self._results = []
+        self._totals = []
+        self._pos = 0
 
     def fixed_roll(self, outcome):
         self.n_rolls += 1
         self.result = outcome
         self.total = sum(self.result)
 
+    def _fill_buffer(self):
+        """ draw the next block of rolls and precompute their totals """
+        block = self.rng.integers(1, 7, size=(self.buffer_size, 2))
+        self._results = block.tolist()
+        self._totals = block.sum(axis=1).tolist()
+        self._pos = 0
+
+
+# chance of each total with fair dice
+TOTAL_PROBS = {total: (6 - abs(total - 7)) / 36 for total in range(2, 13)}
+
+
+class TiltedDice(Dice):
+    """
+    Dice that roll totals from a tilted distribution, for importance sampling.
+
+    Each total is rolled with probability proportional to its fair
+    probability times ``weights[total]``, and the faces showing it are drawn
+    as with fair dice.  The dice keep the log of the likelihood ratio of the
+    rolls so far (fair over tilted), so an estimate of a mean over sessions
+    under fair dice is the mean of ``likelihood_ratio * value`` over sessions
+    rolled with tilted dice, see ``crapssim.stats.weighted_estimate``.
+    Tilting toward the totals that lead to a rare outcome, e.g. toward 7 to
+    bust a pass line bettor, makes that outcome common at the cost of a
+    spread of weights.
+
+    Parameters
+    ----------
+    weights : dictionary
+        Factor on the probability of each total, 1 for missing totals
+    seed : None, int, SeedSequence, BitGenerator or Generator, optional
+        Seed for the dice's ``numpy.random.Generator``
+    buffer_size : int, optional (default = 1024)
+        Number of rolls to draw at once
+
+    Attributes
+    ----------
+    probabilities : dictionary
+        Tilted probability of each total
+    log_likelihood_ratio : float
+        Sum over the rolls so far of log(fair / tilted probability) of the
+        total rolled
+    """
+
+    def __init__(self, weights, seed=None, buffer_size=1024):
+        super().__init__(seed=seed, buffer_size=max(int(buffer_size), 1))
+        tilted = {t: p * weights.get(t, 1) for t, p in TOTAL_PROBS.items()}
+        norm = sum(tilted.values())
+        self.probabilities = {t: p / norm for t, p in tilted.items()}
+        if any(p <= 0 for p in self.probabilities.values()):
+            raise ValueError("Every total needs a positive weight")
+        # indexed by total
+        self._log_ratios = [0.0] * 13
+        for t, p in TOTAL_PROBS.items():
+            self._log_ratios[t] = float(np.log(p / self.probabilities[t]))
+        self.log_likelihood_ratio = 0.0
+
+    @property
+    def likelihood_ratio(self):
+        return float(np.exp(self.log_likelihood_ratio))
+
+    def roll(self):
+        super().roll()
+        self.log_likelihood_ratio += self._log_ratios[self.total]
+
+    def _fill_buffer(self):
+        """ draw the next block of totals from the tilted distribution, then their faces """
+        totals = self.rng.choice(
+            np.arange(2, 13), size=self.buffer_size, p=list(self.probabilities.values())
+        )
+        # faces summing to a total: die1 runs from max(1, total - 6) to min(6, total - 1)
+        n_faces = 6 - np.abs(totals - 7)
+        die1 = np.maximum(1, totals - 6) + (self.rng.random(self.buffer_size) * n_faces).astype(int)
+        self._results = np.column_stack([die1, totals - die1]).tolist()
+        self._totals = totals.tolist()
+        self._pos = 0
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,215 @@
+import sys
+
+
+class EventSink(object):
+    """
+    Receives the events of a craps table.
+
+    A Table sends events to its ``sink`` while it runs: the start and end of a
+    session, every bet placed or resolved, every roll, and changes of the point
+    and the shooter.  Subclasses override the methods for the events they
+    need; the defaults ignore them.
+    """
+
+    def session_start(self, table):
+        pass
+
+    def bet_placed(self, player, bet_object):
+        pass
+
+    def roll(self, table):
+        """ dice have been rolled, bets are not yet settled """
+        pass
+
+    def bet_resolved(self, player, bet_object, status, win_amount):
+        pass
+
+    def point_change(self, table, old_number, new_number):
+        pass
+
+    def shooter_change(self, table):
+        pass
+
+    def roll_end(self, table):
+        """ bets and table are updated for the roll """
+        pass
+
+    def session_end(self, table):
+        pass
+
+
+class NullSink(EventSink):
+    """
+    Sink that ignores every event.  A table whose sink is a NullSink doesn't
+    send events at all, so quiet runs pay nothing for them.
+    """
+
+
+NULL_SINK = NullSink()
+
+
+class TextSink(EventSink):
+    """
+    Sink that writes the same printout as ``Table.run(verbose=True)``.
+
+    Parameters
+    ----------
+    stream : file object, optional
+        Where to write, defaults to sys.stdout at the time of writing
+    buffer_lines : int, optional (default = 1000)
+        Number of lines to collect before writing them out at once
+    """
+
+    def __init__(self, stream=None, buffer_lines=1000):
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self._lines = []
+
+    def _write(self, line):
+        self._lines.append(line)
+        if len(self._lines) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            stream = sys.stdout if self.stream is None else self.stream
+            stream.write("\n".join(self._lines))
+            stream.write("\n")
+            self._lines = []
+
+    def session_start(self, table):
+        self._write("Welcome to the Craps Table!")
+        self._write(f"Initial players: {[p.name for p in table.players]}")
+
+    def roll(self, table):
+        for p in table.players:
+            bets = [f"{b.name}{b.subname}, ${b.bet_amount}" for b in p.bets_on_table]
+            self._write(f"{p.name}'s current bets: {bets}")
+
+    def bet_resolved(self, player, bet_object, status, win_amount):
+        if status == "win":
+            self._write(f"{player.name} won ${win_amount} on {bet_object.name} bet!")
+        elif status == "lose":
+            self._write(f"{player.name} lost ${bet_object.bet_amount} on {bet_object.name} bet.")
+        elif status == "push":
+            self._write(f"{player.name} pushed ${bet_object.bet_amount} on {bet_object.name} bet.")
+
+    def roll_end(self, table):
+        self._write("")
+        self._write("Dice out!")
+        self._write(f"Shooter rolled {table.dice.total} {table.dice.result}")
+        self._write(f"Point is {table.point.status} ({table.point.number})")
+        # the recount the original table printed, so the text matches it exactly
+        total_player_cash, _ = table._recount()
+        self._write(f"Total Player Cash is ${total_player_cash}")
+
+    def session_end(self, table):
+        self.flush()
+
+
+class StructuredSink(EventSink):
+    """
+    Sink that records every event as a dictionary in ``events``.
+
+    Each record has the ``event`` type and the ``roll`` number it happened on,
+    plus the player name and the bet's name, subname and amount for bet
+    events.  Records hold plain values, not the bet objects themselves.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def _bet_event(self, event, player, bet_object, **fields):
+        self.events.append(
+            dict(
+                event=event,
+                roll=player._table.dice.n_rolls if player._table is not None else None,
+                player=player.name,
+                bet=bet_object.name,
+                subname=bet_object.subname,
+                amount=bet_object.bet_amount,
+                **fields,
+            )
+        )
+
+    def session_start(self, table):
+        self.events.append(
+            dict(event="session_start", roll=table.dice.n_rolls, players=[p.name for p in table.players])
+        )
+
+    def bet_placed(self, player, bet_object):
+        self._bet_event("bet_placed", player, bet_object)
+
+    def roll(self, table):
+        self.events.append(
+            dict(
+                event="roll",
+                roll=table.dice.n_rolls,
+                result=[int(x) for x in table.dice.result],
+                total=table.dice.total,
+            )
+        )
+
+    def bet_resolved(self, player, bet_object, status, win_amount):
+        self._bet_event("bet_resolved", player, bet_object, status=status, win_amount=win_amount)
+
+    def point_change(self, table, old_number, new_number):
+        self.events.append(
+            dict(event="point_change", roll=table.dice.n_rolls, old=old_number, new=new_number)
+        )
+
+    def shooter_change(self, table):
+        self.events.append(
+            dict(event="shooter_change", roll=table.dice.n_rolls, shooter=table.n_shooters)
+        )
+
+    def session_end(self, table):
+        self.events.append(
+            dict(
+                event="session_end",
+                roll=table.dice.n_rolls,
+                total_player_cash=table.total_player_cash,
+            )
+        )
+
+
+class MultiSink(EventSink):
+    """
+    Sink that passes every event on to each of ``sinks`` in turn, e.g. to
+    print a session and record its trace at once.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+
+    def session_start(self, table):
+        for sink in self.sinks:
+            sink.session_start(table)
+
+    def bet_placed(self, player, bet_object):
+        for sink in self.sinks:
+            sink.bet_placed(player, bet_object)
+
+    def roll(self, table):
+        for sink in self.sinks:
+            sink.roll(table)
+
+    def bet_resolved(self, player, bet_object, status, win_amount):
+        for sink in self.sinks:
+            sink.bet_resolved(player, bet_object, status, win_amount)
+
+    def point_change(self, table, old_number, new_number):
+        for sink in self.sinks:
+            sink.point_change(table, old_number, new_number)
+
+    def shooter_change(self, table):
+        for sink in self.sinks:
+            sink.shooter_change(table)
+
+    def roll_end(self, table):
+        for sink in self.sinks:
+            sink.roll_end(table)
+
+    def session_end(self, table):
+        for sink in self.sinks:
+            sink.session_end(table)
@@ -0,0 +1,210 @@
+import numpy as np
+
+from crapssim.dice import Dice
+from crapssim.table import _Point
+from crapssim.vectorized import BET_NAMES, VECTOR_STRATEGIES, VectorState, _settle, _update_table
+
+"""
+A craps table for thousands of players sharing one dice stream.
+
+``MassTable`` keeps the players' bankrolls and bets in ``VectorState`` arrays,
+one group per strategy, so each roll costs a few NumPy operations per bet type
+instead of a loop over Player objects.  Players are available as
+``PlayerView`` objects reading from those arrays.  With the same dice, every
+player ends where they would at a ``Table`` seating the same players.
+"""
+
+
+class PlayerView(object):
+    """
+    A player at a MassTable, reading their state from the table's arrays.
+
+    Attributes
+    ----------
+    name : string
+        Name of the player
+    bet_strategy : function
+        The player's strategy
+    unit : float
+        The player's betting unit
+    bankroll : float
+        Cash of the player that is not on the table
+    total_bet_amount : float
+        Sum of the player's bets on the table
+    bets : dictionary
+        Amount of each bet the player has on the table
+    """
+
+    def __init__(self, name, bet_strategy, group, index):
+        self.name = name
+        self.bet_strategy = bet_strategy
+        self._group = group
+        self._index = index
+
+    @property
+    def unit(self):
+        return float(self._group.state.unit[self._index])
+
+    @property
+    def bankroll(self):
+        return float(self._group.state.bankroll[self._index])
+
+    @property
+    def total_bet_amount(self):
+        return float(sum(amounts[self._index] for amounts in self._group.state.bets.values()))
+
+    @property
+    def bets(self):
+        return {
+            name: float(amounts[self._index])
+            for name, amounts in self._group.state.bets.items()
+            if amounts[self._index] > 0
+        }
+
+    def __repr__(self):
+        return f"<PlayerView {self.name}: bankroll {self.bankroll}, on table {self.total_bet_amount}>"
+
+
+class _Group(object):
+    """ players sharing a strategy, stored in one VectorState """
+
+    def __init__(self, vector_strategy, strat_kwargs, state):
+        self.vector_strategy = vector_strategy
+        self.strat_kwargs = strat_kwargs
+        self.state = state
+
+
+class MassTable(object):
+    """
+    Craps table with many players whose state is kept in NumPy arrays.
+
+    Supports the strategies in ``crapssim.vectorized.VECTOR_STRATEGIES`` and
+    strategies compiled from a ``crapssim.spec.StrategySpec``.
+
+    Parameters
+    ----------
+    dice : Dice, optional
+        Dice to roll at the table, defaults to ``Dice()``
+    payouts : dictionary, optional
+        Table payouts, as in ``Table.payouts``
+
+    Attributes
+    ----------
+    players : list
+        PlayerView of every player, in the order they were added
+    point : _Point
+        The point of the table
+    n_shooters : int
+        Current shooter number
+    """
+
+    def __init__(self, dice=None, payouts=None):
+        self.dice = Dice() if dice is None else dice
+        self.payouts = {"fielddouble": [2, 12], "fieldtriple": []}
+        if payouts is not None:
+            self.payouts.update(payouts)
+        self.point = _Point()
+        self.n_shooters = 1
+        self.players = []
+        self._groups = []
+
+    def add_players(self, bet_strategy, bankrolls, units=5, names=None, **strat_kwargs):
+        """
+        Seat a group of players using ``bet_strategy``.
+
+        Parameters
+        ----------
+        bet_strategy : function
+            Strategy of the players
+        bankrolls : float or list
+            Starting bankroll of each player, a single value for one player
+        units : float or list, optional (default = 5)
+            Betting unit of each player
+        names : list, optional
+            Names of the players, defaults to the strategy name and a number
+        **strat_kwargs
+            Extra keyword arguments of the vectorized strategy, e.g. ``mult``
+
+        Returns
+        -------
+        list
+            PlayerView of each new player
+        """
+        if bet_strategy in VECTOR_STRATEGIES:
+            vector_strategy = VECTOR_STRATEGIES[bet_strategy]
+        elif hasattr(bet_strategy, "vector_strategy"):
+            vector_strategy = bet_strategy.vector_strategy
+        else:
+            raise ValueError(f"No vectorized version of strategy {bet_strategy!r}")
+
+        bankrolls = np.atleast_1d(np.asarray(bankrolls, dtype=float))
+        n = len(bankrolls)
+        group = _Group(vector_strategy, strat_kwargs, VectorState(n, bankrolls, units, self.payouts))
+        group.state.point[:] = self.point.number or 0
+        group.state.n_shooters[:] = self.n_shooters
+        self._groups.append(group)
+
+        if names is None:
+            first = len(self.players)
+            names = [f"{bet_strategy.__name__}{first + i}" for i in range(n)]
+        views = [PlayerView(name, bet_strategy, group, i) for i, name in enumerate(names)]
+        self.players.extend(views)
+        return views
+
+    @property
+    def total_player_cash(self):
+        return float(
+            sum(g.state.bankroll.sum() + g.state.total_bet_amount.sum() for g in self._groups)
+        )
+
+    @property
+    def player_has_bets(self):
+        return any(g.state.has_bets.any() for g in self._groups)
+
+    def bankrolls(self):
+        """ bankroll of every player, in the order of ``players`` """
+        return np.concatenate([g.state.bankroll for g in self._groups])
+
+    def bet_amounts(self):
+        """ dictionary from bet name to the amount every player has on it """
+        return {
+            name: np.concatenate([g.state.bets[name] for g in self._groups]) for name in BET_NAMES
+        }
+
+    def run(self, max_rolls, max_shooter=float("inf"), runout=False):
+        """
+        Runs the table until a stopping condition is met, as ``Table.run``.
+
+        Parameters
+        ----------
+        max_rolls : int
+            Maximum number of rolls to run for
+        max_shooter : int, optional
+            Maximum number of shooters to run for
+        runout : bool
+            If true, continue past max_rolls until no player has bets on the table
+        """
+        continue_rolling = True
+        while continue_rolling:
+            for g in self._groups:
+                g.vector_strategy(g.state, **g.strat_kwargs)
+
+            self.dice.roll()
+            total = self.dice.total
+            for g in self._groups:
+                totals = np.full(len(g.state), total)
+                _settle(g.state, totals)
+                _update_table(g.state, totals)
+
+            if self.point == "On" and total == 7:
+                self.n_shooters += 1
+            self.point.update(self.dice)
+
+            # evaluate the stopping condition
+            continue_rolling = (
+                self.dice.n_rolls < max_rolls
+                and self.n_shooters <= max_shooter
+                and self.total_player_cash > 0
+            )
+            if runout:
+                continue_rolling = continue_rolling or self.player_has_bets
@@ -1,3 +1,6 @@
+from crapssim.events import TextSink
+
+
 class Player(object):
     """
     Player standing at the craps table
@@ -10,6 +13,10 @@ class Player(object):
         A function that implements a particular betting strategy.  See betting_strategies.py
     name : string, optional (default = "Player")
         Name of the player
+    unit : float, optional (default = 5)
+        Betting unit passed to bet_strategy
+    strat_kwargs : dictionary, optional
+        Extra keyword arguments passed to bet_strategy, e.g. ``{"mult": 2}``
 
     Attributes
     ----------
@@ -17,51 +24,82 @@ class Player(object):
         List of betting objects for the player
     total_bet_amount : int
         Sum of bet value for the player
+
+    Bets are also indexed by name, in the order they were placed, so
+    has_bet, get_bet and num_bet don't scan bets_on_table.
     """
 
-    def __init__(self, bankroll, bet_strategy=None, name="Player"):
+    def __init__(self, bankroll, bet_strategy=None, name="Player", unit=5, strat_kwargs=None):
         self.bankroll = bankroll
         self.bet_strategy = bet_strategy
         self.name = name
+        self.unit = unit
+        self.strat_kwargs = {} if strat_kwargs is None else dict(strat_kwargs)
         self.bets_on_table = []
+        self._bets_by_name = {}
         self.total_bet_amount = 0
+        self._table = None
+        self._sink = None
+        self._stats = None
+        self._recording = None
         # TODO: initial betting strategy
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_sink"] = None
+        return state
+
     def bet(self, bet_object):
         if self.bankroll >= bet_object.bet_amount:
             self.bankroll -= bet_object.bet_amount
             self.bets_on_table.append(
                 bet_object
             )  # TODO: make sure this only happens if that bet isn't on the table, otherwise wager amount gets updated
+            self._bets_by_name.setdefault(bet_object.name, []).append(bet_object)
             self.total_bet_amount += bet_object.bet_amount
+            if self._table is not None:
+                self._table._n_bets += 1
+            if self._sink is not None:
+                self._sink.bet_placed(self, bet_object)
+            if self._stats is not None:
+                self._stats.bets_placed += 1
+            if self._recording is not None:
+                self._recording.append(("bet", bet_object._copy()))
+        elif self._recording is not None:
+            # the decision depended on the bankroll, so it can't be replayed
+            self._recording.append(("rejected", bet_object))
 
     def remove(self, bet_object):
         # TODO: add bet attribute for whether a bet can be removed and put condition in here
-        if bet_object in self.bets_on_table:
+        if bet_object in self._bets_by_name.get(bet_object.name, ()):
             self.bankroll += bet_object.bet_amount
             self.bets_on_table.remove(bet_object)
+            self._unindex_bet(bet_object)
             self.total_bet_amount -= bet_object.bet_amount
+            if self._table is not None:
+                self._table._n_bets -= 1
+            if self._stats is not None:
+                self._stats.bets_removed += 1
+            if self._recording is not None:
+                self._recording.append(("remove", (bet_object.name, bet_object.subname)))
+            if bet_object._pool is not None:
+                bet_object._pool.release(bet_object)
 
     def has_bet(self, *bets_to_check):
         """ returns True if bets_to_check and self.bets_on_table has at least one thing in common """
-        bet_names = {b.name for b in self.bets_on_table}
-        return bool(bet_names.intersection(bets_to_check))
+        return not self._bets_by_name.keys().isdisjoint(bets_to_check)
 
     def get_bet(self, bet_name, bet_subname=""):
         """returns first betting object matching bet_name and bet_subname.
         If bet_subname="Any", returns first betting object matching bet_name"""
-        if bet_subname == "Any":
-            bet_name_list = [b.name for b in self.bets_on_table]
-            ind = bet_name_list.index(bet_name)
-        else:
-            bet_name_list = [[b.name, b.subname] for b in self.bets_on_table]
-            ind = bet_name_list.index([bet_name, bet_subname])
-        return self.bets_on_table[ind]
+        for b in self._bets_by_name.get(bet_name, ()):
+            if bet_subname == "Any" or b.subname == bet_subname:
+                return b
+        raise ValueError(f"{bet_name}{bet_subname} bet is not on the table")
 
     def num_bet(self, *bets_to_check):
         """ returns the total number of bets in self.bets_on_table that match bets_to_check """
-        bet_names = [b.name for b in self.bets_on_table]
-        return sum([i in bets_to_check for i in bet_names])
+        return sum(len(self._bets_by_name.get(name, ())) for name in set(bets_to_check))
 
     def remove_if_present(self, bet_name, bet_subname=""):
         if self.has_bet(bet_name):
@@ -71,28 +109,68 @@ class Player(object):
         """ Implement the given betting strategy """
         return self.bet_strategy(self, table, *args, **kwargs)
 
+    def _record_strategy_bets(self, table, *args, **kwargs):
+        """
+        Implement the betting strategy, also returning the list of bets it
+        placed and removed, for ``_replay_strategy_bets``
+        """
+        self._recording = []
+        try:
+            strat_info = self._add_strategy_bets(table, *args, **kwargs)
+        finally:
+            recording, self._recording = self._recording, None
+        return strat_info, recording
+
+    def _replay_strategy_bets(self, recording):
+        """ repeat the bets and removals recorded by ``_record_strategy_bets`` """
+        for action, arg in recording:
+            if action == "bet":
+                self.bet(arg._copy())
+            else:
+                self.remove(self.get_bet(*arg))
+
+    def _unindex_bet(self, bet_object):
+        bets = self._bets_by_name[bet_object.name]
+        bets.remove(bet_object)
+        if not bets:
+            del self._bets_by_name[bet_object.name]
+
     def _update_bet(self, table_object, dice_object, verbose=False):
         info = {}
-        for b in self.bets_on_table[:]:
+        resolved = []
+        net_win = 0
+        sink = self._sink
+        if verbose and sink is None:
+            sink = TextSink()
+        for b in self.bets_on_table:
             status, win_amount = b._update_bet(table_object, dice_object)
 
             if status == "win":
                 self.bankroll += win_amount + b.bet_amount
                 self.total_bet_amount -= b.bet_amount
-                self.bets_on_table.remove(b)
-                if verbose:
-                    print(f"{self.name} won ${win_amount} on {b.name} bet!")
+                net_win += win_amount
             elif status == "lose":
                 self.total_bet_amount -= b.bet_amount
-                self.bets_on_table.remove(b)
-                if verbose:
-                    print(f"{self.name} lost ${b.bet_amount} on {b.name} bet.")
+                net_win -= b.bet_amount
             elif status == "push":
                 self.bankroll += b.bet_amount
                 self.total_bet_amount -= b.bet_amount
-                self.bets_on_table.remove(b)
-                if verbose:
-                    print(f"{self.name} pushed ${b.bet_amount} on {b.name} bet.")
 
+            if status is not None:
+                resolved.append(b)
+                self._unindex_bet(b)
+                if sink is not None:
+                    sink.bet_resolved(self, b, status, win_amount)
+                if self._stats is not None:
+                    self._stats._resolved(status)
+                if b._pool is not None:
+                    b._pool.release(b)
             info[b.name] = {"status": status, "win_amount": win_amount}
+        if sink is not None and sink is not self._sink:
+            sink.flush()
+        if resolved:
+            self.bets_on_table[:] = [b for b in self.bets_on_table if b not in resolved]
+            if self._table is not None:
+                self._table._total_player_cash += net_win
+                self._table._n_bets -= len(resolved)
         return info
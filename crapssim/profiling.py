@@ -0,0 +1,78 @@
+"""
+Optional instrumentation of ``Table.run``.
+"""
+
+PHASES = ("add_bets", "roll", "update_bets", "update_table")
+
+
+class TableStats(object):
+    """
+    Wall time and call counts of the phases of ``Table.run``, with bet counters.
+
+    A table created with ``Table(instrument=True)`` fills one of these in
+    ``table.stats`` as it runs, adding to it over several runs.  Phases are
+    ``add_bets`` (players' strategies), ``roll`` (``dice.roll``),
+    ``update_bets`` (settling players' bets) and ``update_table``.
+
+    Attributes
+    ----------
+    time : dictionary
+        Seconds spent in each phase
+    calls : dictionary
+        Number of times each phase ran
+    player_time : dictionary
+        Seconds spent in ``add_bets`` and ``update_bets`` by each player, keyed
+        by ``(phase, player name)``
+    strategy_time : dictionary
+        The same, keyed by ``(phase, strategy function name)``
+    bets_placed, bets_resolved, bets_removed : int
+        Bets put on the table, settled by a roll, and taken down by players
+    resolved_by_status : dictionary
+        Bets resolved with each status: "win", "lose" or "push"
+    """
+
+    def __init__(self):
+        self.time = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.player_time = {}
+        self.strategy_time = {}
+        self.bets_placed = 0
+        self.bets_resolved = 0
+        self.bets_removed = 0
+        self.resolved_by_status = {"win": 0, "lose": 0, "push": 0}
+
+    def _add_time(self, phase, seconds):
+        self.time[phase] += seconds
+        self.calls[phase] += 1
+
+    def _add_player_time(self, phase, player, seconds):
+        key = (phase, player.name)
+        self.player_time[key] = self.player_time.get(key, 0.0) + seconds
+        strategy = getattr(player.bet_strategy, "__name__", repr(player.bet_strategy))
+        key = (phase, strategy)
+        self.strategy_time[key] = self.strategy_time.get(key, 0.0) + seconds
+
+    def _resolved(self, status):
+        self.bets_resolved += 1
+        self.resolved_by_status[status] += 1
+
+    def summary(self):
+        """ dictionary of the stats, with each phase's share of the total time """
+        total = sum(self.time.values())
+        return {
+            "total_time": total,
+            "phases": {
+                phase: {
+                    "time": self.time[phase],
+                    "calls": self.calls[phase],
+                    "share": self.time[phase] / total if total > 0 else 0.0,
+                }
+                for phase in PHASES
+            },
+            "player_time": dict(self.player_time),
+            "strategy_time": dict(self.strategy_time),
+            "bets_placed": self.bets_placed,
+            "bets_resolved": self.bets_resolved,
+            "bets_removed": self.bets_removed,
+            "resolved_by_status": dict(self.resolved_by_status),
+        }
@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+"""
+Columnar storage of simulation results.
+
+``ResultsWriter`` collects one row per session into typed column arrays and
+writes them in shards to a directory, as one ``.npy`` file per column and
+shard, or as Parquet files when pyarrow is installed.  ``iter_shards`` reads
+them back, memory-mapping the ``.npy`` shards instead of parsing text, and
+``read_results`` joins the shards into one array per column.
+"""
+
+# columns of crapssim.runner.run_simulations rows
+MULTI_COLUMNS = {
+    "simid": "i8",
+    "strategy": "U",
+    "total_cash": "f8",
+    "bankroll": "f8",
+    "n_rolls": "i8",
+}
+
+# columns of run_simulation and run_simulation_burnin rows
+SESSION_COLUMNS = {"total_cash": "f8", "bankroll": "f8", "n_rolls": "i8"}
+
+_SCHEMA_FILE = "schema.json"
+
+
+class ResultsWriter(object):
+    """
+    Write simulation rows to a directory of columnar shards.
+
+    Parameters
+    ----------
+    path : string
+        Directory to write to, created if needed.  Shards and schema already
+        in it are deleted, as opening a CSV file for writing truncates it.
+    columns : dictionary, optional
+        Maps each column name, in row order, to a NumPy dtype string.  "U" is
+        a string column.  Defaults to ``MULTI_COLUMNS``.
+    chunk_size : int, optional (default = 100000)
+        Number of rows buffered before a shard is written
+    format : string, optional (default = "auto")
+        "npy", "parquet", or "auto" for Parquet when pyarrow is installed
+    """
+
+    def __init__(self, path, columns=None, chunk_size=100000, format="auto"):
+        if columns is None:
+            columns = MULTI_COLUMNS
+        if format == "auto":
+            format = "npy" if pyarrow is None else "parquet"
+        if format == "parquet" and pyarrow is None:
+            raise ImportError("Writing parquet results requires pyarrow")
+        if format not in ("npy", "parquet"):
+            raise ValueError(f"Unknown results format {format!r}")
+
+        self.path = path
+        self.columns = dict(columns)
+        self.chunk_size = chunk_size
+        self.format = format
+        self.n_rows = 0
+        self._n_shards = 0
+        self._buffers = [self._new_buffer(dtype) for dtype in self.columns.values()]
+        self._n_buffered = 0
+
+        os.makedirs(path, exist_ok=True)
+        _remove_shards(path)
+        with open(os.path.join(path, _SCHEMA_FILE), "w") as f:
+            json.dump({"columns": self.columns, "format": format}, f)
+
+    def _new_buffer(self, dtype):
+        return np.empty(self.chunk_size, dtype=object if dtype == "U" else dtype)
+
+    def write(self, row):
+        """ add one row, with a value for each column in order """
+        i = self._n_buffered
+        for buffer, value in zip(self._buffers, row):
+            buffer[i] = value
+        self._n_buffered += 1
+        if self._n_buffered == self.chunk_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """ write the buffered rows as a new shard """
+        n = self._n_buffered
+        if n == 0:
+            return
+        arrays = {}
+        for (name, dtype), buffer in zip(self.columns.items(), self._buffers):
+            values = buffer[:n]
+            arrays[name] = values.astype(str) if dtype == "U" else values.copy()
+
+        shard = f"shard-{self._n_shards:05d}"
+        if self.format == "parquet":
+            table = pyarrow.table(arrays)
+            pq.write_table(table, os.path.join(self.path, shard + ".parquet"))
+        else:
+            shard_dir = os.path.join(self.path, shard)
+            os.makedirs(shard_dir, exist_ok=True)
+            for name, values in arrays.items():
+                np.save(os.path.join(shard_dir, name + ".npy"), values)
+
+        self._n_shards += 1
+        self.n_rows += n
+        self._n_buffered = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _remove_shards(path):
+    """ delete the shards and schema written to ``path`` before """
+    for entry in os.listdir(path):
+        full_path = os.path.join(path, entry)
+        if entry.startswith("shard-") and os.path.isdir(full_path):
+            shutil.rmtree(full_path)
+        elif entry.startswith("shard-") or entry == _SCHEMA_FILE:
+            os.unlink(full_path)
+
+
+def iter_shards(path):
+    """
+    Yield each shard in ``path`` as a dictionary from column name to array.
+    ``.npy`` shards are memory-mapped, so only the slices used are read.
+    """
+    with open(os.path.join(path, _SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    columns = schema["columns"]
+
+    for entry in sorted(os.listdir(path)):
+        if not entry.startswith("shard-"):
+            continue
+        shard = os.path.join(path, entry)
+        if entry.endswith(".parquet"):
+            table = pq.read_table(shard, memory_map=True)
+            yield {name: table.column(name).to_numpy() for name in columns}
+        else:
+            yield {
+                name: np.load(os.path.join(shard, name + ".npy"), mmap_mode="r")
+                for name in columns
+            }
+
+
+def read_results(path):
+    """
+    Read all results in ``path`` as a dictionary from column name to array.
+    A single ``.npy`` shard is returned memory-mapped.  Several shards are
+    concatenated, which copies them all into memory; use ``iter_shards`` to
+    keep them memory-mapped and read one shard at a time.
+    """
+    shards = list(iter_shards(path))
+    if not shards:
+        with open(os.path.join(path, _SCHEMA_FILE)) as f:
+            columns = json.load(f)["columns"]
+        return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+    if len(shards) == 1:
+        return shards[0]
+    return {name: np.concatenate([s[name] for s in shards]) for name in shards[0]}
@@ -0,0 +1,525 @@
+import json
+import numbers
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
+
+from crapssim.cache import ResultCache, config_key
+from crapssim.checkpoint import ChunkProgress
+from crapssim.dice import Dice, TiltedDice
+from crapssim.player import Player
+from crapssim.stats import SessionAggregator, weighted_estimate
+from crapssim.table import Table
+
+"""
+Run many table sessions, optionally spread over a pool of worker processes.
+
+Sessions are split into chunks of ``chunk_size`` sessions.  Chunk ``k`` gets
+the ``k``-th child of a ``numpy.random.SeedSequence`` and every session in the
+chunk gets its own child of that, so results are reproducible from ``seed``
+no matter how many workers run the chunks or in which order they finish.
+"""
+
+COLUMNS = ("simid", "strategy", "total_cash", "bankroll", "n_rolls")
+
+# rolls drawn at once by the dice of each session
+SESSION_BUFFER_SIZE = 1024
+
+
+def _new_table(dice, payouts):
+    table = Table(dice=dice)
+    if payouts is not None:
+        for name, value in payouts.items():
+            table.set_payouts(name, value)
+    return table
+
+
+def _sessions(config, start, stop, seed_seq):
+    """
+    run sessions ``start`` to ``stop``, yielding their rows.  With a
+    ``ChunkProgress`` in ``config["progress"]``, tables are checkpointed as they
+    run and an interrupted run of the chunk is resumed.  With weights in
+    ``config["tilt"]``, tables roll ``TiltedDice`` and rows end with the
+    session's log likelihood ratio.
+    """
+    players = list(zip(config["bankrolls"], config["strategies"]))
+    if config["common_random_numbers"]:
+        # every strategy gets its own table, replaying the same dice
+        tables = [[p] for p in players]
+    else:
+        tables = [players]
+
+    tilt = config.get("tilt")
+    progress = config.get("progress")
+    in_flight = None
+    if progress is not None:
+        in_flight = progress.load()
+        yield from list(progress.rows)
+
+    for simid, session_seed in zip(range(start, stop), seed_seq.spawn(stop - start)):
+        for number, table_players in enumerate(tables):
+            if in_flight is not None:
+                if (simid, number) < in_flight[:2]:
+                    continue
+                table = in_flight[2]
+                in_flight = None
+            else:
+                if tilt is None:
+                    dice = Dice(seed=session_seed, buffer_size=SESSION_BUFFER_SIZE)
+                else:
+                    dice = TiltedDice(tilt, seed=session_seed, buffer_size=SESSION_BUFFER_SIZE)
+                table = _new_table(dice, config["payouts"])
+                for bank, s in table_players:
+                    table.add_player(
+                        Player(
+                            bank,
+                            config["strategies"][s],
+                            s,
+                            unit=config.get("unit", 5),
+                            strat_kwargs=config.get("strat_kwargs"),
+                        )
+                    )
+
+            checkpoint = {}
+            if progress is not None:
+                checkpoint = {
+                    "checkpoint": partial(progress.save, simid, number),
+                    "checkpoint_every": progress.checkpoint_every,
+                }
+            table.run(
+                config["max_rolls"],
+                config["max_shooter"],
+                verbose=False,
+                runout=config["runout"],
+                **checkpoint,
+            )
+            for bank, s in table_players:
+                player = table._get_player(s)
+                # total_cash includes bets left on the table, as table.total_player_cash
+                total_cash = player.bankroll + player.total_bet_amount
+                row = simid, s, total_cash, bank, table.dice.n_rolls
+                if tilt is not None:
+                    row += (table.dice.log_likelihood_ratio,)
+                if progress is not None:
+                    progress.rows.append(row)
+                yield row
+
+
+def _run_chunk(config, start, stop, seed_seq):
+    """ run sessions ``start`` to ``stop`` and return their rows """
+    return list(_sessions(config, start, stop, seed_seq))
+
+
+def _aggregate_chunk(config, start, stop, seed_seq):
+    """ run sessions ``start`` to ``stop`` and return their SessionAggregator """
+    aggregator = SessionAggregator(**config["aggregate"])
+    aggregator.add_rows(_sessions(config, start, stop, seed_seq))
+    return aggregator
+
+
+def _chunks(n_sim, chunk_size, seed, start=0):
+    """
+    yield (start, stop, seed sequence) for each chunk of sessions ``start`` to
+    ``n_sim``.  ``seed`` may be a SeedSequence that earlier chunks were spawned
+    from, in which case the new chunks get its next children.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    starts = range(start, n_sim, chunk_size)
+    seeds = seed.spawn(len(starts))
+    for start, seed_seq in zip(starts, seeds):
+        yield start, min(start + chunk_size, n_sim), seed_seq
+
+
+def _map_tasks(fn, tasks, n_workers):
+    """ apply ``fn`` to every tuple of arguments in ``tasks``, yielding results as tasks finish """
+    if n_workers == 1:
+        for args in tasks:
+            yield fn(*args)
+        return
+
+    # tasks are handed out one at a time as workers become free, so long
+    # sessions on one worker don't leave the others idle
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(fn, *args) for args in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _map_chunks(chunk_fn, config, chunks, n_workers):
+    """ apply ``chunk_fn`` to every chunk, yielding results as chunks finish """
+    tasks = ((config, start, stop, seed_seq) for start, stop, seed_seq in chunks)
+    return _map_tasks(chunk_fn, tasks, n_workers)
+
+
+def _numbered_chunk(chunk_fn, config, start, stop, seed_seq):
+    """ apply ``chunk_fn`` to a chunk, returning ``(start, result)`` """
+    return start, chunk_fn(config, start, stop, seed_seq)
+
+
+def _cached_chunk(chunk_fn, cache, key, config, start, stop, seed_seq, checkpoint_every=None):
+    """
+    apply ``chunk_fn`` to a chunk and store the result in ``cache``, returning
+    ``(start, result)``.  With ``checkpoint_every``, the chunk's progress is
+    kept next to its entry.
+    """
+    progress = None
+    if checkpoint_every is not None:
+        progress = ChunkProgress(os.path.join(cache.path, key + ".progress"), checkpoint_every)
+        config = dict(config, progress=progress)
+    result = chunk_fn(config, start, stop, seed_seq)
+    cache.put(key, result)
+    if progress is not None:
+        progress.remove()
+    return start, result
+
+
+def _map_cached_chunks(
+    chunk_fn, config, chunks, n_workers, cache, seed, chunk_size, checkpoint_every=None
+):
+    """
+    as ``_map_chunks``, yielding ``(start, result)`` and serving the chunks
+    found in ``cache`` from disk and storing the others as workers finish
+    them.  Unseeded runs are not cached.
+    """
+    if cache is None or not isinstance(seed, numbers.Integral):
+        yield from _map_chunks(partial(_numbered_chunk, chunk_fn), config, chunks, n_workers)
+        return
+
+    key = config_key(config, int(seed), chunk_size, chunk_fn.__name__)
+    missing = []
+    for start, stop, seed_seq in chunks:
+        chunk_key = f"{key}-{start}-{stop}"
+        result = cache.get(chunk_key)
+        if result is None:
+            missing.append(
+                (chunk_fn, cache, chunk_key, config, start, stop, seed_seq, checkpoint_every)
+            )
+        else:
+            yield start, result
+    yield from _map_tasks(_cached_chunk, missing, n_workers)
+
+
+def _checkpoint_seed(checkpoint, seed):
+    """ seed of the job checkpointed in directory ``checkpoint``, recording a new job's seed """
+    os.makedirs(checkpoint, exist_ok=True)
+    path = os.path.join(checkpoint, "seed.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)["seed"]
+        if seed is not None and seed != saved:
+            raise ValueError(f"Checkpoint {checkpoint} is of a run with seed {saved}, not {seed}")
+        return saved
+    if seed is None:
+        # draw the seed now, so the job can be resumed from it
+        seed = np.random.SeedSequence().entropy
+    with open(path, "w") as f:
+        json.dump({"seed": int(seed)}, f)
+    return seed
+
+
+def run_simulations(
+    strategies,
+    bankrolls,
+    n_sim,
+    max_rolls,
+    max_shooter=float("inf"),
+    runout=True,
+    n_workers=None,
+    seed=None,
+    chunk_size=100,
+    payouts=None,
+    common_random_numbers=False,
+    aggregate=False,
+    cache=None,
+    checkpoint=None,
+    checkpoint_every=10000,
+):
+    """
+    Run ``n_sim`` table sessions with all strategies at the same table.
+
+    With ``common_random_numbers``, each strategy instead plays at its own
+    table and all tables of a session replay the same dice, so differences
+    between strategies within a session come from the strategies alone.  Pass
+    the rows to ``crapssim.stats.paired_differences`` to compare them.
+
+    Parameters
+    ----------
+    strategies : dictionary
+        Maps a player name to its betting strategy function.  Strategies must
+        be importable module-level functions so they can be sent to workers.
+    bankrolls : list
+        Starting bankroll for each strategy, in the order of ``strategies``
+    n_sim : int
+        Number of sessions to run
+    max_rolls : int
+        Maximum number of rolls to run for
+    max_shooter : int, optional
+        Maximum number of shooters to run for
+    runout : bool, optional (default = True)
+        If true, continue past max_rolls until player has no more bets on the table
+    n_workers : int, optional
+        Number of worker processes, defaults to ``os.cpu_count()``.  With
+        ``n_workers=1`` the sessions run in the calling process.
+    seed : None or int, optional
+        Seed for the dice of all sessions
+    chunk_size : int, optional (default = 100)
+        Number of sessions handed to a worker at a time
+    payouts : dictionary, optional
+        Table payouts to set, as in ``Table.set_payouts``
+    common_random_numbers : bool, optional (default = False)
+        If true, run each strategy at its own table with the session's dice
+    aggregate : bool or dictionary, optional (default = False)
+        If true, summarize the sessions in a ``crapssim.stats.SessionAggregator``
+        instead of returning rows, so memory does not grow with ``n_sim``.  A
+        dictionary is passed to the aggregator as keyword arguments.
+    cache : ResultCache or string, optional
+        Cache of chunk results, or the directory of one.  Chunks already in
+        the cache are read instead of simulated, and new ones are added.
+        Only runs with an integer ``seed`` are cached.
+    checkpoint : string, optional
+        Directory to keep the job's progress in: the result of every finished
+        chunk, and every ``checkpoint_every`` rolls the table in flight in
+        each running chunk.  Running again with the same directory and
+        arguments resumes the job, returning the same result as a run that
+        was never interrupted.  Not combined with ``cache``.
+    checkpoint_every : int, optional (default = 10000)
+        Number of rolls of a session between checkpoints of its table
+
+    Returns
+    -------
+    list or SessionAggregator
+        One ``(simid, strategy, total_cash, bankroll, n_rolls)`` row per
+        session and strategy, ordered by ``simid``, see ``COLUMNS``.
+        ``total_cash`` is the player's final bankroll plus any bets left on
+        the table, as ``Table.total_player_cash``.  With
+        ``aggregate``, the aggregator of all sessions.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    config = {
+        "strategies": strategies,
+        "bankrolls": list(bankrolls),
+        "max_rolls": max_rolls,
+        "max_shooter": max_shooter,
+        "runout": runout,
+        "payouts": payouts,
+        "common_random_numbers": common_random_numbers,
+        "aggregate": {} if aggregate is True else aggregate,
+    }
+    if isinstance(cache, str):
+        cache = ResultCache(cache)
+    if checkpoint is None:
+        checkpoint_every = None
+    else:
+        if cache is not None:
+            raise ValueError("Give either cache or checkpoint")
+        seed = _checkpoint_seed(checkpoint, seed)
+        cache = ResultCache(checkpoint, max_bytes=None)
+    chunks = _chunks(n_sim, chunk_size, seed)
+    map_args = (n_workers, cache, seed, chunk_size, checkpoint_every)
+
+    if aggregate is not False:
+        # merge in session order, so the sums don't depend on which chunk finished first
+        results = sorted(
+            _map_cached_chunks(_aggregate_chunk, config, chunks, *map_args),
+            key=lambda result: result[0],
+        )
+        aggregator = SessionAggregator(**config["aggregate"])
+        for _, chunk_aggregator in results:
+            aggregator.merge(chunk_aggregator)
+        return aggregator
+
+    rows = []
+    for _, chunk_rows in _map_cached_chunks(_run_chunk, config, chunks, *map_args):
+        rows.extend(chunk_rows)
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def run_until_precise(
+    strategies,
+    bankrolls,
+    max_rolls,
+    max_shooter=float("inf"),
+    runout=True,
+    mean_half_width=None,
+    ruin_half_width=None,
+    confidence=0.95,
+    batch_size=1000,
+    max_sims=100000,
+    n_workers=None,
+    seed=None,
+    chunk_size=100,
+    payouts=None,
+    common_random_numbers=False,
+    ruin_level=0,
+):
+    """
+    Run sessions in batches until every strategy's estimates are precise enough.
+
+    After each batch of ``batch_size`` sessions, the confidence interval of
+    each strategy's mean final bankroll and of its ruin probability are
+    checked against the targets.  Running stops when all strategies meet them
+    or ``max_sims`` sessions have run.  Sessions are seeded exactly as in
+    ``run_simulations``, so with ``batch_size`` a multiple of ``chunk_size``
+    the sessions run are the first ones ``run_simulations`` would run with the
+    same ``seed``.
+
+    Parameters
+    ----------
+    strategies, bankrolls, max_rolls, max_shooter, runout, n_workers, seed,
+    chunk_size, payouts, common_random_numbers
+        As in ``run_simulations``
+    mean_half_width : float, optional
+        Target half-width of the interval for the mean final bankroll
+    ruin_half_width : float, optional
+        Target half-width of the (Wilson) interval for the ruin probability
+    confidence : float, optional (default = 0.95)
+        Confidence level of the intervals
+    batch_size : int, optional (default = 1000)
+        Number of sessions run between checks of the targets
+    max_sims : int, optional (default = 100000)
+        Budget of sessions to run at most
+    ruin_level : float, optional (default = 0)
+        Final bankroll at or below which a session counts as ruined
+
+    Returns
+    -------
+    dictionary
+        ``n_sim`` (sessions run), ``converged`` (whether all targets were
+        met), ``aggregator`` (the SessionAggregator of all sessions) and
+        ``summary``, its summary with ``mean_half_width`` and
+        ``ruin_half_width`` achieved and ``met`` for every strategy.
+    """
+    if mean_half_width is None and ruin_half_width is None:
+        raise ValueError("Give a target mean_half_width, ruin_half_width or both")
+    if max_sims < 1 or batch_size < 1:
+        raise ValueError("max_sims and batch_size must be at least 1")
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    config = {
+        "strategies": strategies,
+        "bankrolls": list(bankrolls),
+        "max_rolls": max_rolls,
+        "max_shooter": max_shooter,
+        "runout": runout,
+        "payouts": payouts,
+        "common_random_numbers": common_random_numbers,
+        "aggregate": {"ruin_level": ruin_level},
+    }
+    seed_seq = np.random.SeedSequence(seed)
+    aggregator = SessionAggregator(ruin_level=ruin_level)
+
+    n_sim = 0
+    converged = False
+    while not converged and n_sim < max_sims:
+        stop = min(n_sim + batch_size, max_sims)
+        chunks = _chunks(stop, chunk_size, seed_seq, start=n_sim)
+        for chunk_aggregator in _map_chunks(_aggregate_chunk, config, chunks, n_workers):
+            aggregator.merge(chunk_aggregator)
+        n_sim = stop
+
+        summary = aggregator.summary(confidence)
+        converged = True
+        for result in summary.values():
+            result["mean_half_width"] = result["ci_high"] - result["mean"]
+            result["met"] = (
+                mean_half_width is None or result["mean_half_width"] <= mean_half_width
+            ) and (ruin_half_width is None or result["ruin_half_width"] <= ruin_half_width)
+            converged = converged and result["met"]
+
+    return {"n_sim": n_sim, "converged": converged, "aggregator": aggregator, "summary": summary}
+
+
+def run_importance_sampling(
+    strategies,
+    bankrolls,
+    n_sim,
+    max_rolls,
+    weights,
+    max_shooter=float("inf"),
+    runout=True,
+    n_workers=None,
+    seed=None,
+    chunk_size=100,
+    payouts=None,
+    common_random_numbers=False,
+    ruin_level=0,
+    win_level=None,
+    confidence=0.95,
+):
+    """
+    Run sessions with tilted dice and estimate outcomes under fair dice.
+
+    Sessions run as in ``run_simulations`` but roll
+    ``crapssim.dice.TiltedDice(weights)``, and each session's outcomes are
+    weighted by its likelihood ratio (see ``crapssim.stats.weighted_estimate``),
+    so rare outcomes such as ruin can be estimated from far fewer sessions
+    when the tilt makes them common.  Strategies run unchanged.
+
+    Parameters
+    ----------
+    strategies, bankrolls, n_sim, max_rolls, max_shooter, runout, n_workers,
+    seed, chunk_size, payouts, common_random_numbers
+        As in ``run_simulations``
+    weights : dictionary
+        Factor on the probability of each dice total, as in ``TiltedDice``
+    ruin_level : float, optional (default = 0)
+        Final bankroll at or below which a session counts as ruined
+    win_level : float, optional
+        Final bankroll at or above which a session counts as a win, e.g. 10
+        times the starting bankroll
+    confidence : float, optional (default = 0.95)
+        Confidence level of the intervals
+
+    Returns
+    -------
+    dictionary
+        ``rows``, in the schema of ``run_simulations`` with the session's log
+        likelihood ratio appended, and ``summary``, for every strategy the
+        weighted estimates of the ``mean`` final bankroll and of the
+        probabilities ``p_ruin``, ``p_bust`` (ending below the starting
+        bankroll) and, with ``win_level``, ``p_win``.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    config = {
+        "strategies": strategies,
+        "bankrolls": list(bankrolls),
+        "max_rolls": max_rolls,
+        "max_shooter": max_shooter,
+        "runout": runout,
+        "payouts": payouts,
+        "common_random_numbers": common_random_numbers,
+        "tilt": dict(weights),
+    }
+    rows = []
+    for chunk_rows in _map_chunks(_run_chunk, config, _chunks(n_sim, chunk_size, seed), n_workers):
+        rows.extend(chunk_rows)
+    rows.sort(key=lambda row: row[0])
+
+    summary = {}
+    for s in strategies:
+        _, _, cash, bankroll, _, log_weights = (
+            np.array(column) for column in zip(*(row for row in rows if row[1] == s))
+        )
+        summary[s] = {
+            "mean": weighted_estimate(cash, log_weights, confidence),
+            "p_ruin": weighted_estimate(cash <= ruin_level, log_weights, confidence),
+            "p_bust": weighted_estimate(cash < bankroll, log_weights, confidence),
+        }
+        if win_level is not None:
+            summary[s]["p_win"] = weighted_estimate(cash >= win_level, log_weights, confidence)
+    return {"rows": rows, "summary": summary}
+
+
+def write_csv(rows, f_out):
+    """ write rows from ``run_simulations`` in the format of ``run_multi_simulation`` """
+    f_out.write(",".join(COLUMNS))
+    f_out.write("\n")
+    for row in rows:
+        f_out.write(",".join(str(x) for x in row))
+        f_out.write("\n")
@@ -0,0 +1,469 @@
+import numpy as np
+
+from crapssim.bet import DontPass, Field, LayOdds, Odds, PassLine
+from crapssim.bet import Place4, Place5, Place6, Place8, Place9, Place10
+from crapssim.vectorized import BET_NAMES, _bet, _remove
+
+"""
+Declarative betting strategies compiled to state machines.
+
+A ``StrategySpec`` is a list of ``Rule`` objects, optionally with named modes
+and a ``Progression`` of bet amounts.  Compiling a spec runs its rules once for
+every combination of point, bets held, mode and progression step, and stores
+the resulting bets, removals and next mode in a lookup table.  The compiled
+strategy then plays with a single lookup per roll: as a regular strategy
+function for ``Player``, or vectorized over many tables in
+``crapssim.vectorized.run_vectorized``.
+
+Specs may use the bets in ``crapssim.vectorized.BET_NAMES``.
+"""
+
+POINTS = (None, 4, 5, 6, 8, 9, 10)
+PLACE_NAMES = ("Place4", "Place5", "Place6", "Place8", "Place9", "Place10")
+
+# amount given in rules to bet the current step of the progression
+PROGRESSION = "progression"
+
+_BET_CLASSES = {
+    "PassLine": PassLine,
+    "DontPass": DontPass,
+    "Place4": Place4,
+    "Place5": Place5,
+    "Place6": Place6,
+    "Place8": Place8,
+    "Place9": Place9,
+    "Place10": Place10,
+}
+
+# bets that need another bet on the table to be placed
+_BASE_BET = {"Odds": "PassLine", "LayOdds": "DontPass"}
+
+# place bets on 6 and 8 are made in multiples of 6, as in strategy.place
+_AMOUNT_FACTOR = {"Place6": 6 / 5, "Place8": 6 / 5}
+
+_POINT_INDEX = np.zeros(13, dtype=np.int64)
+for _i, _p in enumerate(POINTS[1:], start=1):
+    _POINT_INDEX[_p] = _i
+
+
+class Rule(object):
+    """
+    A betting rule: when every condition holds, remove bets, change the mode
+    and place bets, in that order.
+
+    Parameters
+    ----------
+    point : None, "On", "Off" or list, optional
+        Point the rule applies to, a list of point numbers, or None for any
+    mode : None, string or list, optional
+        Mode(s) of the strategy the rule applies in, None for any
+    present : list, optional
+        Bets that must all be on the table
+    missing : list, optional
+        Bets that must all be off the table
+    any_present : list, optional
+        Bets of which at least one must be on the table
+    when : function(point, held), optional
+        Extra condition on the point number (None when "Off") and the frozenset
+        of bet names on the table.  Only called while compiling.
+    place : list, optional
+        Bets to place, each unless it is already on the table
+    amount : float, dictionary or PROGRESSION, optional (default = 1)
+        Amount of the bets to place in units, a dictionary from point number
+        to units, or ``PROGRESSION`` for the current step of the progression.
+        Place bets on 6 and 8 are made at 6/5 of the amount.
+    skip_point : bool, optional (default = False)
+        If true, don't place a place bet on the point number, and take down
+        the place bets in ``place`` that are on the point number
+    remove : list, optional
+        Bets to take down
+    set_mode : string, optional
+        Mode to switch the strategy to
+    """
+
+    def __init__(
+        self,
+        point=None,
+        mode=None,
+        present=(),
+        missing=(),
+        any_present=(),
+        when=None,
+        place=(),
+        amount=1,
+        skip_point=False,
+        remove=(),
+        set_mode=None,
+    ):
+        self.point = point
+        self.mode = [mode] if isinstance(mode, str) else mode
+        self.present = tuple(present)
+        self.missing = tuple(missing)
+        self.any_present = tuple(any_present)
+        self.when = when
+        self.place = tuple(place)
+        self.amount = amount
+        self.skip_point = skip_point
+        self.remove = tuple(remove)
+        self.set_mode = set_mode
+
+    @property
+    def bets(self):
+        return set(self.present + self.missing + self.any_present + self.place + self.remove)
+
+    def applies(self, point, held, mode):
+        if self.point == "On" and point is None:
+            return False
+        if self.point == "Off" and point is not None:
+            return False
+        if self.point not in (None, "On", "Off") and point not in self.point:
+            return False
+        if self.mode is not None and mode not in self.mode:
+            return False
+        if not all(b in held for b in self.present):
+            return False
+        if any(b in held for b in self.missing):
+            return False
+        if self.any_present and not any(b in held for b in self.any_present):
+            return False
+        return self.when is None or self.when(point, held)
+
+    def units(self, point, progression_units):
+        if self.amount == PROGRESSION:
+            return progression_units
+        if isinstance(self.amount, dict):
+            return self.amount[point]
+        return self.amount
+
+
+class Progression(object):
+    """
+    Sequence of bet amounts that advances on every roll and starts over after
+    certain rolls.
+
+    Parameters
+    ----------
+    amounts : list
+        Amount in units of each step
+    reset_on : list, optional
+        Dice totals after which the progression goes back to the first step
+    cycle : int, optional (default = 1)
+        After the last step, the progression repeats its last ``cycle`` steps
+    """
+
+    def __init__(self, amounts, reset_on=(), cycle=1):
+        self.amounts = list(amounts)
+        self.reset_on = tuple(reset_on)
+        self.cycle = cycle
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def next_step(self, step):
+        step += 1
+        n = len(self.amounts)
+        if step >= n:
+            step = n - self.cycle + (step - n) % self.cycle
+        return step
+
+
+class StrategySpec(object):
+    """
+    A declarative betting strategy.
+
+    Parameters
+    ----------
+    name : string
+        Name of the strategy
+    rules : list
+        Rules checked in order on every roll.  Each rule sees the bets and mode
+        as left by the rules before it.
+    modes : list, optional
+        Names of the modes of the strategy, the first one is the initial mode
+    progression : Progression, optional
+        Progression of amounts for rules with ``amount=PROGRESSION``
+    """
+
+    def __init__(self, name, rules, modes=None, progression=None):
+        self.name = name
+        self.rules = list(rules)
+        self.modes = list(modes) if modes is not None else [None]
+        self.progression = progression
+
+    @property
+    def bets(self):
+        bets = set()
+        for rule in self.rules:
+            bets |= rule.bets
+        unknown = bets - set(BET_NAMES)
+        if unknown:
+            raise ValueError(f"Strategy specs can't use the bets {sorted(unknown)}")
+        return tuple(b for b in BET_NAMES if b in bets)
+
+    def _actions(self, point, held, mode, step):
+        """ run the rules on a hypothetical table, returning the actions and the final mode """
+        held = set(held)
+        progression_units = self.progression.amounts[step] if self.progression else None
+        actions = []
+        for rule in self.rules:
+            if not rule.applies(point, frozenset(held), mode):
+                continue
+            for name in rule.remove:
+                if name in held:
+                    actions.append(("remove", name, 0.0))
+                    held.discard(name)
+            if rule.set_mode is not None:
+                mode = rule.set_mode
+            for name in rule.place:
+                if name in held or (name in _BASE_BET and _BASE_BET[name] not in held):
+                    continue
+                if rule.skip_point and name in PLACE_NAMES and int(name[5:]) == point:
+                    continue
+                actions.append(("bet", name, rule.units(point, progression_units)))
+                held.add(name)
+            if rule.skip_point and point is not None:
+                name = f"Place{point}"
+                if name in rule.place and name in held:
+                    actions.append(("remove", name, 0.0))
+                    held.discard(name)
+        return tuple(actions), mode
+
+    def compile(self):
+        return CompiledStrategy(self)
+
+
+class CompiledStrategy(object):
+    """
+    A ``StrategySpec`` compiled to a lookup table.
+
+    Call it like any function in ``crapssim.strategy``.  The state it keeps
+    between rolls, the mode and progression step, is returned as
+    ``strat_info``; specs without modes or a progression keep none.
+
+    Attributes
+    ----------
+    bets : tuple
+        Names of the bets the strategy uses, bit ``i`` of a held-bets mask
+        stands for ``bets[i]``
+    actions : dictionary
+        Maps ``(point number, held mask, mode index, step)`` to the tuple of
+        ``(action, bet name, units)`` to take and the next mode index
+    ops_kind, ops_bet, ops_units, next_mode : arrays
+        The same table as arrays indexed by ``key_index``, for vectorized play.
+        ``ops_kind`` is 0 for no action, 1 to bet and 2 to remove.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.__name__ = spec.name
+        self.bets = spec.bets
+        self.modes = spec.modes
+        self.progression = spec.progression
+        self.stateless = len(self.modes) == 1 and self.progression is None
+        self._bits = {name: 1 << i for i, name in enumerate(self.bets)}
+        n_steps = len(self.progression) if self.progression else 1
+        self._shape = (len(POINTS), 1 << len(self.bets), len(self.modes), n_steps)
+
+        if self.progression:
+            self._reset = np.zeros(13, dtype=bool)
+            self._reset[list(self.progression.reset_on)] = True
+            self._next_step = np.array([self.progression.next_step(s) for s in range(n_steps)])
+
+        self.actions = {}
+        entries = []
+        for point in POINTS:
+            for mask in range(self._shape[1]):
+                held = {name for name, bit in self._bits.items() if mask & bit}
+                for mode_index, mode in enumerate(self.modes):
+                    for step in range(n_steps):
+                        actions, next_mode = spec._actions(point, held, mode, step)
+                        entry = (actions, self.modes.index(next_mode))
+                        self.actions[(point, mask, mode_index, step)] = entry
+                        entries.append(entry)
+
+        # entries are in the order of key_index
+        n_ops = max(1, max(len(actions) for actions, _ in entries))
+        self.ops_kind = np.zeros((len(entries), n_ops), dtype=np.int8)
+        self.ops_bet = np.zeros((len(entries), n_ops), dtype=np.int64)
+        self.ops_units = np.zeros((len(entries), n_ops))
+        self.next_mode = np.zeros(len(entries), dtype=np.int64)
+        for k, (actions, next_mode) in enumerate(entries):
+            self.next_mode[k] = next_mode
+            for j, (action, name, units) in enumerate(actions):
+                self.ops_kind[k, j] = 1 if action == "bet" else 2
+                self.ops_bet[k, j] = self.bets.index(name)
+                self.ops_units[k, j] = units
+
+    def __getstate__(self):
+        # rules may hold lambdas, the compiled table is all that's needed to play
+        state = self.__dict__.copy()
+        state["spec"] = None
+        return state
+
+    def __repr__(self):
+        return f"<compiled strategy {self.__name__}>"
+
+    def key_index(self, point_index, mask, mode, step):
+        _, n_masks, n_modes, n_steps = self._shape
+        return ((point_index * n_masks + mask) * n_modes + mode) * n_steps + step
+
+    def __call__(self, player, table, unit=5, strat_info=None):
+        if strat_info is None:
+            mode, step = 0, 0
+        else:
+            mode, step = strat_info
+            if self.progression is not None:
+                step = 0 if self._reset[table.last_roll] else self._next_step[step]
+
+        mask = 0
+        bits = self._bits
+        for name in player._bets_by_name:
+            mask |= bits.get(name, 0)
+        actions, mode = self.actions[(table.point.number, mask, mode, step)]
+
+        for action, name, units in actions:
+            if action == "remove":
+                player.remove_if_present(name)
+                continue
+            amount = _AMOUNT_FACTOR.get(name, 1) * (units * unit)
+            if name == "Field":
+                bet_object = Field(
+                    amount, double=table.payouts["fielddouble"], triple=table.payouts["fieldtriple"]
+                )
+            elif name in _BASE_BET:
+                if not player.has_bet(_BASE_BET[name]):
+                    continue
+                base = player.get_bet(_BASE_BET[name])
+                bet_object = Odds(amount, base) if name == "Odds" else LayOdds(amount, base)
+            else:
+                bet_object = _BET_CLASSES[name](amount)
+            player.bet(bet_object)
+
+        return None if self.stateless else (mode, int(step))
+
+    def vector_strategy(self, state):
+        """ play one roll at every table of a ``crapssim.vectorized.VectorState`` """
+        extra = state.strategy_state
+        if "mode" not in extra:
+            extra["mode"] = np.zeros(len(state), dtype=np.int64)
+            extra["step"] = np.zeros(len(state), dtype=np.int64)
+        mode = extra["mode"]
+        step = extra["step"]
+        if self.progression is not None:
+            advance = (state.n_rolls > 0) & ~self._reset[state.last_total]
+            step = np.where(advance, self._next_step[step], 0)
+
+        mask = np.zeros(len(state), dtype=np.int64)
+        for name, bit in self._bits.items():
+            mask |= np.where(state.bets[name] > 0, bit, 0)
+        key = self.key_index(_POINT_INDEX[state.point], mask, mode, step)
+
+        for j in range(self.ops_kind.shape[1]):
+            kind = self.ops_kind[key, j]
+            if not kind.any():
+                break
+            bet_index = self.ops_bet[key, j]
+            units = self.ops_units[key, j]
+            for b, name in enumerate(self.bets):
+                this_bet = bet_index == b
+                _remove(state, (kind == 2) & this_bet, name)
+                placing = (kind == 1) & this_bet
+                if name in _BASE_BET:
+                    placing &= state.bets[_BASE_BET[name]] > 0
+                if placing.any():
+                    _bet(state, placing, name, _AMOUNT_FACTOR.get(name, 1) * (units * state.unit))
+
+        extra["mode"] = self.next_mode[key]
+        extra["step"] = step
+
+
+"""
+Specs of strategies in crapssim.strategy
+"""
+
+PASSLINE = Rule(point="Off", place=["PassLine"])
+DONTPASS = Rule(point="Off", place=["DontPass"])
+
+
+def passline_odds_spec(mult=1):
+    if mult == "345":
+        amount = {4: 3, 10: 3, 5: 4, 9: 4, 6: 5, 8: 5}
+    else:
+        amount = float(mult)
+    return StrategySpec(
+        f"passline_odds{mult if mult != 1 else ''}",
+        [PASSLINE, Rule(point="On", present=["PassLine"], place=["Odds"], amount=amount)],
+    )
+
+
+PLACE68 = StrategySpec(
+    "place68",
+    [PASSLINE, Rule(point="On", missing=PLACE_NAMES, place=["Place6", "Place8"], skip_point=True)],
+)
+
+IRONCROSS = StrategySpec(
+    "ironcross",
+    [
+        PASSLINE,
+        Rule(point="On", present=["PassLine"], place=["Odds"], amount=2.0),
+        Rule(point="On", place=["Place5", "Place6", "Place8"], amount=2, skip_point=True),
+        Rule(point="On", place=["Field"]),
+    ],
+)
+
+_INSIDE = ("Place5", "Place6", "Place8", "Place9")
+
+
+def _place_bets(held):
+    return held & set(PLACE_NAMES)
+
+
+HAMMERLOCK = StrategySpec(
+    "hammerlock",
+    [
+        PASSLINE,
+        DONTPASS,
+        Rule(point="On", present=["DontPass"], place=["LayOdds"], amount=6.0),
+        Rule(point="Off", remove=_INSIDE, set_mode="place68"),
+        # a place 6/8 has won: take them down and place the inside numbers
+        Rule(
+            mode="place68",
+            point="On",
+            any_present=["Place6", "Place8"],
+            when=lambda point, held: _place_bets(held) != {"Place6", "Place8"},
+            remove=["Place6", "Place8"],
+            set_mode="place_inside",
+            place=_INSIDE,
+        ),
+        Rule(mode="place68", point="On", place=["Place6", "Place8"], amount=2),
+        # an inside number has won: take everything down
+        Rule(
+            mode="place_inside",
+            point="On",
+            any_present=_INSIDE,
+            when=lambda point, held: _place_bets(held) != set(_INSIDE),
+            remove=_INSIDE,
+            set_mode="takedown",
+        ),
+        Rule(mode="place_inside", point="On", place=_INSIDE),
+    ],
+    modes=["place68", "place_inside", "takedown"],
+)
+
+DICEDOCTOR = StrategySpec(
+    "dicedoctor",
+    [Rule(place=["Field"], amount=PROGRESSION)],
+    progression=Progression(
+        [a / 5 for a in [10, 20, 15, 30, 25, 50, 35, 70, 50, 100, 75, 150]],
+        reset_on=[5, 6, 7, 8],
+        cycle=2,
+    ),
+)
+
+passline_odds = passline_odds_spec().compile()
+passline_odds2 = passline_odds_spec(2).compile()
+passline_odds345 = passline_odds_spec("345").compile()
+place68 = PLACE68.compile()
+ironcross = IRONCROSS.compile()
+hammerlock = HAMMERLOCK.compile()
+dicedoctor = DICEDOCTOR.compile()
@@ -0,0 +1,360 @@
+from statistics import NormalDist
+
+import numpy as np
+
+"""
+Summary statistics for simulation results.
+
+Functions here take rows in the ``(simid, strategy, total_cash, bankroll,
+n_rolls)`` schema of ``crapssim.runner.run_simulations``.  ``SessionAggregator``
+summarizes sessions as they finish instead, in constant memory.
+"""
+
+
+def _z_value(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _wilson_half_width(successes, n, z):
+    """ half-width of the Wilson score interval of a proportion """
+    p = successes / n
+    return z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+
+
+def _net_by_strategy(rows):
+    """ map each strategy to an array of net winnings ordered by simid """
+    net = {}
+    for simid, s, total_cash, bankroll, _ in rows:
+        net.setdefault(s, {})[simid] = total_cash - bankroll
+    simids = sorted(next(iter(net.values())))
+    for s in net:
+        if sorted(net[s]) != simids:
+            raise ValueError(f"Strategy {s} is missing sessions for a paired comparison")
+    return {s: np.array([net[s][i] for i in simids]) for s in net}
+
+
+def paired_differences(rows, baseline=None, confidence=0.95):
+    """
+    Compare strategies session by session against a baseline strategy.
+
+    Meant for rows from ``run_simulations(..., common_random_numbers=True)``,
+    where every strategy in a session saw the same dice.  The comparison uses
+    the net winnings (``total_cash - bankroll``) of each session.
+
+    Parameters
+    ----------
+    rows : list
+        Rows in the ``(simid, strategy, total_cash, bankroll, n_rolls)`` schema
+    baseline : string, optional
+        Strategy to compare against, defaults to the first strategy in ``rows``
+    confidence : float, optional (default = 0.95)
+        Confidence level of the interval for the mean difference
+
+    Returns
+    -------
+    dictionary
+        For each strategy other than the baseline, a dictionary with ``n``,
+        ``mean_diff`` (strategy minus baseline), ``sd_diff``, ``se``,
+        ``ci_low``, ``ci_high`` and ``variance_ratio``.  The variance ratio is
+        the variance of the difference under independent sampling divided by
+        the paired variance, roughly how many times more sessions independent
+        runs would need for the same precision.
+    """
+    net = _net_by_strategy(rows)
+    if baseline is None:
+        baseline = next(iter(net))
+    base = net[baseline]
+    n = len(base)
+    z = _z_value(confidence)
+
+    results = {}
+    for s, values in net.items():
+        if s == baseline:
+            continue
+        diff = values - base
+        mean_diff = diff.mean()
+        sd_diff = diff.std(ddof=1) if n > 1 else float("nan")
+        se = sd_diff / np.sqrt(n)
+        var_independent = values.var(ddof=1) + base.var(ddof=1) if n > 1 else float("nan")
+        results[s] = {
+            "n": n,
+            "mean_diff": mean_diff,
+            "sd_diff": sd_diff,
+            "se": se,
+            "ci_low": mean_diff - z * se,
+            "ci_high": mean_diff + z * se,
+            "variance_ratio": var_independent / sd_diff ** 2 if sd_diff > 0 else float("inf"),
+        }
+    return results
+
+
+def weighted_estimate(values, log_weights, confidence=0.95):
+    """
+    Importance-sampling estimate of the mean of ``values`` under fair dice.
+
+    Parameters
+    ----------
+    values : array
+        A value for each session rolled with ``crapssim.dice.TiltedDice``,
+        e.g. its final cash, or 1 and 0 for whether an event happened to
+        estimate the event's probability
+    log_weights : array
+        Each session's ``log_likelihood_ratio`` (fair over tilted)
+    confidence : float, optional (default = 0.95)
+        Confidence level of the interval
+
+    Returns
+    -------
+    dictionary
+        ``n``, ``mean`` (the unbiased estimate, the mean of weight times
+        value), ``se``, ``ci_low``, ``ci_high``, ``ess`` (effective sample
+        size of the weights, n for untilted dice) and ``mean_weight``, which
+        should be close to 1 when the tilt is sensible.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.exp(np.asarray(log_weights, dtype=float))
+    n = len(values)
+    weighted = weights * values
+    mean = weighted.mean()
+    se = weighted.std(ddof=1) / np.sqrt(n) if n > 1 else float("nan")
+    z = _z_value(confidence)
+    return {
+        "n": n,
+        "mean": mean,
+        "se": se,
+        "ci_low": mean - z * se,
+        "ci_high": mean + z * se,
+        "ess": weights.sum() ** 2 / (weights ** 2).sum(),
+        "mean_weight": weights.mean(),
+    }
+
+
+class RunningStats(object):
+    """
+    Running count, mean, variance, minimum and maximum of a stream of values,
+    using Welford's update.  Two instances merge exactly.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+
+class QuantileSketch(object):
+    """
+    Streaming quantile estimates with bounded relative error (DDSketch).
+
+    Values are counted in buckets whose bounds grow geometrically, so any
+    quantile is returned within ``relative_accuracy`` of the exact one.  The
+    number of buckets depends only on the range of the values, not on how many
+    are added, and sketches with the same accuracy merge exactly.
+
+    Parameters
+    ----------
+    relative_accuracy : float, optional (default = 0.01)
+        Relative error bound of the quantile estimates
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self._gamma)
+        self.count = 0
+        self._zeros = 0
+        self._positive = {}
+        self._negative = {}
+
+    def _bucket(self, x):
+        return int(np.ceil(np.log(x) / self._log_gamma))
+
+    def _value(self, bucket):
+        return 2 * self._gamma ** bucket / (self._gamma + 1)
+
+    def add(self, x):
+        self.count += 1
+        if x > 0:
+            key = self._bucket(x)
+            self._positive[key] = self._positive.get(key, 0) + 1
+        elif x < 0:
+            key = self._bucket(-x)
+            self._negative[key] = self._negative.get(key, 0) + 1
+        else:
+            self._zeros += 1
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        self.count += other.count
+        self._zeros += other._zeros
+        for mine, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        return self
+
+    def quantile(self, q):
+        """ estimate of the ``q`` quantile, nan if the sketch is empty """
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self._zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self._positive))
+
+
+class SessionAggregator(object):
+    """
+    Constant-memory summary of simulation sessions, per strategy.
+
+    For each strategy it keeps running statistics and quantile sketches of
+    the final bankroll (``total_cash``, including bets left on the table) and
+    of the number of rolls, and counts
+    sessions ending in ruin (final bankroll at or below ``ruin_level``) and
+    bust (below the starting bankroll).  Aggregators from separate workers
+    combine with ``merge``.
+
+    Parameters
+    ----------
+    ruin_level : float, optional (default = 0)
+        Final bankroll at or below which a session counts as ruined
+    relative_accuracy : float, optional (default = 0.01)
+        Relative accuracy of the quantile sketches
+
+    Attributes
+    ----------
+    strategies : dictionary
+        Maps each strategy name to a dictionary with ``final`` and ``rolls``
+        (RunningStats), ``final_sketch`` and ``rolls_sketch``
+        (QuantileSketch), and ``ruin`` and ``bust`` counts
+    """
+
+    def __init__(self, ruin_level=0, relative_accuracy=0.01):
+        self.ruin_level = ruin_level
+        self.relative_accuracy = relative_accuracy
+        self.strategies = {}
+
+    def _new_entry(self):
+        return {
+            "final": RunningStats(),
+            "rolls": RunningStats(),
+            "final_sketch": QuantileSketch(self.relative_accuracy),
+            "rolls_sketch": QuantileSketch(self.relative_accuracy),
+            "ruin": 0,
+            "bust": 0,
+        }
+
+    def add(self, strategy, total_cash, bankroll, n_rolls):
+        """ add a session of ``strategy`` that started with ``bankroll`` """
+        entry = self.strategies.get(strategy)
+        if entry is None:
+            entry = self.strategies[strategy] = self._new_entry()
+        entry["final"].add(total_cash)
+        entry["rolls"].add(n_rolls)
+        entry["final_sketch"].add(total_cash)
+        entry["rolls_sketch"].add(n_rolls)
+        if total_cash <= self.ruin_level:
+            entry["ruin"] += 1
+        if total_cash < bankroll:
+            entry["bust"] += 1
+
+    def add_rows(self, rows):
+        """ add rows in the ``(simid, strategy, total_cash, bankroll, n_rolls)`` schema """
+        for _, s, total_cash, bankroll, n_rolls in rows:
+            self.add(s, total_cash, bankroll, n_rolls)
+
+    def add_player(self, player, bankroll, n_rolls):
+        """ add the session of a Player, by name, that started with ``bankroll`` """
+        self.add(player.name, player.bankroll + player.total_bet_amount, bankroll, n_rolls)
+
+    def add_table(self, table, bankrolls):
+        """ add the session of every player at a Table, given their starting bankrolls """
+        for player, bankroll in zip(table.players, bankrolls):
+            self.add_player(player, bankroll, table.dice.n_rolls)
+
+    def merge(self, other):
+        for s, theirs in other.strategies.items():
+            mine = self.strategies.get(s)
+            if mine is None:
+                mine = self.strategies[s] = self._new_entry()
+            for key in ("final", "rolls", "final_sketch", "rolls_sketch"):
+                mine[key].merge(theirs[key])
+            mine["ruin"] += theirs["ruin"]
+            mine["bust"] += theirs["bust"]
+        return self
+
+    def summary(self, confidence=0.95, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """
+        Summary of every strategy.
+
+        Returns
+        -------
+        dictionary
+            For each strategy, a dictionary with ``n``, ``mean``, ``sd``,
+            ``se``, ``ci_low``, ``ci_high``, ``min`` and ``max`` of the final
+            bankroll, ``p_ruin`` and ``p_bust``, ``ruin_half_width`` (of the
+            Wilson interval for ``p_ruin``), ``mean_rolls``,
+            ``max_rolls``, and ``quantiles`` and ``rolls_quantiles``
+            dictionaries keyed by ``quantiles``.
+        """
+        z = _z_value(confidence)
+        results = {}
+        for s, entry in self.strategies.items():
+            final = entry["final"]
+            sd = np.sqrt(final.variance)
+            se = sd / np.sqrt(final.n)
+            results[s] = {
+                "n": final.n,
+                "mean": final.mean,
+                "sd": sd,
+                "se": se,
+                "ci_low": final.mean - z * se,
+                "ci_high": final.mean + z * se,
+                "min": final.min,
+                "max": final.max,
+                "p_ruin": entry["ruin"] / final.n,
+                "p_bust": entry["bust"] / final.n,
+                "ruin_half_width": _wilson_half_width(entry["ruin"], final.n, z),
+                "mean_rolls": entry["rolls"].mean,
+                "max_rolls": entry["rolls"].max,
+                "quantiles": {q: entry["final_sketch"].quantile(q) for q in quantiles},
+                "rolls_quantiles": {q: entry["rolls_sketch"].quantile(q) for q in quantiles},
+            }
+        return results
@@ -9,17 +9,31 @@ Each strategy must take a table and a player_object, and implicitly
 uses the methods from the player object.
 """
 
+
+def memoryless(bet_strategy):
+    """
+    Mark a strategy as memoryless: it keeps no ``strat_info`` and its bets
+    depend only on the point and the (name, subname, amount) of the bets the
+    player has on the table, not on the bankroll or past rolls.  A Table
+    remembers the decisions of memoryless strategies and replays them.
+    """
+    bet_strategy.memoryless = True
+    return bet_strategy
+
+
 """
 Fundamental Strategies
 """
 
 
+@memoryless
 def passline(player, table, unit=5, strat_info=None):
     # Pass line bet
     if table.point == "Off" and not player.has_bet("PassLine"):
         player.bet(PassLine(unit))
 
 
+@memoryless
 def passline_odds(player, table, unit=5, strat_info=None, mult=1):
     passline(player, table, unit)
     # Pass line odds
@@ -42,14 +56,17 @@ def passline_odds(player, table, unit=5, strat_info=None, mult=1):
         player.bet(Odds(mult * unit, player.get_bet("PassLine")))
 
 
+@memoryless
 def passline_odds2(player, table, unit=5, strat_info=None):
     passline_odds(player, table, unit, strat_info=None, mult=2)
 
 
+@memoryless
 def passline_odds345(player, table, unit=5, strat_info=None):
     passline_odds(player, table, unit, strat_info=None, mult="345")
 
 
+@memoryless
 def pass2come(player, table, unit=5, strat_info=None):
     passline(player, table, unit)
 
@@ -94,6 +111,7 @@ def place(player, table, unit=5, strat_info={"numbers": {6, 8}}, skip_point=True
             player.remove(player.get_bet("Place10"))
 
 
+@memoryless
 def place68(player, table, unit=5, strat_info=None):
     passline(player, table, unit, strat_info=None)
     # Place 6 and 8 when point is ON
@@ -110,12 +128,14 @@ def place68(player, table, unit=5, strat_info=None):
             player.bet(Place6(6 / 5 * unit))
 
 
+@memoryless
 def dontpass(player, table, unit=5, strat_info=None):
     # Don't pass bet
     if table.point == "Off" and not player.has_bet("DontPass"):
         player.bet(DontPass(unit))
 
 
+@memoryless
 def layodds(player, table, unit=5, strat_info=None, win_mult=1):
     # Assume that someone tries to win the `win_mult` times the unit on each bet, which corresponds
     # well to the max_odds on a table.
@@ -197,6 +217,7 @@ def place68_2come(player, table, unit=5, strat_info=None):
             player.bet(Place9(unit))
 
 
+@memoryless
 def ironcross(player, table, unit=5, strat_info=None):
     passline(player, table, unit)
     passline_odds(player, table, unit, strat_info=None, mult=2)
@@ -320,13 +341,14 @@ def risk12(player, table, unit=5, strat_info=None):
     return strat_info
 
 
+@memoryless
 def knockout(player, table, unit=5, strat_info=None):
     passline_odds345(player, table, unit)
     dontpass(player, table, unit)
 
 
 def dicedoctor(player, table, unit=5, strat_info=None):
-    if strat_info is None or table.last_roll in Field(0).losing_numbers:
+    if strat_info is None or table.last_roll in Field.LOSING_NUMBERS:
         strat_info = {"progression": 0}
     else:
         strat_info["progression"] += 1
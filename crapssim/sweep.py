@@ -0,0 +1,226 @@
+import itertools
+import os
+
+import numpy as np
+
+from crapssim.runner import _aggregate_chunk, _chunks, _map_tasks
+
+"""
+Parameter sweeps over table sessions.
+
+``sweep`` runs ``n_sim`` sessions of one player for every cell of a parameter
+grid, e.g. every combination of unit, starting bankroll and odds multiple, and
+returns one row of summary statistics per cell.  The chunks of all cells share
+one pool of worker processes.  Cell ``i`` gets the ``i``-th child of a
+``numpy.random.SeedSequence`` and splits it over its chunks as
+``run_simulations`` does, so every cell is reproducible from ``seed`` no matter
+how many workers run it.
+"""
+
+# grid parameters that set up the session or its statistics, any other
+# parameter is passed to the strategy as a keyword argument
+SESSION_PARAMETERS = (
+    "bet_strategy",
+    "unit",
+    "bankroll",
+    "max_rolls",
+    "max_shooter",
+    "runout",
+    "payouts",
+    "ruin_level",
+)
+
+# grid parameters that set a single table payout, as in ``Table.set_payouts``
+PAYOUT_PARAMETERS = ("fielddouble", "fieldtriple")
+
+STAT_COLUMNS = (
+    "n",
+    "mean",
+    "sd",
+    "se",
+    "ci_low",
+    "ci_high",
+    "min",
+    "max",
+    "p_ruin",
+    "p_bust",
+    "mean_rolls",
+)
+
+
+def _cells(grid):
+    """ list of parameter dictionaries, one per cell of ``grid`` """
+    if isinstance(grid, dict):
+        names = list(grid)
+        return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    return [dict(cell) for cell in grid]
+
+
+def _cell_config(cell, base):
+    """ configuration of ``runner._sessions`` for the parameters of ``cell`` """
+    params = dict(base)
+    params["payouts"] = dict(base["payouts"] or {})
+    strat_kwargs = {}
+    for name, value in cell.items():
+        if name == "payouts":
+            params["payouts"].update(value)
+        elif name in PAYOUT_PARAMETERS:
+            params["payouts"][name] = value
+        elif name in SESSION_PARAMETERS:
+            params[name] = value
+        else:
+            strat_kwargs[name] = value
+
+    strategy = params["bet_strategy"]
+    name = getattr(strategy, "__name__", repr(strategy))
+    return {
+        "strategies": {name: strategy},
+        "bankrolls": [params["bankroll"]],
+        "unit": params["unit"],
+        "strat_kwargs": strat_kwargs,
+        "max_rolls": params["max_rolls"],
+        "max_shooter": params["max_shooter"],
+        "runout": params["runout"],
+        "payouts": params["payouts"] or None,
+        "common_random_numbers": False,
+        "aggregate": {"ruin_level": params["ruin_level"]},
+    }
+
+
+def _sweep_chunk(cell_index, config, start, stop, seed_seq):
+    """ run sessions ``start`` to ``stop`` of a cell, returning (cell, start, SessionAggregator) """
+    return cell_index, start, _aggregate_chunk(config, start, stop, seed_seq)
+
+
+def _quantile_column(q):
+    return f"q{q * 100:g}".replace(".", "_")
+
+
+def sweep(
+    bet_strategy,
+    grid,
+    n_sim,
+    max_rolls,
+    max_shooter=float("inf"),
+    runout=True,
+    bankroll=100,
+    unit=5,
+    payouts=None,
+    n_workers=None,
+    seed=None,
+    chunk_size=100,
+    common_random_numbers=False,
+    ruin_level=0,
+    confidence=0.95,
+    quantiles=(0.05, 0.5, 0.95),
+):
+    """
+    Run ``n_sim`` sessions for every cell of a parameter grid.
+
+    Parameters
+    ----------
+    bet_strategy : function
+        Strategy of the player, unless the grid sets ``bet_strategy``.  It must
+        be an importable module-level function so it can be sent to workers.
+    grid : dictionary or list
+        Maps each parameter to the list of values to sweep, every combination
+        being a cell, or is a list of dictionaries giving each cell's
+        parameters.  Parameters may be ``bet_strategy``, ``unit``,
+        ``bankroll``, ``max_rolls``, ``max_shooter``, ``runout``,
+        ``ruin_level``, ``payouts`` (a dictionary as in
+        ``Table.set_payouts``) or a single payout such as ``fielddouble``.  Any other parameter, e.g. ``mult`` of
+        ``passline_odds`` or ``win_mult`` of ``layodds``, is passed to the
+        strategy as a keyword argument.
+    n_sim : int
+        Number of sessions to run for each cell, at least 1
+    max_rolls, max_shooter, runout
+        As in ``run_simulations``, for cells that don't set them
+    bankroll : float, optional (default = 100)
+        Starting bankroll, for cells that don't set it
+    unit : float, optional (default = 5)
+        Betting unit, for cells that don't set it
+    payouts : dictionary, optional
+        Table payouts, for cells that don't set them
+    n_workers : int, optional
+        Number of worker processes, defaults to ``os.cpu_count()``
+    seed : None or int, optional
+        Seed for the dice of all cells
+    chunk_size : int, optional (default = 100)
+        Number of sessions handed to a worker at a time
+    common_random_numbers : bool, optional (default = False)
+        If true, every cell replays the same dice instead of getting its own,
+        so differences between cells come from the parameters alone
+    ruin_level : float, optional (default = 0)
+        Final bankroll at or below which a session counts as ruined
+    confidence : float, optional (default = 0.95)
+        Confidence level of ``ci_low`` and ``ci_high``
+    quantiles : tuple, optional
+        Quantiles of the final bankroll to report, e.g. 0.05 as ``q5``
+
+    Returns
+    -------
+    list
+        One dictionary per cell, in the order of the grid, with the cell's
+        parameters (strategies by name) followed by ``STAT_COLUMNS`` and the
+        quantile columns, see ``SessionAggregator.summary``.
+    """
+    if n_sim < 1:
+        raise ValueError("n_sim must be at least 1")
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    base = {
+        "bet_strategy": bet_strategy,
+        "unit": unit,
+        "bankroll": bankroll,
+        "max_rolls": max_rolls,
+        "max_shooter": max_shooter,
+        "runout": runout,
+        "payouts": payouts,
+        "ruin_level": ruin_level,
+    }
+    cells = _cells(grid)
+    configs = [_cell_config(cell, base) for cell in cells]
+
+    root = np.random.SeedSequence(seed)
+    if common_random_numbers:
+        cell_seeds = [np.random.SeedSequence(root.entropy) for _ in cells]
+    else:
+        cell_seeds = root.spawn(len(cells))
+    tasks = (
+        (i, config, start, stop, seed_seq)
+        for i, (config, cell_seed) in enumerate(zip(configs, cell_seeds))
+        for start, stop, seed_seq in _chunks(n_sim, chunk_size, cell_seed)
+    )
+
+    results = [[] for _ in cells]
+    for i, start, chunk_aggregator in _map_tasks(_sweep_chunk, tasks, n_workers):
+        results[i].append((start, chunk_aggregator))
+
+    rows = []
+    for cell, chunk_results in zip(cells, results):
+        # merge in session order, so the sums don't depend on which chunk finished first
+        chunk_results.sort(key=lambda result: result[0])
+        aggregator = chunk_results[0][1]
+        for _, chunk_aggregator in chunk_results[1:]:
+            aggregator.merge(chunk_aggregator)
+        row = {
+            name: getattr(value, "__name__", value) if name == "bet_strategy" else value
+            for name, value in cell.items()
+        }
+        (summary,) = aggregator.summary(confidence, quantiles).values()
+        for column in STAT_COLUMNS:
+            row[column] = summary[column]
+        for q, value in summary["quantiles"].items():
+            row[_quantile_column(q)] = value
+        rows.append(row)
+    return rows
+
+
+def write_csv(rows, f_out):
+    """ write rows from ``sweep`` as CSV, with a header of the column names """
+    columns = list(rows[0]) if rows else []
+    f_out.write(",".join(columns))
+    f_out.write("\n")
+    for row in rows:
+        f_out.write(",".join(str(row[c]) for c in columns))
+        f_out.write("\n")
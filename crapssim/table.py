@@ -1,5 +1,16 @@
+import math
+import pickle
+from collections import OrderedDict
+from functools import partial
+
+from numpy.random import SeedSequence
+from time import perf_counter
+
+from crapssim.checkpoint import save_checkpoint
 from crapssim.dice import Dice
+from crapssim.events import NULL_SINK, NullSink, TextSink
 from crapssim.player import Player
+from crapssim.profiling import TableStats
 
 
 class Table(object):
@@ -11,7 +22,22 @@ class Table(object):
 
     Parameters
     ----------
-    NONE
+    dice : Dice, optional
+        Dice to roll at the table, defaults to ``Dice()``
+    debug : bool, optional (default = False)
+        If true, check total_player_cash and player_has_bets against a full
+        recount after every roll
+    sink : EventSink, optional
+        Receives the table's events during run(), see crapssim.events.
+        Defaults to a NullSink, which costs nothing.
+    instrument : bool, optional (default = False)
+        If true, time the phases of run() and count bets in ``stats``
+    decision_cache_size : int, optional (default = 0)
+        Number of decisions of memoryless strategies (see
+        ``crapssim.strategy.memoryless``) to keep for replay, 0 to always call
+        the strategies.  Replaying is faster for strategies that place few
+        bets, such as passline or layodds, but slower for ones that keep many
+        bets on the table, such as pass2come, so it is off by default.
 
     Attributes
     ----------
@@ -32,21 +58,113 @@ class Table(object):
     bet_update_info : dictionary
         Contains information from updating bets, for given player and a bet
         name, this is status of last bet (win/loss), and win amount.
+    stats : TableStats
+        Phase timings and bet counters when the table is instrumented, see
+        crapssim.profiling.  None otherwise.
+
+    total_player_cash and player_has_bets are read-only.  They are recounted
+    from the players when run() starts, as before, and kept up to date during
+    the run by the players' bet, remove and _update_bet methods, so changing
+    a player's bankroll directly between runs is fine but not during one.
+
+    Tables pickle without their sink and decision cache, see
+    crapssim.checkpoint.  snapshot() and branch() use this to continue a
+    session from one state in many ways.
     """
 
-    def __init__(self):
+    def __init__(self, dice=None, debug=False, sink=None, instrument=False, decision_cache_size=0):
         self.players = []
-        self.player_has_bets = False
+        self._total_player_cash = 0
+        self._n_bets = 0
+        self.debug = debug
+        self.sink = NULL_SINK if sink is None else sink
+        self._sink = None
+        self.stats = TableStats() if instrument else None
+        self.decision_cache_size = decision_cache_size
+        self._decision_cache = OrderedDict()
         # TODO: I think strat_info should be attached to each player object
         self.strat_info = {}
         self.point = _Point()
-        self.dice = Dice()
+        self.dice = Dice() if dice is None else dice
         self.bet_update_info = None
         self.payouts = {"fielddouble": [2, 12], "fieldtriple": []}
         self.pass_rolls = 0
         self.last_roll = None
         self.n_shooters = 1
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # sinks may hold open files
+        state["sink"] = None
+        state["_sink"] = None
+        # the cache only saves time and is refilled as the table runs
+        state["_decision_cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sink = NULL_SINK
+        self._decision_cache = OrderedDict()
+
+    def snapshot(self):
+        """
+        Serialize the table between runs: players, bets, strat_info, point,
+        shooter count and dice, including the state of their generator.
+
+        Returns
+        -------
+        bytes
+            Pass to ``from_snapshot`` to get a copy of the table
+        """
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, seed=None):
+        """
+        Table from ``snapshot()``, its dice reseeded with ``seed`` if given,
+        see ``Dice.reseed``.
+
+        Without ``seed``, the table rolls the same dice the snapshotted table
+        would only if those were seeded, e.g. ``Dice(seed=0)``.  The default
+        ``Dice()`` has no generator of its own and draws from numpy's global
+        random state, which the snapshot doesn't hold.
+        """
+        table = pickle.loads(snapshot)
+        if seed is not None:
+            table.dice.reseed(seed)
+        return table
+
+    def branch(self, n_branches, seed=None):
+        """
+        Continuations of the table from its current state, with independent dice.
+
+        The table is serialized once and each branch is loaded from the same
+        snapshot, its dice reseeded with a child of a
+        ``numpy.random.SeedSequence``, so a long prefix such as a burn-in is
+        simulated once and shared by all branches.
+
+        Each branch still gets a full copy of the table's state, as its
+        players, bets and point change independently once it runs.  The
+        state is small (a few kB after a burn-in) and loading it from the one
+        snapshot is much cheaper than ``copy.deepcopy`` of the table per branch.
+
+        Parameters
+        ----------
+        n_branches : int
+            Number of branches
+        seed : None, int or SeedSequence, optional
+            Seed the branches' dice are spawned from
+
+        Returns
+        -------
+        list
+            ``n_branches`` tables, each running on its own
+        """
+        snapshot = self.snapshot()
+        if not isinstance(seed, SeedSequence):
+            seed = SeedSequence(seed)
+        return [self.from_snapshot(snapshot, child) for child in seed.spawn(n_branches)]
+
     @classmethod
     def with_payouts(cls, **kwagrs):
         table = cls()
@@ -56,14 +174,54 @@ class Table(object):
 
     def set_payouts(self, name, value):
         self.payouts[name] = value
+        self._decision_cache.clear()
+
+    @property
+    def total_player_cash(self):
+        return self._total_player_cash
+
+    @property
+    def player_has_bets(self):
+        return self._n_bets > 0
 
     def add_player(self, player_object):
         """ Add player object to the table """
         if player_object not in self.players:
             self.players.append(player_object)
             self.strat_info[player_object] = None
-
-    def run(self, max_rolls, max_shooter=float("inf"), verbose=True, runout=False):
+            player_object._table = self
+            player_object._sink = self._sink
+            player_object._stats = self.stats
+            self._total_player_cash += player_object.bankroll + player_object.total_bet_amount
+            self._n_bets += len(player_object.bets_on_table)
+
+    def _recount(self):
+        """ total cash and number of bets of the players, counted from scratch """
+        total_player_cash = sum(
+            [p.total_bet_amount + p.bankroll for p in self.players]
+        )
+        n_bets = sum([len(p.bets_on_table) for p in self.players])
+        return total_player_cash, n_bets
+
+    def check_totals(self):
+        """ verify the incremental totals against a full recount of the players """
+        total_player_cash, n_bets = self._recount()
+        if not math.isclose(total_player_cash, self._total_player_cash, abs_tol=1e-9):
+            raise AssertionError(
+                f"total_player_cash is {self._total_player_cash}, recount gives {total_player_cash}"
+            )
+        if n_bets != self._n_bets:
+            raise AssertionError(f"Table counts {self._n_bets} bets, recount gives {n_bets}")
+
+    def run(
+        self,
+        max_rolls,
+        max_shooter=float("inf"),
+        verbose=True,
+        runout=False,
+        checkpoint=None,
+        checkpoint_every=10000,
+    ):
         """
         Runs the craps table until a stopping condition is met.
 
@@ -72,92 +230,178 @@ class Table(object):
         max_rolls : int
             Maximum number of rolls to run for
         verbose : bool
-            If true, print results from table during each roll
+            If true, print results from table during each roll, to stdout
+            unless the table has its own sink
         runout : bool
             If true, continue past max_rolls until player has no more bets on the table
+        checkpoint : string or function, optional
+            File to save the table to every ``checkpoint_every`` rolls, or a
+            function called with the table instead.  Running the table loaded
+            with ``crapssim.checkpoint.load_checkpoint`` with the same
+            arguments finishes the session as this run would have.
+        checkpoint_every : int, optional (default = 10000)
+            Number of rolls between checkpoints
         """
+        if isinstance(checkpoint, str):
+            checkpoint = partial(save_checkpoint, path=checkpoint)
+
         # self.dice = Dice()
-        if verbose:
-            print("Welcome to the Craps Table!")
+        sink = self.sink
+        if verbose and isinstance(sink, NullSink):
+            # strategies may print to stdout too, so write lines in order as they come
+            sink = TextSink(buffer_lines=1)
+        self._sink = None if isinstance(sink, NullSink) else sink
 
         # make sure at least one player is at table
         if not self.players:
             self.add_player(Player(500, "Player1"))
-        if verbose:
-            print(f"Initial players: {[p.name for p in self.players]}")
-
-        # maybe wrap this into update table or something
-        self.total_player_cash = sum(
-            [p.total_bet_amount + p.bankroll for p in self.players]
-        )
+        # players may have changed since they were added
+        self._total_player_cash, self._n_bets = self._recount()
+        stats = self.stats
+        for p in self.players:
+            p._sink = self._sink
+            p._stats = stats
+        if self._sink is not None:
+            self._sink.session_start(self)
 
         continue_rolling = True
         while continue_rolling:
 
-            # players make their bets
-            self._add_player_bets()
-            for p in self.players:
-                bets = [
-                    f"{b.name}{b.subname}, ${b.bet_amount}" for b in p.bets_on_table
-                ]
-                if verbose:
-                    print(f"{p.name}'s current bets: {bets}")
-
-            self.dice.roll()
-            self._update_player_bets(self.dice, verbose)
-            self._update_table(self.dice)
-            if verbose:
-                print("")
-                print("Dice out!")
-                print(f"Shooter rolled {self.dice.total} {self.dice.result}")
-                print(f"Point is {self.point.status} ({self.point.number})")
-                print(f"Total Player Cash is ${self.total_player_cash}")
-
-            # evaluate the stopping condition
-            if runout:
-                continue_rolling = (
-                    self.dice.n_rolls < max_rolls
-                    and self.n_shooters <= max_shooter
-                    and self.total_player_cash > 0
-                ) or self.player_has_bets
-            else:
-                continue_rolling = (
-                    self.dice.n_rolls < max_rolls
-                    and self.n_shooters <= max_shooter
-                    and self.total_player_cash > 0
-                )
+            if stats is None:
+                # players make their bets
+                self._add_player_bets()
 
-    def _add_player_bets(self):
+                self.dice.roll()
+                if self._sink is not None:
+                    self._sink.roll(self)
+                self._update_player_bets(self.dice)
+                self._update_table(self.dice)
+            else:
+                self._timed_roll(stats)
+            if self.debug:
+                self.check_totals()
+            if self._sink is not None:
+                self._sink.roll_end(self)
+
+            continue_rolling = self._continue_rolling(max_rolls, max_shooter, runout)
+            if (
+                checkpoint is not None
+                and continue_rolling
+                and self.dice.n_rolls % checkpoint_every == 0
+            ):
+                checkpoint(self)
+
+        if self._sink is not None:
+            self._sink.session_end(self)
+
+    def _continue_rolling(self, max_rolls, max_shooter, runout):
+        """ evaluate the stopping condition of run() """
+        continue_rolling = (
+            self.dice.n_rolls < max_rolls
+            and self.n_shooters <= max_shooter
+            and self.total_player_cash > 0
+        )
+        if runout:
+            return continue_rolling or self.player_has_bets
+        return continue_rolling
+
+    def _timed_roll(self, stats):
+        """ one roll of run(), timing each phase into ``stats`` """
+        start = perf_counter()
+        self._add_player_bets(stats)
+        roll_start = perf_counter()
+        stats._add_time("add_bets", roll_start - start)
+
+        self.dice.roll()
+        stats._add_time("roll", perf_counter() - roll_start)
+        if self._sink is not None:
+            self._sink.roll(self)
+
+        start = perf_counter()
+        self._update_player_bets(self.dice, stats)
+        table_start = perf_counter()
+        stats._add_time("update_bets", table_start - start)
+
+        self._update_table(self.dice)
+        stats._add_time("update_table", perf_counter() - table_start)
+
+    def _add_player_bets(self, stats=None):
         """ Implement each player's betting strategy """
         """ TODO: restrict bets that shouldn't be possible based on table"""
-        """ TODO: Make the unit parameter specific to each player, and make it more general """
         for p in self.players:
-            self.strat_info[p] = p._add_strategy_bets(
-                self, unit=5, strat_info=self.strat_info[p]
-            )  # unit = 10 to change unit
-            # TODO: add player.strat_kwargs as optional parameter (currently manually changed in CrapsTable)
+            if stats is not None:
+                start = perf_counter()
+            if self.decision_cache_size and getattr(p.bet_strategy, "memoryless", False):
+                self._add_memoryless_bets(p, unit=p.unit)
+            else:
+                self.strat_info[p] = p._add_strategy_bets(
+                    self, unit=p.unit, strat_info=self.strat_info[p], **p.strat_kwargs
+                )
+            if stats is not None:
+                stats._add_player_time("add_bets", p, perf_counter() - start)
 
-    def _update_player_bets(self, dice, verbose=False):
+    def _add_memoryless_bets(self, player, unit):
+        """
+        Replay the decision a memoryless strategy made before in the same state,
+        or run it and remember its decision
+        """
+        key = (
+            player.bet_strategy,
+            unit,
+            tuple(sorted(player.strat_kwargs.items())) if player.strat_kwargs else (),
+            self.point.number,
+            tuple(sorted([(b.name, b.subname, b.bet_amount) for b in player.bets_on_table])),
+        )
+        cache = self._decision_cache
+        try:
+            recording = cache.get(key)
+        except TypeError:
+            # strat_kwargs that can't be hashed, run the strategy every time
+            self.strat_info[player] = player._add_strategy_bets(
+                self, unit=unit, strat_info=None, **player.strat_kwargs
+            )
+            return
+        if recording is not None:
+            cache.move_to_end(key)
+            player._replay_strategy_bets(recording)
+            return
+
+        strat_info, recording = player._record_strategy_bets(
+            self, unit=unit, strat_info=None, **player.strat_kwargs
+        )
+        if strat_info is None and all(action != "rejected" for action, _ in recording):
+            cache[key] = recording
+            if len(cache) > self.decision_cache_size:
+                cache.popitem(last=False)
+
+    def _update_player_bets(self, dice, stats=None):
         """ check bets for wins/losses, payout wins to their bankroll, remove bets that have resolved """
         self.bet_update_info = {}
         for p in self.players:
-            info = p._update_bet(self, dice, verbose)
+            if stats is not None:
+                start = perf_counter()
+            info = p._update_bet(self, dice)
             self.bet_update_info[p] = info
+            if stats is not None:
+                stats._add_player_time("update_bets", p, perf_counter() - start)
 
     def _update_table(self, dice):
         """ update table attributes based on previous dice roll """
         self.pass_rolls += 1
-        if self.point == "On" and dice.total == 7:
+        old_number = self.point.number
+        new_shooter = self.point == "On" and dice.total == 7
+        if new_shooter:
             self.n_shooters += 1
         if self.point == "On" and (dice.total == 7 or dice.total == self.point.number):
             self.pass_rolls = 0
 
         self.point.update(self.dice)
-        self.total_player_cash = sum(
-            [p.total_bet_amount + p.bankroll for p in self.players]
-        )
-        self.player_has_bets = sum([len(p.bets_on_table) for p in self.players]) >= 1
         self.last_roll = dice.total
+        if self._sink is not None:
+            if self.point.number != old_number:
+                self._sink.point_change(self, old_number, self.point.number)
+            if new_shooter:
+                self._sink.shooter_change(self)
 
     def _get_player(self, player_name):
         [p for p in self.players if p.name == player_name]
@@ -200,8 +444,6 @@ class _Point(object):
 
 
 if __name__ == "__main__":
-    import sys
-
     # import strategy
     from crapssim import strategy
 
@@ -235,16 +477,13 @@ if __name__ == "__main__":
         # Run one simulation with verbose=True to check strategy
         outfile_name = f"./output/printout/{strategy_name}_roll-{n_roll}_br-{bankroll}{runout_str}.txt"
         with open(outfile_name, "w") as f_out:
-            sys.stdout = f_out
-            table = Table()
+            table = Table(sink=TextSink(f_out))
             table.add_player(Player(bankroll, strategy))
             table.run(n_roll, verbose=True)
             # out = table.total_player_cash
             # f_out.write(str(out))
             # f_out.write(str('\n'))
 
-    sys.stdout = sys.__stdout__  # reset stdout
-
     # table = Table().with_payouts(fielddouble=[2], fieldtriple=[12])
     # print(table)
     # print(table.payouts)
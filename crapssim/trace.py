@@ -0,0 +1,145 @@
+import json
+
+import numpy as np
+
+from crapssim.events import EventSink
+
+"""
+Compact per-roll traces of a craps table.
+
+A ``TraceRecorder`` is an event sink that stores one record per roll in a
+structured NumPy array, see ``trace_dtype``.  Traces of long runs can spill to
+a file of raw records, which ``load_trace`` opens as a memory-mapped array, so
+any slice of millions of rolls can be read back without simulating again.
+"""
+
+
+def trace_dtype(n_players):
+    """
+    Record layout of a trace for a table of ``n_players`` players.
+
+    Fields are ``roll`` (number of the roll), ``die1`` and ``die2`` (faces),
+    ``total``, ``point_on``, ``point_number`` (0 when the point is "Off") and
+    ``shooter`` after the roll is settled, then ``bankroll`` and ``at_risk``
+    (amount of bets on the table) for each player.
+    """
+    return np.dtype(
+        [
+            ("roll", "u4"),
+            ("die1", "u1"),
+            ("die2", "u1"),
+            ("total", "u1"),
+            ("point_on", "?"),
+            ("point_number", "u1"),
+            ("shooter", "u4"),
+            ("bankroll", "f8", (n_players,)),
+            ("at_risk", "f8", (n_players,)),
+        ]
+    )
+
+
+class TraceRecorder(EventSink):
+    """
+    Sink that records every roll of a table.
+
+    Parameters
+    ----------
+    path : string, optional
+        File to spill records to.  If None, records are kept in memory.
+        Metadata is written next to it in ``path + ".json"``.
+    chunk_size : int, optional (default = 65536)
+        Number of records collected before they are spilled to ``path`` (or
+        stored as one in-memory chunk)
+
+    Attributes
+    ----------
+    player_names : list
+        Names of the players, in the order of the per-player fields
+    n_rolls : int
+        Number of rolls recorded
+    records : numpy array
+        The trace so far, memory-mapped from ``path`` if one is given
+
+    A recorder may be kept across several runs of the same table, e.g. a
+    burn-in and a session, and records them one after the other.
+    """
+
+    def __init__(self, path=None, chunk_size=65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.player_names = None
+        self.dtype = None
+        self.n_rolls = 0
+        self._chunks = []
+        self._buffer = None
+        self._n_buffered = 0
+        if path is not None:
+            open(path, "wb").close()
+
+    def session_start(self, table):
+        names = [p.name for p in table.players]
+        if self.player_names is None:
+            self.player_names = names
+            self.dtype = trace_dtype(len(names))
+            self._buffer = np.zeros(self.chunk_size, dtype=self.dtype)
+        elif names != self.player_names:
+            raise ValueError("Players changed between runs of a traced table")
+
+    def roll_end(self, table):
+        players = table.players
+        self._buffer[self._n_buffered] = (
+            table.dice.n_rolls,
+            table.dice.result[0],
+            table.dice.result[1],
+            table.dice.total,
+            table.point.status == "On",
+            table.point.number or 0,
+            table.n_shooters,
+            [p.bankroll for p in players],
+            [p.total_bet_amount for p in players],
+        )
+        self._n_buffered += 1
+        if self._n_buffered == self.chunk_size:
+            self.flush()
+
+    def session_end(self, table):
+        self.flush()
+
+    def flush(self):
+        """ move the collected records to the file or the in-memory chunks """
+        n = self._n_buffered
+        if n == 0:
+            return
+        if self.path is None:
+            self._chunks.append(self._buffer[:n].copy())
+        else:
+            with open(self.path, "ab") as f:
+                f.write(self._buffer[:n].tobytes())
+        self.n_rolls += n
+        self._n_buffered = 0
+        if self.path is not None:
+            with open(self.path + ".json", "w") as f:
+                json.dump({"players": self.player_names, "n_rolls": self.n_rolls}, f)
+
+    @property
+    def records(self):
+        self.flush()
+        if self.dtype is None:
+            return np.zeros(0, dtype=trace_dtype(0))
+        if self.path is not None:
+            return load_trace(self.path)
+        if not self._chunks:
+            return np.zeros(0, dtype=self.dtype)
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0]
+
+
+def load_trace(path):
+    """ open a trace spilled by ``TraceRecorder`` as a read-only memory-mapped array """
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    dtype = trace_dtype(len(meta["players"]))
+    if meta["n_rolls"] == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(meta["n_rolls"],))
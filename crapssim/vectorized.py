@@ -0,0 +1,427 @@
+import numpy as np
+
+from crapssim import strategy
+
+"""
+Lockstep simulation of many independent craps tables with NumPy.
+
+Each table seats one player using one of the built-in strategies.  The point,
+bankroll and the amount on every bet type are stored as arrays across tables
+and every roll is settled with a handful of vectorized operations.  The
+betting and settlement rules mirror ``crapssim.strategy`` and
+``crapssim.bet`` exactly, so for the same dice the results match what
+``Table.run`` produces.
+"""
+
+BET_NAMES = (
+    "PassLine",
+    "Odds",
+    "DontPass",
+    "LayOdds",
+    "Place4",
+    "Place5",
+    "Place6",
+    "Place8",
+    "Place9",
+    "Place10",
+    "Field",
+)
+
+# totals of the 36 equally likely outcomes of two dice
+_TOTALS = np.add.outer(np.arange(1, 7), np.arange(1, 7)).ravel()
+
+# lookup tables indexed by the point number (0 when the point is "Off")
+_POINT_NUMBERS = np.zeros(13, dtype=bool)
+_POINT_NUMBERS[[4, 5, 6, 8, 9, 10]] = True
+
+_ODDS_RATIO = np.zeros(13)
+_ODDS_RATIO[[4, 10]] = 2 / 1
+_ODDS_RATIO[[5, 9]] = 3 / 2
+_ODDS_RATIO[[6, 8]] = 6 / 5
+
+_LAY_RATIO = np.zeros(13)
+_LAY_RATIO[[4, 10]] = 1 / 2
+_LAY_RATIO[[5, 9]] = 2 / 3
+_LAY_RATIO[[6, 8]] = 5 / 6
+
+_ODDS_345_MULT = np.zeros(13)
+_ODDS_345_MULT[[4, 10]] = 3
+_ODDS_345_MULT[[5, 9]] = 4
+_ODDS_345_MULT[[6, 8]] = 5
+
+_LAY_MULT = np.zeros(13)
+_LAY_MULT[[4, 10]] = 2
+_LAY_MULT[[5, 9]] = 3 / 2
+_LAY_MULT[[6, 8]] = 6 / 5
+
+_PLACE_RATIO = {4: 9 / 5, 5: 7 / 5, 6: 7 / 6, 8: 7 / 6, 9: 7 / 5, 10: 9 / 5}
+
+
+class VectorState(object):
+    """
+    State of many craps tables advanced in lockstep, one player per table.
+
+    Parameters
+    ----------
+    n : int
+        Number of tables
+    bankroll : float or array, shape = [n]
+        Starting bankroll of the player at each table
+    unit : float or array, shape = [n], optional (default = 5)
+        Betting unit of the player at each table
+    payouts : dictionary, optional
+        Table payouts, as in ``Table.payouts``
+
+    Attributes
+    ----------
+    ids : array, shape = [n]
+        Index of each table in the original batch
+    point : array, shape = [n]
+        The point number for each table, 0 when the point is "Off"
+    bankroll : array, shape = [n]
+        Cash of each player that is not on the table
+    bets : dictionary
+        Maps each name in ``BET_NAMES`` to an array with the amount each player
+        has on that bet, 0 when the bet is not on the table
+    n_rolls : array, shape = [n]
+        Number of rolls at each table
+    n_shooters : array, shape = [n]
+        Current shooter number at each table
+    last_total : array, shape = [n]
+        Total of the last roll at each table, 0 before the first roll
+    field_ratio : array, shape = [13]
+        Field payout ratio indexed by dice total, 0 for losing totals
+    strategy_state : dictionary
+        Arrays a strategy keeps between rolls, e.g. the mode of a compiled
+        ``crapssim.spec`` strategy
+    """
+
+    def __init__(self, n, bankroll, unit=5, payouts=None):
+        if payouts is None:
+            payouts = {"fielddouble": [2, 12], "fieldtriple": []}
+        self.ids = np.arange(n)
+        self.point = np.zeros(n, dtype=np.int64)
+        self.bankroll = np.array(np.broadcast_to(bankroll, (n,)), dtype=float)
+        self.unit = np.array(np.broadcast_to(unit, (n,)), dtype=float)
+        if np.any(self.unit <= 0):
+            raise ValueError("unit must be positive")
+        self.bets = {name: np.zeros(n) for name in BET_NAMES}
+        self.n_rolls = np.zeros(n, dtype=np.int64)
+        self.n_shooters = np.ones(n, dtype=np.int64)
+        self.last_total = np.zeros(n, dtype=np.int64)
+        self.strategy_state = {}
+
+        self.field_ratio = np.zeros(13)
+        self.field_ratio[[2, 3, 4, 9, 10, 11, 12]] = 1
+        self.field_ratio[payouts["fielddouble"]] = 2
+        self.field_ratio[payouts["fieldtriple"]] = 3
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def total_bet_amount(self):
+        return sum(self.bets.values())
+
+    @property
+    def has_bets(self):
+        return np.logical_or.reduce([b > 0 for b in self.bets.values()])
+
+    def compress(self, keep):
+        """ drop the tables where ``keep`` is False """
+        self.ids = self.ids[keep]
+        self.point = self.point[keep]
+        self.bankroll = self.bankroll[keep]
+        self.unit = self.unit[keep]
+        self.n_rolls = self.n_rolls[keep]
+        self.n_shooters = self.n_shooters[keep]
+        self.last_total = self.last_total[keep]
+        for name in self.strategy_state:
+            self.strategy_state[name] = self.strategy_state[name][keep]
+        for name in self.bets:
+            self.bets[name] = self.bets[name][keep]
+
+
+"""
+Placing and removing bets
+"""
+
+
+def _bet(state, mask, name, amount):
+    """ place bet ``name`` where ``mask`` is True and the player can cover it """
+    amount = np.broadcast_to(amount, state.bankroll.shape)
+    ok = mask & (state.bankroll >= amount)
+    state.bankroll[ok] -= amount[ok]
+    state.bets[name][ok] = amount[ok]
+
+
+def _remove(state, mask, name):
+    """ take bet ``name`` down where ``mask`` is True, returning it to the bankroll """
+    amount = state.bets[name]
+    ok = mask & (amount > 0)
+    state.bankroll[ok] += amount[ok]
+    amount[ok] = 0
+
+
+"""
+Vectorized versions of the strategies in crapssim.strategy
+"""
+
+
+def _passline(state):
+    _bet(state, (state.point == 0) & (state.bets["PassLine"] == 0), "PassLine", state.unit)
+
+
+def _passline_odds(state, mult=1):
+    _passline(state)
+    if mult == "345":
+        mult = _ODDS_345_MULT[state.point]
+    else:
+        mult = float(mult)
+
+    mask = (state.point > 0) & (state.bets["PassLine"] > 0) & (state.bets["Odds"] == 0)
+    _bet(state, mask, "Odds", mult * state.unit)
+
+
+def _passline_odds2(state):
+    _passline_odds(state, mult=2)
+
+
+def _passline_odds345(state):
+    _passline_odds(state, mult="345")
+
+
+def _place68(state):
+    _passline(state)
+    has_place_bets = np.logical_or.reduce(
+        [state.bets[f"Place{n}"] > 0 for n in _PLACE_RATIO]
+    )
+    mask = (state.point > 0) & ~has_place_bets
+    amount = 6 / 5 * state.unit
+    _bet(state, mask & (state.point != 8), "Place8", amount)
+    _bet(state, mask & (state.point != 6), "Place6", amount)
+
+
+def _dontpass(state):
+    _bet(state, (state.point == 0) & (state.bets["DontPass"] == 0), "DontPass", state.unit)
+
+
+def _layodds(state, win_mult=1):
+    _dontpass(state)
+    if win_mult == "345":
+        mult = 6.0
+    else:
+        mult = _LAY_MULT[state.point] * float(win_mult)
+
+    mask = (state.point > 0) & (state.bets["DontPass"] > 0) & (state.bets["LayOdds"] == 0)
+    _bet(state, mask, "LayOdds", mult * state.unit)
+
+
+def _place(state, unit, numbers, skip_point=True):
+    on = state.point > 0
+    for n in [4, 5, 6, 8, 9, 10]:
+        if n not in numbers:
+            continue
+        name = f"Place{n}"
+        mask = on & (state.bets[name] == 0)
+        if skip_point:
+            mask &= state.point != n
+        amount = 6 / 5 * unit if n in [6, 8] else unit
+        _bet(state, mask, name, amount)
+
+    if skip_point:
+        for n in [4, 5, 6, 8, 9, 10]:
+            _remove(state, on & (state.point == n), f"Place{n}")
+
+
+def _ironcross(state):
+    _passline(state)
+    _passline_odds(state, mult=2)
+    _place(state, 2 * state.unit, {5, 6, 8})
+    _bet(state, (state.point > 0) & (state.bets["Field"] == 0), "Field", state.unit)
+
+
+def _knockout(state):
+    _passline_odds345(state)
+    _dontpass(state)
+
+
+VECTOR_STRATEGIES = {
+    strategy.passline: _passline,
+    strategy.passline_odds: _passline_odds,
+    strategy.passline_odds2: _passline_odds2,
+    strategy.passline_odds345: _passline_odds345,
+    strategy.dontpass: _dontpass,
+    strategy.layodds: _layodds,
+    strategy.place68: _place68,
+    strategy.ironcross: _ironcross,
+    strategy.knockout: _knockout,
+}
+
+
+"""
+Settling bets and updating the tables
+"""
+
+
+def _resolve(state, name, win, lose, ratio, push=None):
+    amount = state.bets[name]
+    win = win & (amount > 0)
+    state.bankroll[win] += (ratio * amount + amount)[win]
+    resolved = win | lose
+    if push is not None:
+        push = push & (amount > 0)
+        state.bankroll[push] += amount[push]
+        resolved |= push
+    amount[resolved] = 0
+
+
+def _settle(state, total):
+    """ check every bet for wins/losses and pay out wins to the bankroll """
+    point = state.point
+    on = point > 0
+    off = ~on
+    seven = total == 7
+    hit = on & (total == point)
+
+    _resolve(
+        state,
+        "PassLine",
+        win=(off & ((total == 7) | (total == 11))) | hit,
+        lose=(off & ((total == 2) | (total == 3) | (total == 12))) | (on & seven),
+        ratio=1.0,
+    )
+    _resolve(state, "Odds", win=hit, lose=on & seven, ratio=_ODDS_RATIO[point])
+    _resolve(
+        state,
+        "DontPass",
+        win=(off & ((total == 2) | (total == 3))) | (on & seven),
+        lose=(off & ((total == 7) | (total == 11))) | hit,
+        ratio=1.0,
+        push=off & (total == 12),
+    )
+    _resolve(state, "LayOdds", win=on & seven, lose=hit, ratio=_LAY_RATIO[point])
+    for n, ratio in _PLACE_RATIO.items():
+        _resolve(state, f"Place{n}", win=on & (total == n), lose=on & seven, ratio=ratio)
+
+    field_ratio = state.field_ratio[total]
+    _resolve(state, "Field", win=field_ratio > 0, lose=field_ratio == 0, ratio=field_ratio)
+
+
+def _update_table(state, total):
+    """ update the point and shooter of each table based on the roll """
+    on = state.point > 0
+    state.n_rolls += 1
+    state.n_shooters += on & (total == 7)
+    new_point = ~on & _POINT_NUMBERS[total]
+    point_off = on & ((total == 7) | (total == state.point))
+    state.point[new_point] = total[new_point]
+    state.point[point_off] = 0
+    state.last_total = total
+
+
+def run_vectorized(
+    bet_strategy,
+    bankroll,
+    n_sim,
+    max_rolls,
+    max_shooter=float("inf"),
+    runout=False,
+    unit=5,
+    payouts=None,
+    seed=None,
+    rolls=None,
+    **strat_kwargs,
+):
+    """
+    Simulate ``n_sim`` independent sessions of one strategy in lockstep.
+
+    Stopping conditions follow ``Table.run``: a table keeps rolling while it is
+    below ``max_rolls``, within ``max_shooter`` and the player has cash, or,
+    with ``runout``, while the player still has bets on the table.
+
+    Parameters
+    ----------
+    bet_strategy : function
+        One of the strategies in ``VECTOR_STRATEGIES``, or a strategy compiled
+        from a ``crapssim.spec.StrategySpec``
+    bankroll : float or array, shape = [n_sim]
+        Starting bankroll for each session
+    n_sim : int
+        Number of sessions to simulate
+    max_rolls : int
+        Maximum number of rolls to run for
+    max_shooter : int, optional
+        Maximum number of shooters to run for
+    runout : bool, optional (default = False)
+        If true, continue past max_rolls until player has no more bets on the table
+    unit : float or array, shape = [n_sim], optional (default = 5)
+        Betting unit for each session
+    payouts : dictionary, optional
+        Table payouts, as in ``Table.payouts``
+    seed : None, int, SeedSequence or Generator, optional
+        Seed for the dice
+    rolls : array, shape = [n_sim, n_rolls], optional
+        Dice totals to use instead of random rolls; session ``i`` uses
+        ``rolls[i, k]`` for its ``k``-th roll.
+    **strat_kwargs
+        Extra keyword arguments of the strategy, e.g. ``mult`` for ``passline_odds``
+
+    Returns
+    -------
+    dictionary
+        Arrays of length ``n_sim`` with the final ``total_cash`` (bankroll plus
+        bets on the table), ``bankroll``, ``n_rolls`` and ``n_shooters`` of
+        each session.
+    """
+    if bet_strategy in VECTOR_STRATEGIES:
+        vector_strategy = VECTOR_STRATEGIES[bet_strategy]
+    elif hasattr(bet_strategy, "vector_strategy"):
+        vector_strategy = bet_strategy.vector_strategy
+    else:
+        raise ValueError(f"No vectorized version of strategy {bet_strategy!r}")
+    rng = np.random.default_rng(seed)
+    if rolls is not None:
+        rolls = np.asarray(rolls)
+
+    state = VectorState(n_sim, bankroll, unit, payouts)
+    results = {
+        "total_cash": np.zeros(n_sim),
+        "bankroll": np.zeros(n_sim),
+        "n_rolls": np.zeros(n_sim, dtype=np.int64),
+        "n_shooters": np.zeros(n_sim, dtype=np.int64),
+    }
+
+    while len(state) > 0:
+        vector_strategy(state, **strat_kwargs)
+
+        if rolls is None:
+            total = _TOTALS[rng.integers(0, 36, size=len(state))]
+        else:
+            if np.any(state.n_rolls >= rolls.shape[1]):
+                raise ValueError("Sessions ran past the end of the provided rolls")
+            total = rolls[state.ids, state.n_rolls]
+
+        _settle(state, total)
+        _update_table(state, total)
+
+        # evaluate the stopping condition
+        total_cash = state.bankroll + state.total_bet_amount
+        continue_rolling = (
+            (state.n_rolls < max_rolls)
+            & (state.n_shooters <= max_shooter)
+            & (total_cash > 0)
+        )
+        if runout:
+            continue_rolling |= state.has_bets
+
+        if not continue_rolling.all():
+            done = ~continue_rolling
+            ids = state.ids[done]
+            results["total_cash"][ids] = total_cash[done]
+            results["bankroll"][ids] = state.bankroll[done]
+            results["n_rolls"][ids] = state.n_rolls[done]
+            results["n_shooters"][ids] = state.n_shooters[done]
+            state.compress(continue_rolling)
+
+    return results
@@ -0,0 +1,118 @@
+import pytest
+import crapssim as craps
+from crapssim.analytic import (
+    TOTAL_PROBS,
+    _dice,
+    evaluate_bet,
+    evaluate_strategy,
+    session_distribution,
+)
+from crapssim.bet import PassLine, DontPass, Field, Place4, Place6, Odds
+from crapssim.dice import Dice
+
+
+@pytest.mark.parametrize(
+    "bet, house_edge",
+    [
+        (PassLine(5), 7 / 495),
+        (DontPass(5), 3 / 220),
+        (Field(5), 1 / 18),
+        (Place6(6), 1 / 66),
+        (Place4(5), 1 / 15),
+    ],
+)
+def test_bet_house_edge(bet, house_edge):
+    assert evaluate_bet(bet)["house_edge"] == pytest.approx(house_edge)
+
+
+def test_passline_resolution():
+    result = evaluate_bet(PassLine(5))
+    assert result["expected_rolls"] == pytest.approx(557 / 165)
+    assert result["p_win"] == pytest.approx(244 / 495)
+    assert result["p_win"] + result["p_lose"] == pytest.approx(1)
+    come_out = result["roll_probabilities"][(None, (7, 11), (2, 3, 12))]
+    assert come_out["win"] == pytest.approx(8 / 36)
+    assert come_out["lose"] == pytest.approx(4 / 36)
+
+
+def test_odds_have_no_edge():
+    passline = PassLine(5)
+    dice = Dice()
+    dice.fixed_roll([2, 2])
+    passline._update_bet(None, dice)
+    result = evaluate_bet(Odds(10, passline), point=4)
+    assert result["ev"] == pytest.approx(0)
+    assert result["p_win"] == pytest.approx(1 / 3)
+    assert result["expected_rolls"] == pytest.approx(4)
+
+
+def test_passline_strategy():
+    result = evaluate_strategy(craps.strategy.passline)
+    assert result["house_edge"] == pytest.approx(7 / 495)
+    assert result["rolls_per_resolution"] == pytest.approx(557 / 165)
+    assert result["ev_per_roll"] == pytest.approx(-5 * 7 / 495 / (557 / 165))
+    assert sum(result["point_distribution"].values()) == pytest.approx(1)
+
+
+def test_place68_strategy_edge_between_its_bets():
+    result = evaluate_strategy(craps.strategy.place68)
+    assert 7 / 495 < result["house_edge"] < 1 / 66
+
+
+def test_strategy_with_memory_is_rejected():
+    with pytest.raises(ValueError):
+        evaluate_strategy(craps.strategy.hammerlock)
+
+
+def _enumerate_sessions(bet_strategy, bankroll, max_rolls, **strat_kwargs):
+    """ distribution of the final cash, playing a Table through every sequence of totals """
+    distribution = {}
+
+    def visit(totals, prob):
+        table = craps.Table()
+        table.add_player(craps.Player(bankroll, bet_strategy, strat_kwargs=strat_kwargs))
+        for total in totals:
+            table._add_player_bets()
+            table.dice = _dice(total)
+            table._update_player_bets(table.dice)
+            table._update_table(table.dice)
+        if totals and (len(totals) == max_rolls or table.total_player_cash <= 0):
+            cash = round(table.total_player_cash, 9)
+            distribution[cash] = distribution.get(cash, 0) + prob
+            return
+        for total, p in TOTAL_PROBS.items():
+            visit(totals + [total], prob * p)
+
+    visit([], 1.0)
+    return distribution
+
+
+def test_session_distribution_one_roll():
+    result = session_distribution(craps.strategy.passline, 100, 1)
+    assert result["distribution"] == pytest.approx({95: 4 / 36, 100: 24 / 36, 105: 8 / 36})
+    assert result["mean_rolls"] == 1
+    assert result["p_bust"] == pytest.approx(4 / 36)
+
+
+@pytest.mark.parametrize(
+    "bet_strategy, bankroll, strat_kwargs",
+    [
+        (craps.strategy.passline_odds, 100, {"mult": 2}),
+        # too little cash for some bets, which are rejected
+        (craps.strategy.place68, 20, {}),
+        (craps.strategy.layodds, 12, {"win_mult": "345"}),
+    ],
+)
+def test_session_distribution_matches_table(bet_strategy, bankroll, strat_kwargs):
+    result = session_distribution(bet_strategy, bankroll, 3, **strat_kwargs)
+    expected = _enumerate_sessions(bet_strategy, bankroll, 3, **strat_kwargs)
+    assert result["distribution"] == pytest.approx(expected)
+    assert sum(result["distribution"].values()) == pytest.approx(1)
+
+
+def test_session_distribution_runout():
+    result = session_distribution(craps.strategy.passline, 100, 5, runout=True)
+    assert result["truncated"] < 1e-12
+    # every session ends with the pass line resolved
+    assert set(result["distribution"]) <= {100 + 5 * k for k in range(-6, 7)}
+    assert result["mean_rolls"] > 5
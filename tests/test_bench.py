@@ -0,0 +1,55 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+_path = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "bench.py")
+_spec = importlib.util.spec_from_file_location("bench", _path)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+
+def test_strategies_are_found():
+    names = bench.strategies()
+    assert "passline" in names and "ironcross" in names
+    assert not any(name.startswith("_") for name in names)
+    assert not set(bench.SKIPPED) & set(names)
+
+
+@pytest.mark.parametrize("name", sorted(bench.strategies()))
+def test_every_strategy_runs_a_session(name):
+    result = bench.run_case(bench.strategies()[name], 2, verbose=False, runout=True,
+                            session_rolls=20, min_time=0, repeat=1)
+    assert result["rolls"] > 0
+
+
+def test_run_and_compare(tmp_path, capsys):
+    out = str(tmp_path / "bench.json")
+    bench.main(["run", "--out", out, "--strategies", "passline", "--players", "1",
+                "--rolls", "10", "--min-time", "0", "--repeat", "1"])
+    with open(out) as f:
+        report = json.load(f)
+    assert len(report["results"]) == 4
+    assert all(r["rolls_per_sec"] > 0 for r in report["results"])
+    assert bench.main(["compare", out, out]) == 0
+
+    slow = json.loads(json.dumps(report))
+    for r in slow["results"]:
+        r["rolls_per_sec"] /= 2
+    rows, slower, failed = bench.compare(report, slow, threshold=0.1)
+    assert len(slower) == len(rows) == 4
+    assert failed == []
+
+
+def test_compare_flags_errors_and_missing_cases():
+    case = dict(strategy="passline", players=1, verbose=False, runout=False, rolls_per_sec=100.0)
+    other = dict(case, runout=True)
+    baseline = {"results": [case, other]}
+    current = {"results": [dict(case, error="TypeError: boom")]}
+    rows, slower, failed = bench.compare(baseline, current)
+    assert rows == [] and slower == []
+    assert failed == [
+        (("passline", 1, False, False), "TypeError: boom"),
+        (("passline", 1, False, True), "missing"),
+    ]
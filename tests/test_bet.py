@@ -0,0 +1,127 @@
+import pytest
+from crapssim.bet import Bet, BetPool, Come, DontPass, Field, PassLine, Place6, Place9
+from crapssim.dice import Dice
+from crapssim.player import Player
+from crapssim.table import Table
+
+
+def _roll(total):
+    d = Dice()
+    d.fixed_roll([max(1, total - 6), min(6, total - 1)])
+    return d
+
+
+def test_bets_have_no_dict():
+    for bet in [PassLine(5), Come(5), DontPass(5), Field(5), Place6(6)]:
+        assert not hasattr(bet, "__dict__")
+
+
+class _OldStyleBet(Bet):
+    # sets its attributes before calling Bet.__init__, as the original bets did
+    def __init__(self, bet_amount):
+        self.name = "OldStyle"
+        self.winning_numbers = [4]
+        self.losing_numbers = [7]
+        self.payoutratio = 2.0
+        self.prepoint = False
+        super().__init__(bet_amount)
+
+
+def test_bets_resolve_from_their_numbers():
+    bet = _OldStyleBet(5)
+    assert bet.name == "OldStyle" and bet.subname == ""
+    assert bet._update_bet(None, _roll(4)) == ("win", 10)
+    assert bet._update_bet(None, _roll(7)) == ("lose", 0)
+    assert bet._copy().prepoint is False
+
+    bet = PassLine(5)
+    bet._update_bet(None, _roll(6))
+    bet.winning_numbers = [9]
+    bet.payoutratio = 2.0
+    assert bet._update_bet(None, _roll(6)) == (None, 0)
+    assert bet._update_bet(None, _roll(9)) == ("win", 10)
+    field = Field(5)
+    field.triple_winning_numbers = [12]
+    assert field._update_bet(None, _roll(12)) == ("win", 15)
+
+
+def test_passline_moves_to_point():
+    bet = PassLine(5)
+    assert bet._update_bet(None, _roll(6)) == (None, 0)
+    assert bet.winning_numbers == [6] and bet.losing_numbers == [7]
+    assert bet._update_bet(None, _roll(11)) == (None, 0)
+    assert bet._update_bet(None, _roll(6)) == ("win", 5)
+
+
+def test_come_gets_subname():
+    bet = Come(5)
+    bet._update_bet(None, _roll(9))
+    assert bet.subname == "9"
+
+
+def test_dontpass_pushes_on_12():
+    bet = DontPass(5)
+    assert bet._update_bet(None, _roll(12)) == ("push", 0)
+    bet._update_bet(None, _roll(4))
+    assert bet._update_bet(None, _roll(12)) == (None, 0)
+    assert bet._update_bet(None, _roll(7)) == ("win", 5)
+
+
+@pytest.mark.parametrize(
+    "total, outcome",
+    [(2, ("win", 10)), (3, ("win", 5)), (7, ("lose", 0)), (12, ("win", 15))],
+)
+def test_field_payouts(total, outcome):
+    bet = Field(5, double=[2], triple=[12])
+    assert bet._update_bet(None, _roll(total)) == outcome
+
+
+def test_place_inactive_when_point_off():
+    table = Table()
+    bet = Place6(6)
+    assert bet._update_bet(table, _roll(7)) == (None, 0)
+    table.point.update(_roll(4))
+    assert bet._update_bet(table, _roll(6)) == ("win", pytest.approx(7))
+
+
+def test_class_constants_match_instances():
+    assert list(Field.LOSING_NUMBERS) == Field(5).losing_numbers
+    assert list(PassLine.WINNING_NUMBERS) == PassLine(5).winning_numbers
+    assert list(Place9.WINNING_NUMBERS) == Place9(5).winning_numbers
+    assert list(DontPass.PUSH_NUMBERS) == DontPass(5).push_numbers
+
+
+def test_bet_pool_recycles_resolved_bets():
+    pool = BetPool()
+    player = Player(100)
+    field = pool.acquire(Field, 5)
+    player.bet(field)
+    player._update_bet(Table(), _roll(7))
+    assert player.bets_on_table == []
+
+    again = pool.acquire(Field, 10, double=[2], triple=[12])
+    assert again is field
+    assert again.bet_amount == 10
+    assert again._update_bet(None, _roll(12)) == ("win", 30)
+
+
+def test_bet_pool_recycles_removed_bets():
+    pool = BetPool()
+    player = Player(100)
+    place6 = pool.acquire(Place6, 6)
+    player.bet(place6)
+    player.remove(place6)
+    assert player.bankroll == 100
+
+    again = pool.acquire(Place6, 12)
+    assert again is place6
+    assert again.bet_amount == 12
+
+
+def test_unpooled_bets_are_not_recycled():
+    pool = BetPool()
+    player = Player(100)
+    field = Field(5)
+    player.bet(field)
+    player._update_bet(Table(), _roll(7))
+    assert pool.acquire(Field, 5) is not field
@@ -0,0 +1,85 @@
+import importlib
+import linecache
+import os
+import sys
+import time
+
+import crapssim as craps
+from crapssim.cache import ResultCache, config_key
+from crapssim.runner import run_simulations
+
+STRATEGIES = {"passline": craps.strategy.passline, "place68": craps.strategy.place68}
+
+
+def test_hits_match_fresh_run(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    fresh = run_simulations(STRATEGIES, [100, 100], 10, 30, n_workers=1, seed=4, chunk_size=5)
+    first = run_simulations(
+        STRATEGIES, [100, 100], 10, 30, n_workers=1, seed=4, chunk_size=5, cache=cache
+    )
+    assert cache.misses == 2 and cache.hits == 0
+    second = run_simulations(
+        STRATEGIES, [100, 100], 10, 30, n_workers=1, seed=4, chunk_size=5, cache=cache
+    )
+    assert cache.hits == 2
+    assert fresh == first == second
+
+
+def test_partial_hit_only_runs_missing_chunks(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    run_simulations(STRATEGIES, [100, 100], 10, 30, n_workers=1, seed=4, chunk_size=5, cache=cache)
+    rows = run_simulations(
+        STRATEGIES, [100, 100], 20, 30, n_workers=2, seed=4, chunk_size=5, cache=cache
+    )
+    assert cache.hits == 2 and cache.misses == 4
+    fresh = run_simulations(STRATEGIES, [100, 100], 20, 30, n_workers=1, seed=4, chunk_size=5)
+    assert rows == fresh
+
+
+def test_key_covers_configuration(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    kwargs = dict(n_workers=1, chunk_size=10, cache=cache)
+    run_simulations(STRATEGIES, [100, 100], 10, 30, seed=4, **kwargs)
+    run_simulations(STRATEGIES, [100, 100], 10, 30, seed=5, **kwargs)
+    run_simulations(STRATEGIES, [100, 200], 10, 30, seed=4, **kwargs)
+    run_simulations(STRATEGIES, [100, 100], 10, 30, seed=4, payouts={"fielddouble": [2]}, **kwargs)
+    run_simulations(STRATEGIES, [100, 100], 10, 30, seed=4, aggregate=True, **kwargs)
+    assert cache.misses == 5 and cache.hits == 0
+    # unseeded runs are not cached
+    run_simulations(STRATEGIES, [100, 100], 10, 30, **kwargs)
+    assert cache.misses == 5 and len(os.listdir(tmp_path)) == 5
+
+
+def test_key_covers_helpers_of_the_strategy(tmp_path, monkeypatch):
+    module = tmp_path / "my_strategies.py"
+    source = (
+        "from crapssim.strategy import passline\n"
+        "def helper(player, table, unit):\n"
+        "    passline(player, table, {})\n"
+        "def mine(player, table, unit=5, strat_info=None):\n"
+        "    helper(player, table, unit)\n"
+    )
+    module.write_text(source.format("unit"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import my_strategies
+
+    config = {"strategies": {"mine": my_strategies.mine}, "bankrolls": [100]}
+    key = config_key(config, 4, 10, "run")
+    module.write_text(source.format("2 * unit"))
+    linecache.checkcache(str(module))
+    importlib.reload(my_strategies)
+    config = {"strategies": {"mine": my_strategies.mine}, "bankrolls": [100]}
+    assert config_key(config, 4, 10, "run") != key
+    del sys.modules["my_strategies"]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=None)
+    for i in range(3):
+        cache.put(f"entry{i}", list(range(100)))
+        past = time.time() - 100 + i
+        os.utime(os.path.join(str(tmp_path), f"entry{i}.pkl"), (past, past))
+    assert cache.get("entry0") is not None
+    cache.evict(2 * cache.size // 3)
+    assert cache.get("entry1") is None
+    assert cache.get("entry0") is not None and cache.get("entry2") is not None
@@ -0,0 +1,127 @@
+import io
+import os
+
+import pytest
+import crapssim as craps
+from crapssim.checkpoint import ChunkProgress, load_checkpoint, save_checkpoint
+from crapssim.runner import run_simulations
+
+STRATEGIES = {"risk12": craps.strategy.risk12, "place68_2come": craps.strategy.place68_2come}
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _table(seed):
+    table = craps.Table(dice=craps.Dice(seed=seed, buffer_size=64))
+    for name, strategy in STRATEGIES.items():
+        table.add_player(craps.Player(1000, strategy, name))
+    return table
+
+
+def test_table_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "table.pkl")
+    uninterrupted = _table(3)
+    uninterrupted.run(300, verbose=False, runout=True)
+
+    calls = []
+
+    def checkpoint(table):
+        save_checkpoint(table, path)
+        calls.append(table.dice.n_rolls)
+        if len(calls) == 3:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        _table(3).run(300, verbose=False, runout=True, checkpoint=checkpoint, checkpoint_every=40)
+    resumed = load_checkpoint(path)
+    assert resumed.dice.n_rolls == 120
+    resumed.run(300, verbose=False, runout=True)
+
+    assert resumed.dice.n_rolls == uninterrupted.dice.n_rolls
+    assert [p.bankroll for p in resumed.players] == [p.bankroll for p in uninterrupted.players]
+    assert resumed.point.number == uninterrupted.point.number
+    assert resumed.n_shooters == uninterrupted.n_shooters
+
+
+def test_table_pickles_without_sink(tmp_path):
+    path = str(tmp_path / "table.pkl")
+    table = _table(1)
+    table.sink = craps.events.TextSink(io.StringIO())
+    table.run(20, checkpoint=path, checkpoint_every=5)
+    assert load_checkpoint(path).sink is craps.events.NULL_SINK
+
+
+def test_job_resumes_mid_chunk(tmp_path, monkeypatch):
+    kwargs = dict(n_workers=1, seed=8, chunk_size=3, max_shooter=float("inf"), runout=True)
+    expected = run_simulations(STRATEGIES, [1000, 1000], 7, 200, **kwargs)
+
+    save = ChunkProgress.save
+    calls = []
+
+    def interrupting_save(self, simid, table_number, table):
+        save(self, simid, table_number, table)
+        calls.append(simid)
+        if len(calls) == 5:
+            raise Interrupted()
+
+    checkpoint = str(tmp_path / "job")
+    monkeypatch.setattr(ChunkProgress, "save", interrupting_save)
+    with pytest.raises(Interrupted):
+        run_simulations(
+            STRATEGIES, [1000, 1000], 7, 200, checkpoint=checkpoint, checkpoint_every=50, **kwargs
+        )
+    assert any(name.endswith(".progress") for name in os.listdir(checkpoint))
+    monkeypatch.setattr(ChunkProgress, "save", save)
+
+    rows = run_simulations(
+        STRATEGIES, [1000, 1000], 7, 200, checkpoint=checkpoint, checkpoint_every=50, **kwargs
+    )
+    assert rows == expected
+    assert not any(name.endswith(".progress") for name in os.listdir(checkpoint))
+
+
+def test_job_records_seed(tmp_path):
+    checkpoint = str(tmp_path / "job")
+    first = run_simulations(STRATEGIES, [500, 500], 4, 20, n_workers=1, checkpoint=checkpoint)
+    second = run_simulations(STRATEGIES, [500, 500], 4, 20, n_workers=1, checkpoint=checkpoint)
+    assert second == first
+    with pytest.raises(ValueError):
+        run_simulations(STRATEGIES, [500, 500], 4, 20, n_workers=1, seed=1, checkpoint=checkpoint)
+
+
+def _bets(table):
+    return [sorted((b.name, b.subname, b.bet_amount) for b in p.bets_on_table) for p in table.players]
+
+
+def test_branches_continue_from_snapshot():
+    table = _table(5)
+    table.run(20, verbose=False)
+    bankrolls = [p.bankroll for p in table.players]
+    bets = _bets(table)
+
+    branches = table.branch(4, seed=1)
+    for branch in branches:
+        assert branch.dice.n_rolls == 20
+        assert branch.point.number == table.point.number
+        assert [p.bankroll for p in branch.players] == bankrolls
+        assert _bets(branch) == bets
+        assert branch.strat_info.keys() == set(branch.players)
+        branch.run(60, verbose=False)
+
+    # branches don't share players or dice with the table or each other
+    assert [p.bankroll for p in table.players] == bankrolls
+    assert len({tuple(p.bankroll for p in b.players) for b in branches}) > 1
+    again = table.branch(4, seed=1)
+    again[2].run(60, verbose=False)
+    assert [p.bankroll for p in again[2].players] == [p.bankroll for p in branches[2].players]
+
+
+def test_snapshot_without_seed_replays_dice():
+    table = _table(6)
+    table.run(10, verbose=False)
+    copy = craps.Table.from_snapshot(table.snapshot())
+    table.run(50, verbose=False)
+    copy.run(50, verbose=False)
+    assert [p.bankroll for p in copy.players] == [p.bankroll for p in table.players]
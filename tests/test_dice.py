@@ -1,5 +1,6 @@
+import numpy as np
 import pytest
-from crapssim.dice import Dice
+from crapssim.dice import Dice, TiltedDice
 
 @pytest.fixture
 def d1():
@@ -29,4 +30,61 @@ def test_many_roll(d1):
 def test_fixed_roll(d1, roll, total):
     d1.fixed_roll(roll)
     assert d1.result == roll
-    assert d1.total == total
\ No newline at end of file
+    assert d1.total == total
+
+def test_buffered_roll_is_plain_int():
+    d = Dice(seed=1, buffer_size=8)
+    d.roll()
+    assert type(d.total) is int
+    assert all(type(x) is int for x in d.result)
+    assert d.total == sum(d.result)
+
+
+def test_buffered_refills_past_block():
+    d = Dice(seed=1, buffer_size=4)
+    for _ in range(10):
+        d.roll()
+        assert 2 <= d.total <= 12
+        assert d.total == sum(d.result)
+    assert d.n_rolls == 10
+
+
+@pytest.mark.parametrize("buffer_size", [0, 1, 3, 64])
+def test_seeded_sequence_is_reproducible(buffer_size):
+    reference = Dice(seed=42, buffer_size=1000)
+    d = Dice(seed=42, buffer_size=buffer_size)
+    for _ in range(100):
+        reference.roll()
+        d.roll()
+        assert list(d.result) == list(reference.result)
+        assert d.total == reference.total
+
+
+def test_buffered_fixed_roll():
+    d = Dice(seed=3, buffer_size=16)
+    d.roll()
+    d.fixed_roll([2, 2])
+    assert d.total == 4
+    assert d.n_rolls == 2
+
+
+def test_tilted_dice_draw_tilted_totals():
+    d = TiltedDice({7: 3}, seed=1)
+    assert d.probabilities[7] == pytest.approx(18 / 48)
+    counts = {}
+    for _ in range(20000):
+        d.roll()
+        assert 1 <= d.result[0] <= 6 and 1 <= d.result[1] <= 6
+        assert d.total == sum(d.result)
+        counts[d.total] = counts.get(d.total, 0) + 1
+    assert counts[7] / 20000 == pytest.approx(18 / 48, abs=0.01)
+    assert counts[2] / 20000 == pytest.approx(1 / 48, abs=0.005)
+    expected = counts[7] * np.log(4 / 9) + (20000 - counts[7]) * np.log(48 / 36)
+    assert d.log_likelihood_ratio == pytest.approx(expected)
+
+
+def test_untilted_dice_have_unit_likelihood_ratio():
+    d = TiltedDice({}, seed=2, buffer_size=0)
+    for _ in range(50):
+        d.roll()
+    assert d.likelihood_ratio == pytest.approx(1)
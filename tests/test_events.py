@@ -0,0 +1,60 @@
+import io
+
+import crapssim as craps
+from crapssim.dice import Dice
+from crapssim.events import StructuredSink, TextSink
+
+
+def _table(sink=None):
+    table = craps.Table(dice=Dice(seed=4), sink=sink)
+    table.add_player(craps.Player(200, craps.strategy.pass2come, "A"))
+    table.add_player(craps.Player(200, craps.strategy.dontpass, "B"))
+    return table
+
+
+def test_text_sink_matches_verbose_printout(capsys):
+    _table().run(50, verbose=True)
+    printed = capsys.readouterr().out
+
+    f_out = io.StringIO()
+    _table(TextSink(f_out, buffer_lines=7)).run(50, verbose=True)
+    assert f_out.getvalue() == printed
+    assert printed.startswith("Welcome to the Craps Table!\n")
+
+
+def _no_bets(player, table, unit=5, strat_info=None):
+    pass
+
+
+def test_verbose_cash_prints_as_before(capsys):
+    # cash is a float once bets are on the table, as the original printout had it
+    for bet_strategy, cash in [(_no_bets, "$300\n"), (craps.strategy.passline, "$305.0\n")]:
+        table = craps.Table(dice=Dice(seed=1))
+        table.add_player(craps.Player(300, bet_strategy))
+        table.run(1, verbose=True)
+        assert f"Total Player Cash is {cash}" in capsys.readouterr().out
+
+
+def test_quiet_run_prints_nothing(capsys):
+    _table().run(50, verbose=False)
+    assert capsys.readouterr().out == ""
+
+
+def test_structured_sink():
+    sink = StructuredSink()
+    table = _table(sink)
+    table.run(80, verbose=False)
+    events = sink.events
+    assert events[0]["event"] == "session_start"
+    assert events[-1]["event"] == "session_end"
+    assert sum(e["event"] == "roll" for e in events) == table.dice.n_rolls
+
+    placed = sum(e["event"] == "bet_placed" for e in events)
+    resolved = sum(e["event"] == "bet_resolved" for e in events)
+    on_table = sum(len(p.bets_on_table) for p in table.players)
+    assert placed - resolved == on_table
+
+    shooters = [e for e in events if e["event"] == "shooter_change"]
+    assert len(shooters) == table.n_shooters - 1
+    point_changes = [e for e in events if e["event"] == "point_change"]
+    assert point_changes[-1]["new"] == table.point.number
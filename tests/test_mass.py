@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import crapssim as craps
+from crapssim import spec
+from crapssim.dice import Dice
+from crapssim.mass import MassTable
+
+STRATEGIES = [
+    craps.strategy.place68,
+    craps.strategy.dontpass,
+    craps.strategy.ironcross,
+    craps.strategy.knockout,
+    spec.hammerlock,
+    spec.dicedoctor,
+]
+
+
+@pytest.mark.parametrize("runout", [False, True])
+def test_matches_table_with_same_players(runout):
+    bankrolls = [50, 120, 300]
+    for seed in range(5):
+        mass = MassTable(dice=Dice(seed=seed))
+        table = craps.Table(dice=Dice(seed=seed))
+        players = []
+        for s in STRATEGIES:
+            mass.add_players(s, bankrolls)
+            for bankroll in bankrolls:
+                player = craps.Player(bankroll, s)
+                table.add_player(player)
+                players.append(player)
+
+        mass.run(80, runout=runout)
+        table.run(80, verbose=False, runout=runout)
+
+        assert mass.dice.n_rolls == table.dice.n_rolls
+        assert mass.n_shooters == table.n_shooters
+        assert mass.total_player_cash == pytest.approx(table.total_player_cash)
+        for view, player in zip(mass.players, players):
+            assert view.bankroll == pytest.approx(player.bankroll)
+            assert view.total_bet_amount == pytest.approx(player.total_bet_amount)
+
+
+def test_player_views_read_arrays():
+    mass = MassTable(dice=Dice(seed=3))
+    views = mass.add_players(craps.strategy.passline_odds, [100, 200], units=[5, 10], mult=2)
+    mass.run(1)
+    assert [v.unit for v in views] == [5, 10]
+    for v in views:
+        assert v.total_bet_amount == sum(v.bets.values())
+    np.testing.assert_array_equal(mass.bankrolls(), [v.bankroll for v in views])
+    assert set(mass.bet_amounts()) >= {"PassLine", "Odds"}
+
+
+def test_unsupported_strategy():
+    with pytest.raises(ValueError):
+        MassTable().add_players(craps.strategy.risk12, [100])
@@ -0,0 +1,162 @@
+import pytest
+import crapssim as craps
+from crapssim.bet import Come, PassLine, Place6
+from crapssim.dice import Dice
+
+BET_NAMES = ["PassLine", "Come", "Odds", "Place5", "Place6", "Place8", "Place9"]
+
+
+def _check_index(player):
+    bets = player.bets_on_table
+    for name in BET_NAMES:
+        matching = [b for b in bets if b.name == name]
+        assert player.has_bet(name) == bool(matching)
+        assert player.num_bet(name) == len(matching)
+        if matching:
+            assert player.get_bet(name, "Any") is matching[0]
+        for subname in {b.subname for b in matching}:
+            first = [b for b in matching if b.subname == subname][0]
+            assert player.get_bet(name, subname) is first
+    assert player.num_bet(*BET_NAMES) == len(bets)
+
+
+@pytest.mark.parametrize(
+    "bet_strategy", [craps.strategy.pass2come, craps.strategy.place68_2come]
+)
+def test_index_matches_bets_on_table(bet_strategy):
+    table = craps.Table(dice=Dice(seed=0))
+    player = craps.Player(10000, bet_strategy)
+    table.add_player(player)
+    for _ in range(300):
+        table.run(table.dice.n_rolls + 1, verbose=False)
+        _check_index(player)
+
+
+def test_get_bet_missing_raises():
+    player = craps.Player(100)
+    with pytest.raises(ValueError):
+        player.get_bet("PassLine")
+
+
+def test_remove():
+    player = craps.Player(100)
+    place = Place6(6)
+    player.bet(place)
+    player.bet(PassLine(5))
+    player.remove(place)
+    assert not player.has_bet("Place6")
+    assert player.bankroll == 95
+    # removing a bet that isn't on the table does nothing
+    player.remove(Come(5))
+    assert player.bankroll == 95
+    _check_index(player)
+
+
+def test_table_totals_follow_players():
+    table = craps.Table(dice=Dice(seed=1), debug=True)
+    for s in [craps.strategy.ironcross, craps.strategy.layodds, craps.strategy.pass2come]:
+        table.add_player(craps.Player(300, s, s.__name__))
+    table.run(200, verbose=False)
+    table.check_totals()
+    assert table.player_has_bets == any(p.bets_on_table for p in table.players)
+
+
+def test_check_totals_catches_direct_changes():
+    table = craps.Table()
+    player = craps.Player(100)
+    table.add_player(player)
+    player.bankroll += 50
+    with pytest.raises(AssertionError):
+        table.check_totals()
+
+
+def test_run_recounts_direct_changes():
+    table = craps.Table(dice=Dice(seed=1), debug=True)
+    player = craps.Player(100, craps.strategy.passline)
+    table.add_player(player)
+    player.bankroll += 50
+    table.run(5, verbose=False)
+    assert table.total_player_cash == player.bankroll + player.total_bet_amount
+
+
+def test_instrumented_table_stats():
+    table = craps.Table(dice=Dice(seed=12), instrument=True)
+    table.add_player(craps.Player(300, craps.strategy.place68, "A"))
+    table.add_player(craps.Player(300, craps.strategy.dicedoctor, "B"))
+    table.run(100, verbose=False, runout=True)
+    stats = table.stats
+    n_rolls = table.dice.n_rolls
+    assert all(stats.calls[phase] == n_rolls for phase in stats.calls)
+    assert set(stats.player_time) == {
+        (phase, name) for phase in ("add_bets", "update_bets") for name in "AB"
+    }
+    assert ("add_bets", "dicedoctor") in stats.strategy_time
+    assert stats.bets_placed == stats.bets_resolved + stats.bets_removed
+    assert stats.bets_resolved == sum(stats.resolved_by_status.values())
+    assert stats.summary()["total_time"] > 0
+
+
+def test_uninstrumented_table_has_no_stats():
+    table = craps.Table(dice=Dice(seed=12))
+    table.add_player(craps.Player(300, craps.strategy.place68, "A"))
+    table.run(10, verbose=False)
+    assert table.stats is None
+
+
+@pytest.mark.parametrize(
+    "bet_strategy",
+    [
+        craps.strategy.passline,
+        craps.strategy.pass2come,
+        craps.strategy.place68,
+        craps.strategy.layodds,
+        craps.strategy.ironcross,
+        craps.strategy.knockout,
+    ],
+)
+def test_decision_cache_replays_memoryless_strategies(bet_strategy):
+    assert bet_strategy.memoryless
+    for seed in range(10):
+        results = []
+        for cache_size in [0, 1024]:
+            table = craps.Table(dice=Dice(seed=seed), decision_cache_size=cache_size, debug=True)
+            player = craps.Player(200, bet_strategy)
+            table.add_player(player)
+            table.run(150, verbose=False, runout=True)
+            bets = [(b.name, b.subname, b.bet_amount) for b in player.bets_on_table]
+            results.append((player.bankroll, table.dice.n_rolls, bets))
+        assert results[0] == results[1]
+    assert 0 < len(table._decision_cache) <= 1024
+
+
+def test_decision_cache_is_bounded():
+    table = craps.Table(dice=Dice(seed=1), decision_cache_size=2)
+    table.add_player(craps.Player(500, craps.strategy.pass2come))
+    table.run(100, verbose=False)
+    assert len(table._decision_cache) == 2
+
+
+@craps.strategy.memoryless
+def _place_numbers(player, table, unit=5, strat_info=None, numbers=(6, 8)):
+    craps.strategy.place(player, table, unit, strat_info={"numbers": numbers})
+
+
+def test_decision_cache_skips_unhashable_strategy_kwargs():
+    table = craps.Table(dice=Dice(seed=3), decision_cache_size=1024)
+    player = craps.Player(500, _place_numbers, strat_kwargs={"numbers": [5, 9]})
+    table.add_player(player)
+    table.run(50, verbose=False)
+    assert len(table._decision_cache) == 0
+    assert table.dice.n_rolls == 50
+
+
+def test_unit_and_strategy_kwargs_reach_the_player():
+    table = craps.Table()
+    table.add_player(craps.Player(500, craps.strategy.passline_odds, "p", unit=10, strat_kwargs={"mult": 2}))
+    table._add_player_bets()
+    table.dice.fixed_roll([2, 2])
+    table._update_table(table.dice)
+    table._add_player_bets()
+    player = table.players[0]
+    assert player.get_bet("PassLine").bet_amount == 10
+    assert player.get_bet("Odds", "Any").bet_amount == 20
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import crapssim as craps
+from crapssim.results import SESSION_COLUMNS, ResultsWriter, iter_shards, read_results
+from crapssim.runner import run_simulations
+
+
+def test_round_trip_npy_shards(tmp_path):
+    rows = run_simulations(
+        {"place68": craps.strategy.place68, "passline": craps.strategy.passline},
+        [300, 200], 7, 30, n_workers=1, seed=2,
+    )
+    with ResultsWriter(tmp_path / "out", chunk_size=4, format="npy") as writer:
+        writer.write_rows(rows)
+    assert writer.n_rows == 14
+    assert len(list(iter_shards(tmp_path / "out"))) == 4
+
+    results = read_results(tmp_path / "out")
+    assert results["simid"].dtype == np.int64
+    assert results["strategy"].dtype.kind == "U"
+    assert list(results["strategy"]) == [r[1] for r in rows]
+    np.testing.assert_array_equal(results["total_cash"], [r[2] for r in rows])
+    np.testing.assert_array_equal(results["n_rolls"], [r[4] for r in rows])
+
+
+def test_single_shard_is_memory_mapped(tmp_path):
+    with ResultsWriter(tmp_path, columns=SESSION_COLUMNS, format="npy") as writer:
+        writer.write((310.0, 300, 12))
+        writer.write((0.0, 300, 40))
+    results = read_results(tmp_path)
+    assert isinstance(results["bankroll"], np.memmap)
+    assert list(results["n_rolls"]) == [12, 40]
+
+
+def test_rewriting_a_directory_replaces_old_shards(tmp_path):
+    (tmp_path / "notes.txt").write_text("kept")
+    with ResultsWriter(tmp_path, columns=SESSION_COLUMNS, chunk_size=2, format="npy") as writer:
+        writer.write_rows([(9.0, 300, 1)] * 5)
+    with ResultsWriter(tmp_path, columns=SESSION_COLUMNS, chunk_size=2, format="npy") as writer:
+        writer.write_rows([(1.0, 300, 1)] * 2)
+    assert list(read_results(tmp_path)["total_cash"]) == [1.0, 1.0]
+    assert (tmp_path / "notes.txt").read_text() == "kept"
+
+
+def test_empty_results(tmp_path):
+    ResultsWriter(tmp_path, columns=SESSION_COLUMNS, format="npy").close()
+    assert len(read_results(tmp_path)["total_cash"]) == 0
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        ResultsWriter(tmp_path, format="csv")
@@ -0,0 +1,129 @@
+import io
+
+import numpy as np
+import pytest
+import crapssim as craps
+from crapssim.analytic import session_distribution
+from crapssim.dice import Dice
+from crapssim.runner import (
+    COLUMNS,
+    SESSION_BUFFER_SIZE,
+    run_importance_sampling,
+    run_simulations,
+    run_until_precise,
+    write_csv,
+)
+from crapssim.stats import SessionAggregator
+
+STRATEGIES = {
+    "place68": craps.strategy.place68,
+    "ironcross": craps.strategy.ironcross,
+}
+
+
+def test_rows_follow_csv_schema():
+    rows = run_simulations(STRATEGIES, [300, 200], 12, 50, n_workers=1, seed=1, chunk_size=5)
+    assert len(rows) == 24
+    assert [r[0] for r in rows] == sorted(r[0] for r in rows)
+    assert rows[0][1] == "place68" and rows[0][3] == 300
+    assert rows[1][1] == "ironcross" and rows[1][3] == 200
+    # players at the same table share the dice
+    assert rows[0][4] == rows[1][4]
+
+
+def test_seed_is_reproducible():
+    a = run_simulations(STRATEGIES, [300, 300], 10, 50, n_workers=1, seed=3, chunk_size=4)
+    b = run_simulations(STRATEGIES, [300, 300], 10, 50, n_workers=1, seed=3, chunk_size=4)
+    c = run_simulations(STRATEGIES, [300, 300], 10, 50, n_workers=1, seed=4, chunk_size=4)
+    assert a == b
+    assert a != c
+
+
+def test_rows_and_tables_aggregate_the_same():
+    # without runout, sessions end with bets on the table
+    rows = run_simulations({"passline": craps.strategy.passline}, [100], 30, 7,
+                           runout=False, n_workers=1, seed=2, chunk_size=30)
+    (chunk_seed,) = np.random.SeedSequence(2).spawn(1)
+    from_tables = SessionAggregator()
+    for session_seed in chunk_seed.spawn(30):
+        table = craps.Table(dice=Dice(seed=session_seed, buffer_size=SESSION_BUFFER_SIZE))
+        table.add_player(craps.Player(100, craps.strategy.passline, "passline"))
+        table.run(7, verbose=False, runout=False)
+        from_tables.add_table(table, [100])
+    from_rows = SessionAggregator()
+    from_rows.add_rows(rows)
+    assert from_rows.summary() == from_tables.summary()
+
+
+def test_process_pool_matches_serial():
+    kwargs = dict(max_shooter=2, runout=True, seed=11, chunk_size=3)
+    serial = run_simulations(STRATEGIES, [300, 300], 10, float("inf"), n_workers=1, **kwargs)
+    pooled = run_simulations(STRATEGIES, [300, 300], 10, float("inf"), n_workers=2, **kwargs)
+    assert serial == pooled
+
+
+def test_write_csv():
+    rows = run_simulations(STRATEGIES, [300, 300], 2, 10, n_workers=1, seed=1)
+    f_out = io.StringIO()
+    write_csv(rows, f_out)
+    lines = f_out.getvalue().splitlines()
+    assert lines[0] == ",".join(COLUMNS)
+    assert len(lines) == 5
+
+
+def test_common_random_numbers_replays_session_dice():
+    kwargs = dict(n_sim=8, max_rolls=40, n_workers=1, seed=5, chunk_size=3)
+    paired = run_simulations(STRATEGIES, [300, 300], common_random_numbers=True, **kwargs)
+    for s in STRATEGIES:
+        alone = run_simulations({s: STRATEGIES[s]}, [300], **kwargs)
+        assert [r for r in paired if r[1] == s] == alone
+
+
+def test_run_until_precise_stops_at_target():
+    result = run_until_precise(
+        STRATEGIES, [300, 300], 30, mean_half_width=20, n_workers=1, seed=2,
+        batch_size=50, chunk_size=25, max_sims=2000,
+    )
+    assert result["converged"]
+    assert result["n_sim"] % 50 == 0
+    for summary in result["summary"].values():
+        assert summary["met"]
+        assert summary["mean_half_width"] <= 20
+
+    # the sessions run are the first ones run_simulations runs with the seed
+    rows = run_simulations(
+        STRATEGIES, [300, 300], result["n_sim"], 30, n_workers=1, seed=2, chunk_size=25
+    )
+    place68 = [r[2] for r in rows if r[1] == "place68"]
+    assert result["summary"]["place68"]["mean"] == pytest.approx(sum(place68) / len(place68))
+
+
+def test_run_until_precise_respects_budget():
+    result = run_until_precise(
+        STRATEGIES, [300, 300], 30, ruin_half_width=1e-6, n_workers=1, seed=2,
+        batch_size=40, max_sims=100,
+    )
+    assert not result["converged"]
+    assert result["n_sim"] == 100
+    assert result["aggregator"].summary()["ironcross"]["n"] == 100
+    for budget in [dict(max_sims=0), dict(batch_size=0)]:
+        with pytest.raises(ValueError):
+            run_until_precise(STRATEGIES, [300, 300], 30, ruin_half_width=0.1, **budget)
+
+
+def test_importance_sampling_matches_exact_distribution():
+    exact = session_distribution(craps.strategy.passline, 20, 30, runout=True)
+    result = run_importance_sampling(
+        {"passline": craps.strategy.passline},
+        [20],
+        2000,
+        30,
+        {7: 1.5, 2: 2, 3: 2, 12: 2},
+        n_workers=2,
+        seed=1,
+        chunk_size=250,
+    )
+    assert len(result["rows"]) == 2000 and len(result["rows"][0]) == 6
+    for name, exact_value in [("p_ruin", exact["p_ruin"]), ("mean", exact["mean"])]:
+        estimate = result["summary"]["passline"][name]
+        assert abs(estimate["mean"] - exact_value) < 4 * estimate["se"]
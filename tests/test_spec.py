@@ -0,0 +1,72 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import crapssim as craps
+from crapssim import spec
+from crapssim.dice import Dice
+from crapssim.spec import Rule, StrategySpec
+from crapssim.vectorized import run_vectorized
+
+PORTS = [
+    (craps.strategy.passline_odds, spec.passline_odds),
+    (craps.strategy.passline_odds2, spec.passline_odds2),
+    (craps.strategy.passline_odds345, spec.passline_odds345),
+    (craps.strategy.place68, spec.place68),
+    (craps.strategy.ironcross, spec.ironcross),
+    (craps.strategy.hammerlock, spec.hammerlock),
+    (craps.strategy.dicedoctor, spec.dicedoctor),
+]
+N_ROLLS = 400
+
+
+def _play(bet_strategy, seed, bankroll=300, runout=True):
+    table = craps.Table(dice=Dice(seed=seed, buffer_size=N_ROLLS))
+    player = craps.Player(bankroll, bet_strategy)
+    table.add_player(player)
+    table.run(60, verbose=False, runout=runout)
+    return table, player
+
+
+@pytest.mark.parametrize("original, compiled", PORTS)
+def test_compiled_matches_python_strategy(original, compiled):
+    for seed in range(25):
+        table_a, player_a = _play(original, seed)
+        table_b, player_b = _play(compiled, seed)
+        assert player_b.bankroll == pytest.approx(player_a.bankroll)
+        assert table_b.dice.n_rolls == table_a.dice.n_rolls
+
+
+@pytest.mark.parametrize("original, compiled", PORTS)
+def test_compiled_runs_vectorized(original, compiled):
+    n_sim = 25
+    rolls = np.zeros((n_sim, N_ROLLS), dtype=np.int64)
+    for i in range(n_sim):
+        d = Dice(seed=i, buffer_size=N_ROLLS)
+        for k in range(N_ROLLS):
+            d.roll()
+            rolls[i, k] = d.total
+
+    result = run_vectorized(compiled, 300, n_sim, 60, runout=True, rolls=rolls)
+    for i in range(n_sim):
+        table, player = _play(original, i)
+        assert result["bankroll"][i] == pytest.approx(player.bankroll)
+        assert result["n_rolls"][i] == table.dice.n_rolls
+
+
+def test_stateless_specs_keep_no_strat_info():
+    table = craps.Table()
+    player = craps.Player(100, spec.place68)
+    assert spec.place68(player, table) is None
+    assert spec.hammerlock(player, table) == (0, 0)
+
+
+def test_compiled_strategy_pickles():
+    strategy = pickle.loads(pickle.dumps(spec.hammerlock))
+    assert strategy.actions == spec.hammerlock.actions
+
+
+def test_spec_rejects_unknown_bets():
+    with pytest.raises(ValueError):
+        StrategySpec("come", [Rule(point="On", place=["Come"])]).compile()
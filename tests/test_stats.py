@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+import crapssim as craps
+from crapssim.runner import run_simulations
+from crapssim.stats import (
+    QuantileSketch,
+    RunningStats,
+    SessionAggregator,
+    paired_differences,
+    weighted_estimate,
+)
+
+
+def test_paired_differences_of_identical_strategies():
+    strategies = {"a": craps.strategy.place68, "b": craps.strategy.place68}
+    rows = run_simulations(
+        strategies, [300, 300], 20, 30, n_workers=1, seed=2, common_random_numbers=True
+    )
+    result = paired_differences(rows)
+    assert list(result) == ["b"]
+    assert result["b"]["n"] == 20
+    assert result["b"]["mean_diff"] == 0
+    assert result["b"]["sd_diff"] == 0
+
+
+def test_paired_differences_by_hand():
+    rows = [
+        (0, "a", 110, 100, 5),
+        (0, "b", 100, 100, 5),
+        (1, "a", 90, 100, 7),
+        (1, "b", 70, 100, 7),
+        (2, "a", 100, 100, 2),
+        (2, "b", 100, 100, 2),
+    ]
+    result = paired_differences(rows, baseline="b")
+    assert result["a"]["mean_diff"] == pytest.approx(10)
+    assert result["a"]["sd_diff"] == pytest.approx(10)
+    assert result["a"]["ci_low"] < 10 < result["a"]["ci_high"]
+
+
+def test_paired_differences_requires_matching_sessions():
+    rows = [(0, "a", 110, 100, 5), (0, "b", 100, 100, 5), (1, "a", 90, 100, 7)]
+    with pytest.raises(ValueError):
+        paired_differences(rows)
+
+
+def test_running_stats_merge_matches_numpy():
+    values = np.random.default_rng(0).normal(100, 15, 500)
+    a, b = RunningStats(), RunningStats()
+    for x in values[:200]:
+        a.add(x)
+    for x in values[200:]:
+        b.add(x)
+    a.merge(b)
+    assert a.n == 500
+    assert a.mean == pytest.approx(values.mean())
+    assert a.variance == pytest.approx(values.var(ddof=1))
+    assert a.min == values.min() and a.max == values.max()
+
+
+def test_quantile_sketch_relative_error():
+    values = np.random.default_rng(1).lognormal(5, 1, 5000)
+    sketch = QuantileSketch(0.01)
+    other = QuantileSketch(0.01)
+    for x in values[:2500]:
+        sketch.add(x)
+    for x in values[2500:]:
+        other.add(x)
+    sketch.merge(other)
+    for q in (0.05, 0.5, 0.95):
+        exact = np.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert len(sketch._positive) < 1000
+
+
+def test_aggregator_matches_rows():
+    strategies = {"place68": craps.strategy.place68, "dontpass": craps.strategy.dontpass}
+    rows = run_simulations(strategies, [100, 100], 60, 40, n_workers=1, seed=5, chunk_size=20)
+    aggregator = run_simulations(
+        strategies, [100, 100], 60, 40, n_workers=1, seed=5, chunk_size=20, aggregate=True
+    )
+    summary = aggregator.summary()
+    for s in strategies:
+        final = np.array([r[2] for r in rows if r[1] == s])
+        assert summary[s]["n"] == 60
+        assert summary[s]["mean"] == pytest.approx(final.mean())
+        assert summary[s]["sd"] == pytest.approx(final.std(ddof=1))
+        assert summary[s]["p_ruin"] == pytest.approx(np.mean(final <= 0))
+        assert summary[s]["p_bust"] == pytest.approx(np.mean(final < 100))
+        assert summary[s]["max"] == final.max()
+
+
+def test_aggregator_from_table():
+    table = craps.Table()
+    table.add_player(craps.Player(200, craps.strategy.passline, "A"))
+    table.run(20, verbose=False)
+    aggregator = SessionAggregator()
+    aggregator.add_table(table, [200])
+    summary = aggregator.summary()["A"]
+    assert summary["mean"] == table.total_player_cash
+    assert summary["mean_rolls"] == table.dice.n_rolls
+
+
+def test_weighted_estimate_of_rare_event():
+    # five sevens in a row, (1/6)**5 with fair dice
+    dice = craps.dice.TiltedDice({7: 10}, seed=4)
+    events, log_weights = [], []
+    for _ in range(2000):
+        dice.log_likelihood_ratio = 0.0
+        totals = []
+        for _ in range(5):
+            dice.roll()
+            totals.append(dice.total)
+        events.append(all(t == 7 for t in totals))
+        log_weights.append(dice.log_likelihood_ratio)
+    result = weighted_estimate(events, log_weights)
+    assert result["mean"] == pytest.approx(6 ** -5, rel=4 * result["se"] / 6 ** -5)
+    # plain Monte Carlo would need millions of sessions for this precision
+    assert result["se"] < 0.1 * 6 ** -5
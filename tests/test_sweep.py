@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+import crapssim as craps
+from crapssim.sweep import STAT_COLUMNS, sweep, write_csv
+
+
+def test_one_row_per_cell_in_grid_order():
+    grid = {"unit": [5, 10], "mult": [1, 2, "345"]}
+    rows = sweep(craps.strategy.passline_odds, grid, 8, 20, n_workers=1, seed=1, chunk_size=3)
+    assert [(r["unit"], r["mult"]) for r in rows] == [
+        (5, 1), (5, 2), (5, "345"), (10, 1), (10, 2), (10, "345")
+    ]
+    for row in rows:
+        assert row["n"] == 8
+        assert all(column in row for column in STAT_COLUMNS)
+        assert row["q5"] <= row["q50"] <= row["q95"]
+
+
+def test_process_pool_matches_serial():
+    grid = [{"bankroll": 100, "win_mult": 1}, {"bankroll": 300, "win_mult": "345"}]
+    kwargs = dict(seed=5, chunk_size=2)
+    serial = sweep(craps.strategy.layodds, grid, 7, 30, n_workers=1, **kwargs)
+    pooled = sweep(craps.strategy.layodds, grid, 7, 30, n_workers=2, **kwargs)
+    assert serial == pooled
+
+
+def test_common_random_numbers_replays_dice():
+    grid = {"fielddouble": [[2, 12], [2]]}
+    rows = sweep(
+        craps.strategy.passline, grid, 10, 20, n_workers=1, seed=2, common_random_numbers=True
+    )
+    # the field payouts don't change a passline player's sessions
+    assert rows[0]["mean"] == rows[1]["mean"]
+    assert rows[0]["mean_rolls"] == rows[1]["mean_rolls"]
+
+
+def test_ruin_level_in_grid_sets_aggregation():
+    grid = {"ruin_level": [0, 10000]}
+    rows = sweep(
+        craps.strategy.passline, grid, 6, 20, n_workers=1, seed=3, common_random_numbers=True
+    )
+    assert rows[0]["mean"] == rows[1]["mean"]
+    assert rows[1]["p_ruin"] == 1.0
+
+
+def test_zero_sessions_rejected():
+    with pytest.raises(ValueError):
+        sweep(craps.strategy.passline, {"unit": [5]}, 0, 20, n_workers=1)
+
+
+def test_write_csv():
+    grid = {"bet_strategy": [craps.strategy.passline]}
+    rows = sweep(craps.strategy.passline, grid, 2, 5, n_workers=1, seed=1)
+    f_out = io.StringIO()
+    write_csv(rows, f_out)
+    lines = f_out.getvalue().splitlines()
+    assert lines[0].startswith("bet_strategy,n,mean")
+    assert lines[1].startswith("passline,2,")
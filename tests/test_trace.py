@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+
+import crapssim as craps
+from crapssim.dice import Dice
+from crapssim.events import MultiSink, TextSink
+from crapssim.trace import TraceRecorder, load_trace
+
+
+def _run(sink, n_rolls=200):
+    table = craps.Table(dice=Dice(seed=9), sink=sink)
+    table.add_player(craps.Player(300, craps.strategy.place68, "A"))
+    table.add_player(craps.Player(300, craps.strategy.dontpass, "B"))
+    table.run(n_rolls, verbose=False)
+    return table
+
+
+def test_trace_follows_table():
+    recorder = TraceRecorder(chunk_size=16)
+    table = _run(recorder)
+    trace = recorder.records
+    assert len(trace) == table.dice.n_rolls
+    assert list(trace["roll"]) == list(range(1, table.dice.n_rolls + 1))
+    assert np.all(trace["total"] == trace["die1"] + trace["die2"])
+    assert np.all(trace["point_number"][~trace["point_on"]] == 0)
+    assert trace["shooter"][-1] == table.n_shooters
+
+    last = trace[-1]
+    assert last["bankroll"].sum() + last["at_risk"].sum() == table.total_player_cash
+    assert last["at_risk"][0] == table.players[0].total_bet_amount
+
+
+def test_spilled_trace_is_memory_mapped(tmp_path):
+    in_memory = TraceRecorder()
+    _run(in_memory)
+
+    path = str(tmp_path / "trace.bin")
+    spilled = TraceRecorder(path, chunk_size=10)
+    _run(MultiSink(spilled, TextSink(io.StringIO())))
+
+    trace = load_trace(path)
+    assert isinstance(trace, np.memmap)
+    np.testing.assert_array_equal(trace, in_memory.records)
+    assert trace.dtype.itemsize < 50
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import crapssim as craps
+from crapssim.dice import Dice
+from crapssim.vectorized import VECTOR_STRATEGIES, run_vectorized
+
+N_SIM = 40
+N_ROLLS = 2000
+
+
+def _rolls(n_sim):
+    rolls = np.zeros((n_sim, N_ROLLS), dtype=np.int64)
+    for i in range(n_sim):
+        d = Dice(seed=i, buffer_size=N_ROLLS)
+        for k in range(N_ROLLS):
+            d.roll()
+            rolls[i, k] = d.total
+    return rolls
+
+
+@pytest.mark.parametrize("bet_strategy", list(VECTOR_STRATEGIES))
+@pytest.mark.parametrize(
+    "max_rolls, max_shooter, runout",
+    [(30, float("inf"), False), (30, float("inf"), True), (float("inf"), 3, False)],
+)
+def test_matches_table(bet_strategy, max_rolls, max_shooter, runout):
+    bankroll = 100
+    result = run_vectorized(
+        bet_strategy, bankroll, N_SIM, max_rolls, max_shooter, runout, rolls=_rolls(N_SIM)
+    )
+    for i in range(N_SIM):
+        table = craps.Table()
+        table.dice = Dice(seed=i, buffer_size=N_ROLLS)
+        player = craps.Player(bankroll, bet_strategy)
+        table.add_player(player)
+        table.run(max_rolls, max_shooter, verbose=False, runout=runout)
+
+        assert result["total_cash"][i] == pytest.approx(table.total_player_cash)
+        assert result["bankroll"][i] == pytest.approx(player.bankroll)
+        assert result["n_rolls"][i] == table.dice.n_rolls
+        assert result["n_shooters"][i] == table.n_shooters
+
+
+def test_seed_is_reproducible():
+    a = run_vectorized(craps.strategy.place68, 200, 500, 100, seed=7)
+    b = run_vectorized(craps.strategy.place68, 200, 500, 100, seed=7)
+    np.testing.assert_array_equal(a["total_cash"], b["total_cash"])
+
+
+def test_unsupported_strategy():
+    with pytest.raises(ValueError):
+        run_vectorized(craps.strategy.dicedoctor, 200, 10, 100)